@@ -5,10 +5,11 @@ Creates and configures the Flask application instance
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from config import config
+from app.utils.db_routing import RoutingSession
 import importlib.util
 
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 def create_app(config_name='default'):
     """
@@ -62,6 +63,10 @@ def create_app(config_name='default'):
     
     # Load configuration
     app.config.from_object(config[config_name])
+    if app.config.get('PROXY_FIX_X_FOR'):
+        # Client IPs from X-Forwarded-For, trusting only the configured hops
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
     
     # Initialize extensions
     db_uri = app.config.get('SQLALCHEMY_DATABASE_URI', '') or ''
@@ -69,11 +74,19 @@ def create_app(config_name='default'):
         if importlib.util.find_spec('pg8000') is None:
             app.logger.error("pg8000 is missing; falling back to in-memory sqlite on Vercel startup.")
             app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    from app.utils.db_engine import build_engine_options, configure_engines
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(app.config)
     db.init_app(app)
+    with app.app_context():
+        configure_engines(app)
+    from app.utils.session_store import init_session_store
+    init_session_store(app)
     
     # Register custom Jinja2 filters
     from app.utils.helpers import format_peso
     app.jinja_env.filters['peso'] = format_peso
+    from app.utils.assets import init_assets
+    init_assets(app)
     
     @app.context_processor
     def inject_public_config():
@@ -88,11 +101,41 @@ def create_app(config_name='default'):
     from app.routes.auth import auth_bp
     from app.routes.admin import admin_bp
     from app.routes.customer import customer_bp
+    from app.routes.events import events_bp
     
     app.register_blueprint(main_bp)
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(admin_bp, url_prefix='/admin')
     app.register_blueprint(customer_bp)
+    app.register_blueprint(events_bp)
+    
+    # Request instrumentation
+    from app.utils.metrics import init_metrics
+    init_metrics(app, db)
+    from app.utils.profiling import init_profiling
+    init_profiling(app)
+    from app.utils.query_log import init_query_log
+    init_query_log(app, db)
+    from app.utils.tracing import init_tracing
+    init_tracing(app, db)
+    
+    # Register CLI commands
+    from app.utils.db_init import db_upgrade_command
+    from app.utils.query_plans import db_explain_command
+    app.cli.add_command(db_upgrade_command)
+    app.cli.add_command(db_explain_command)
+    from app.utils.export_jobs import export_worker_command
+    app.cli.add_command(export_worker_command)
+    from app.utils.analytics import analytics_snapshot_command
+    app.cli.add_command(analytics_snapshot_command)
+    from app.utils.inventory import inventory_velocity_command
+    app.cli.add_command(inventory_velocity_command)
+    from app.utils.session_store import sessions_purge_command
+    app.cli.add_command(sessions_purge_command)
+    from app.utils.rate_limit import rate_limit_reset_command
+    app.cli.add_command(rate_limit_reset_command)
+    from app.utils.otp import otp_purge_command
+    app.cli.add_command(otp_purge_command)
     
     # Initialize database and create default data.
     # In serverless deploys (e.g., Vercel), avoid crashing the whole app when
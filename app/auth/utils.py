@@ -1,54 +1,162 @@
+import threading
+from collections import namedtuple
 from functools import wraps
 from datetime import datetime, timedelta
 import os
-import requests
-from flask import session, redirect, url_for, flash, current_app
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import session, redirect, url_for, flash, current_app, g, jsonify
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import load_only
 from app import db
-from app.models import OtpToken
+from app.models import OtpToken, User
+from app.utils import passwords
+from app.utils.captcha import verify_token
+from app.utils.db_routing import RoutingSession
+from app.utils.otp import otp_digest, active_tokens_query, retire_excess_tokens, match_token, purge_if_due
+from app.utils.rate_limit import check_rate_limit
+from app.utils.tracing import traced
+from app.utils.ttl_cache import TTLCache
+
+# Columns loaded for the request's user; the rest (password hash, created_at) load on access
+CURRENT_USER_COLUMNS = (User.id, User.username, User.email, User.role, User.full_name,
+                        User.address, User.phone_number, User.default_payment_method)
+USERS_CHANGED_KEY = 'users_changed'
+
+Identity = namedtuple('Identity', 'id username role')
+
+
+_identity_cache = {'size': None, 'cache': None}
+_identity_cache_lock = threading.Lock()
+
+
+def _get_identity_cache():
+    """Per-process user_id -> Identity cache, rebuilt when CURRENT_USER_CACHE_SIZE changes."""
+    size = current_app.config.get('CURRENT_USER_CACHE_SIZE', 10000)
+    with _identity_cache_lock:
+        if _identity_cache['size'] != size:
+            _identity_cache.update(size=size, cache=TTLCache(size))
+        return _identity_cache['cache']
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _collect_changed_users(db_session, flush_context):
+    changed = [inspect(obj).identity[0] for obj in list(db_session.dirty) + list(db_session.deleted)
+               if isinstance(obj, User)]
+    if changed:
+        db_session.info.setdefault(USERS_CHANGED_KEY, set()).update(changed)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _evict_changed_users(db_session):
+    changed = db_session.info.pop(USERS_CHANGED_KEY, None)
+    if changed:
+        _get_identity_cache().evict(*changed)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _drop_changed_users(db_session):
+    db_session.info.pop(USERS_CHANGED_KEY, None)
+
+
+def get_current_user():
+    """
+    The signed-in User, loaded once per request into g.current_user
+
+    Only CURRENT_USER_COLUMNS are fetched; None when signed out or the
+    account no longer exists.
+    """
+    if 'current_user' not in g:
+        user_id = session.get('user_id')
+        user = db.session.get(User, user_id, options=[load_only(*CURRENT_USER_COLUMNS)]) if user_id else None
+        g.current_user = user
+        if user is not None:
+            g.current_identity = Identity(user.id, user.username, user.role)
+            ttl = current_app.config.get('CURRENT_USER_CACHE_TTL', 30)
+            if ttl > 0:
+                _get_identity_cache().set(user.id, g.current_identity, ttl)
+    return g.current_user
+
+
+def get_current_identity():
+    """
+    (id, username, role) of the signed-in user, or None
+
+    Served from a per-process cache for CURRENT_USER_CACHE_TTL seconds so
+    authorization checks skip the database; falls back to get_current_user().
+    """
+    if 'current_identity' not in g:
+        user_id = session.get('user_id')
+        identity = _get_identity_cache().get(user_id) if user_id else None
+        if identity is None and user_id:
+            get_current_user()
+        g.setdefault('current_identity', identity)
+    return g.current_identity
+
+
+def _deny(api, signed_in, message):
+    if api:
+        return jsonify({'error': 'Unauthorized'}), 403
+    if not signed_in:
+        if 'user_id' in session:
+            session.clear()  # account is gone; drop the stale login
+        flash('Please login to access this page', 'warning')
+        return redirect(url_for('auth.login'))
+    flash(message, 'danger')
+    return redirect(url_for('main.index'))
+
 
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
-            flash('Please login to access this page', 'warning')
-            return redirect(url_for('auth.login'))
+        if get_current_identity() is None:
+            return _deny(False, False, None)
         return f(*args, **kwargs)
     return decorated_function
 
+
+def role_required(*allowed_roles, api=False, message='You do not have permission to access this page'):
+    """
+    Allow only signed-in users whose current role is in allowed_roles
+
+    The role comes from get_current_identity(), not the session cookie, so
+    demoted or deleted accounts lose access without signing out. api=True
+    answers a JSON 403 instead of redirecting.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            identity = get_current_identity()
+            if identity is None or identity.role not in allowed_roles:
+                return _deny(api, identity is not None, message)
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+
 def admin_required(f):
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
-            flash('Please login to access this page', 'warning')
-            return redirect(url_for('auth.login'))
-        
-        if session.get('role') != 'admin':
-            flash('Admin access required', 'danger')
-            return redirect(url_for('main.index'))
-        
-        return f(*args, **kwargs)
-    return decorated_function
+    return role_required('admin', message='Admin access required')(f)
+
 
 def customer_required(f):
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
-            flash('Please login to access this page', 'warning')
-            return redirect(url_for('auth.login'))
-        
-        if session.get('role') != 'customer':
-            flash('Customer access only', 'danger')
-            return redirect(url_for('main.index'))
-        
-        return f(*args, **kwargs)
-    return decorated_function
+    return role_required('customer', message='Customer access only')(f)
+
+
+def staff_required(f):
+    return role_required('staff', 'cashier', 'admin')(f)
 
+
+def cashier_required(f):
+    return role_required('cashier', 'admin')(f)
+
+@traced('auth.hash_password')
 def hash_password(password):
-    return generate_password_hash(password)
+    return passwords.hash_password(password)
 
+@traced('auth.verify_password')
 def verify_password(password_hash, password):
-    return check_password_hash(password_hash, password)
+    return passwords.verify_password(password_hash, password)
+
+def password_needs_rehash(password_hash):
+    return passwords.needs_rehash(password_hash)
 
 def create_user_session(user):
     session['user_id'] = user.id
@@ -63,77 +171,48 @@ def get_current_user_id():
     return session.get('user_id')
 
 def get_current_user_role():
-    return session.get('role')
+    identity = get_current_identity()
+    return identity.role if identity else None
 
 def is_authenticated():
-    return 'user_id' in session
+    return get_current_identity() is not None
 
 def is_admin():
-    return session.get('role') == 'admin'
+    return get_current_user_role() == 'admin'
 
 
-def role_required(*allowed_roles):
-    def decorator(f):
-        @wraps(f)
-        def decorated_function(*args, **kwargs):
-            if 'user_id' not in session:
-                flash('Please login to access this page', 'warning')
-                return redirect(url_for('auth.login'))
-            if session.get('role') not in allowed_roles:
-                flash('You do not have permission to access this page', 'danger')
-                return redirect(url_for('main.index'))
-            return f(*args, **kwargs)
-        return decorated_function
-    return decorator
-
-
-def staff_required(f):
-    return role_required('staff', 'cashier', 'admin')(f)
-
-
-def cashier_required(f):
-    return role_required('cashier', 'admin')(f)
-
-
-def verify_captcha(response_token, remote_ip=None):
-    secret_key = current_app.config.get('RECAPTCHA_SECRET_KEY')
-    if not secret_key:
-        return True
-    payload = {
-        'secret': secret_key,
-        'response': response_token
-    }
-    if remote_ip:
-        payload['remoteip'] = remote_ip
-    try:
-        verify_url = 'https://www.google.com/recaptcha/api/siteverify'
-        resp = requests.post(verify_url, data=payload, timeout=5)
-        data = resp.json()
-        return bool(data.get('success'))
-    except Exception:
-        return False
+@traced('captcha.verify')
+def verify_captcha(response_token, remote_ip=None, subject=None):
+    return verify_token(response_token, remote_ip, subject)
 
 
 def generate_otp(user_id, purpose, ttl_minutes=10):
     code = f"{os.urandom(3).hex()[:6]}".upper()
     expires_at = datetime.utcnow() + timedelta(minutes=ttl_minutes)
-    token = OtpToken(user_id=user_id, code=code, purpose=purpose, expires_at=expires_at)
+    # Older codes beyond the limit stop working, which keeps validation bounded
+    retire_excess_tokens(user_id, purpose, current_app.config.get('OTP_MAX_ACTIVE', 3) - 1)
+    token = OtpToken(user_id=user_id, code=otp_digest(user_id, purpose, code), purpose=purpose,
+                     expires_at=expires_at)
     db.session.add(token)
     db.session.commit()
+    purge_if_due()
     return code
 
 
 def validate_otp(user_id, code, purpose):
     if not code:
         return False
-    token = (
-        OtpToken.query
-        .filter_by(user_id=user_id, code=code.upper().strip(), purpose=purpose, used=False)
+    if check_rate_limit('otp', user=user_id):
+        return False
+    tokens = (
+        active_tokens_query(user_id, purpose)
         .order_by(OtpToken.created_at.desc())
-        .first()
+        .limit(current_app.config.get('OTP_MAX_ACTIVE', 3))
+        .all()
     )
+    token = match_token(tokens, otp_digest(user_id, purpose, code))
     if not token or not token.is_valid(purpose):
         return False
     token.used = True
     db.session.commit()
-    return True
\ No newline at end of file
+    return True
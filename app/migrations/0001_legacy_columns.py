@@ -0,0 +1,28 @@
+"""
+Columns added to product, sale and voucher after their tables were first created.
+Replaces the old SQLite-only _add_missing_columns() boot check.
+"""
+from app.utils.migrations import add_column
+
+DATETIME = {'sqlite': 'DATETIME', 'postgresql': 'TIMESTAMP WITHOUT TIME ZONE'}
+FLOAT = {'sqlite': 'FLOAT', 'postgresql': 'DOUBLE PRECISION'}
+TRUE = {'sqlite': '1', 'postgresql': 'TRUE'}
+
+
+def upgrade(conn, dialect):
+    add_column(conn, 'product', 'image_urls', 'TEXT')
+    add_column(conn, 'product', 'badge', 'VARCHAR(20)')
+    add_column(conn, 'product', 'tags', 'VARCHAR(100)')
+
+    add_column(conn, 'sale', 'amount_paid', FLOAT, default='0')
+    add_column(conn, 'sale', 'change_amount', FLOAT, default='0')
+
+    add_column(conn, 'voucher', 'voucher_type', 'VARCHAR(50)', default="'min_spend_discount'")
+    add_column(conn, 'voucher', 'discount_value', FLOAT, default='0')
+    add_column(conn, 'voucher', 'max_uses', 'INTEGER', default='1')
+    add_column(conn, 'voucher', 'uses', 'INTEGER', default='0')
+    add_column(conn, 'voucher', 'start_at', DATETIME)
+    add_column(conn, 'voucher', 'end_at', DATETIME)
+    add_column(conn, 'voucher', 'is_active', 'BOOLEAN', default=TRUE)
+    add_column(conn, 'voucher', 'applies_to_product_id', 'INTEGER')
+    add_column(conn, 'voucher', 'min_purchase', FLOAT, default='0')
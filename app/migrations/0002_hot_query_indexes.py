@@ -0,0 +1,14 @@
+"""
+Composite indexes matching the storefront, profile, review and OTP query shapes.
+"""
+from app.utils.migrations import create_index
+
+
+def upgrade(conn, dialect):
+    create_index(
+        conn, 'ix_product_listing', 'product', ['is_pinned', 'created_at'],
+        where='stock > 0' if dialect == 'postgresql' else None
+    )
+    create_index(conn, 'ix_review_product_rating', 'review', ['product_id', 'rating'])
+    create_index(conn, 'ix_order_user_created', 'order', ['user_id', 'created_at'])
+    create_index(conn, 'ix_otp_token_lookup', 'otp_token', ['user_id', 'code', 'purpose', 'used', 'created_at'])
@@ -0,0 +1,27 @@
+"""
+Background export jobs (export_job).
+"""
+from app import db
+from app.utils.migrations import create_table
+
+
+def upgrade(conn, dialect):
+    create_table(
+        conn, 'export_job',
+        db.Column('id', db.Integer, primary_key=True),
+        db.Column('kind', db.String(20), nullable=False),
+        db.Column('file_format', db.String(10), nullable=False),
+        db.Column('status', db.String(20), nullable=False),
+        db.Column('start_date', db.String(10)),
+        db.Column('end_date', db.String(10)),
+        db.Column('total_rows', db.Integer),
+        db.Column('processed_rows', db.Integer, nullable=False),
+        db.Column('file_name', db.String(200)),
+        db.Column('file_size', db.Integer),
+        db.Column('error', db.Text),
+        db.Column('created_by', db.Integer, db.ForeignKey('user.id', ondelete='SET NULL')),
+        db.Column('created_at', db.DateTime, nullable=False),
+        db.Column('started_at', db.DateTime),
+        db.Column('finished_at', db.DateTime),
+        db.Index('ix_export_job_status_created', 'status', 'created_at'),
+    )
@@ -0,0 +1,41 @@
+"""
+Sales velocity tables (product_daily_sales, product_velocity,
+analytics_cursor). The first `flask inventory-velocity` run backfills them
+from the full order and sale history.
+"""
+from app import db
+from app.utils.migrations import create_table
+
+
+def upgrade(conn, dialect):
+    create_table(
+        conn, 'product_daily_sales',
+        db.Column('id', db.Integer, primary_key=True),
+        db.Column('product_id', db.Integer, nullable=False),
+        db.Column('day', db.Date, nullable=False),
+        db.Column('online_units', db.Integer, nullable=False),
+        db.Column('pos_units', db.Integer, nullable=False),
+        db.Column('revenue', db.Float, nullable=False),
+        db.UniqueConstraint('product_id', 'day', name='uq_product_daily_sales_product_day'),
+        db.Index('ix_product_daily_sales_day', 'day'),
+    )
+    create_table(
+        conn, 'product_velocity',
+        db.Column('product_id', db.Integer, db.ForeignKey('product.id', ondelete='CASCADE'), primary_key=True),
+        db.Column('units_7d', db.Integer, nullable=False),
+        db.Column('units_28d', db.Integer, nullable=False),
+        db.Column('velocity_7d', db.Float, nullable=False),
+        db.Column('velocity_28d', db.Float, nullable=False),
+        db.Column('forecast_daily', db.Float, nullable=False),
+        db.Column('days_of_stock', db.Float),
+        db.Column('sell_through_28d', db.Float, nullable=False),
+        db.Column('reorder_qty', db.Integer, nullable=False),
+        db.Column('computed_at', db.DateTime, nullable=False),
+    )
+    create_table(
+        conn, 'analytics_cursor',
+        db.Column('name', db.String(50), primary_key=True),
+        db.Column('last_order_id', db.Integer, nullable=False),
+        db.Column('last_sale_id', db.Integer, nullable=False),
+        db.Column('updated_at', db.DateTime),
+    )
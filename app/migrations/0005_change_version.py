@@ -0,0 +1,15 @@
+"""
+change_version table backing ETag / Last-Modified on polling endpoints.
+Rows appear on first write.
+"""
+from app import db
+from app.utils.migrations import create_table
+
+
+def upgrade(conn, dialect):
+    create_table(
+        conn, 'change_version',
+        db.Column('scope', db.String(100), primary_key=True),
+        db.Column('version', db.Integer, nullable=False),
+        db.Column('updated_at', db.DateTime, nullable=False),
+    )
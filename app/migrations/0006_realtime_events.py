@@ -0,0 +1,16 @@
+"""
+realtime_event outbox table behind the /events SSE stream.
+"""
+from app import db
+from app.utils.migrations import create_table
+
+
+def upgrade(conn, dialect):
+    create_table(
+        conn, 'realtime_event',
+        db.Column('id', db.Integer, primary_key=True),
+        db.Column('channel', db.String(50), nullable=False),
+        db.Column('event', db.String(50), nullable=False),
+        db.Column('payload', db.Text, nullable=False),
+        db.Column('created_at', db.DateTime, nullable=False, index=True),
+    )
@@ -0,0 +1,21 @@
+"""
+user_session table for the server-side session store (SESSION_BACKEND=server).
+Existing cookie sessions are not carried over, so users sign in again once
+after the switch.
+"""
+from app import db
+from app.utils.migrations import create_table
+
+
+def upgrade(conn, dialect):
+    create_table(
+        conn, 'user_session',
+        db.Column('id', db.String(64), primary_key=True),
+        db.Column('user_id', db.Integer, index=True),
+        db.Column('data', db.Text, nullable=False),
+        db.Column('ip_address', db.String(45)),
+        db.Column('user_agent', db.String(255)),
+        db.Column('created_at', db.DateTime, nullable=False),
+        db.Column('last_seen_at', db.DateTime, nullable=False),
+        db.Column('expires_at', db.DateTime, nullable=False, index=True),
+    )
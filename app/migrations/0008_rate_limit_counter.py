@@ -0,0 +1,16 @@
+"""
+rate_limit_counter table for the shared rate limiter store
+(RATE_LIMIT_STORAGE=database).
+"""
+from app import db
+from app.utils.migrations import create_table
+
+
+def upgrade(conn, dialect):
+    create_table(
+        conn, 'rate_limit_counter',
+        db.Column('key', db.String(255), primary_key=True),
+        db.Column('window_start', db.Integer, primary_key=True),
+        db.Column('count', db.Integer, nullable=False),
+        db.Column('expires_at', db.Integer, nullable=False, index=True),
+    )
@@ -0,0 +1,22 @@
+"""
+OTP codes are stored as HMAC digests: widen otp_token.code and drop the
+outstanding plaintext tokens (they expire within minutes; users request a
+new code). The lookup now filters active tokens by (user_id, purpose), so
+the code/used/created_at/user_id indexes and the old composite are replaced
+by one composite; expires_at keeps its index for the purge.
+"""
+from app import db
+from app.utils.migrations import create_index, drop_index
+
+OLD_INDEXES = ('ix_otp_token_lookup', 'ix_otp_token_code', 'ix_otp_token_used',
+               'ix_otp_token_created_at', 'ix_otp_token_user_id')
+
+
+def upgrade(conn, dialect):
+    conn.execute(db.text("DELETE FROM otp_token"))
+    for name in OLD_INDEXES:
+        drop_index(conn, name)
+    if dialect == 'postgresql':
+        conn.execute(db.text("ALTER TABLE otp_token ALTER COLUMN code TYPE VARCHAR(64)"))
+    create_index(conn, 'ix_otp_token_active', 'otp_token', ['user_id', 'purpose', 'used', 'expires_at'])
+    create_index(conn, 'ix_otp_token_expires_at', 'otp_token', ['expires_at'])
@@ -0,0 +1,12 @@
+"""
+Export job claims: a per-run token and a heartbeat refreshed with progress,
+so only jobs whose runner stopped reporting are requeued.
+"""
+from app.utils.migrations import add_column
+
+DATETIME = {'sqlite': 'DATETIME', 'postgresql': 'TIMESTAMP WITHOUT TIME ZONE'}
+
+
+def upgrade(conn, dialect):
+    add_column(conn, 'export_job', 'claim_token', 'VARCHAR(32)')
+    add_column(conn, 'export_job', 'heartbeat_at', DATETIME)
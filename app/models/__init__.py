@@ -6,6 +6,7 @@ from datetime import datetime
 import json
 from app import db
 from app.utils.helpers import format_datetime_sg, isoformat_datetime_sg
+from app.utils.assets import asset_url, asset_urls
 
 class User(db.Model):
     """User model for customer, staff, cashier, and admin accounts"""
@@ -72,6 +73,12 @@ class Product(db.Model):
     reviews = db.relationship('Review', backref='product', lazy='dynamic', cascade='all, delete-orphan')
     wishlist_items = db.relationship('WishlistItem', backref='product', lazy='dynamic', cascade='all, delete-orphan')
     
+    # Storefront listing: stock > 0 ORDER BY is_pinned DESC, created_at DESC.
+    # Partial on Postgres so out-of-stock rows never enter the index.
+    __table_args__ = (
+        db.Index('ix_product_listing', 'is_pinned', 'created_at', postgresql_where=db.text('stock > 0')),
+    )
+    
     def __repr__(self):
         return f'<Product {self.name}>'
     
@@ -121,8 +128,8 @@ class Product(db.Model):
             'category': self.category,
             'badge': self.badge,
             'tags': self.get_tags_list(),
-            'image_url': self.image_url,
-            'image_urls': self.get_image_list(),
+            'image_url': asset_url(self.image_url),
+            'image_urls': asset_urls(self.get_image_list()),
             'created_at': isoformat_datetime_sg(self.created_at),
             'created_at_display': format_datetime_sg(self.created_at) if self.created_at else None
         }
@@ -137,6 +144,8 @@ class Review(db.Model):
     comment = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     user = db.relationship('User', backref=db.backref('reviews', lazy='dynamic'))
+    # Covers the per-product AVG(rating)/COUNT aggregates on listing pages
+    __table_args__ = (db.Index('ix_review_product_rating', 'product_id', 'rating'),)
 
 
 class WishlistItem(db.Model):
@@ -206,6 +215,7 @@ class Cart(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Composite unique constraint to prevent duplicate cart items
+    # (its index also serves the per-user cart lookups)
     __table_args__ = (
         db.UniqueConstraint('user_id', 'product_id', name='unique_user_product'),
     )
@@ -249,6 +259,9 @@ class Order(db.Model):
     voucher_discount = db.Column(db.Float, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
+    # Profile history: user_id = ? ORDER BY created_at DESC
+    __table_args__ = (db.Index('ix_order_user_created', 'user_id', 'created_at'),)
+    
     def __repr__(self):
         return f'<Order {self.id}>'
     
@@ -284,12 +297,15 @@ class OtpToken(db.Model):
     __tablename__ = 'otp_token'
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
-    code = db.Column(db.String(10), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    code = db.Column(db.String(64), nullable=False)  # HMAC-SHA256 of the code, never the code itself
     purpose = db.Column(db.String(50), nullable=False)  # reset, payment, other
-    expires_at = db.Column(db.DateTime, nullable=False, index=True)
-    used = db.Column(db.Boolean, default=False, index=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)  # purge_otp_tokens
+    used = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # validate_otp: active tokens of (user_id, purpose), compared in constant time
+    __table_args__ = (db.Index('ix_otp_token_active', 'user_id', 'purpose', 'used', 'expires_at'),)
     
     def is_valid(self, purpose):
         if self.used or self.purpose != purpose:
@@ -329,4 +345,168 @@ class ReportCheckpoint(db.Model):
             'period': self.period,
             'last_reset_at': isoformat_datetime_sg(self.last_reset_at),
             'last_reset_at_display': format_datetime_sg(self.last_reset_at)
-        }
\ No newline at end of file
+        }
+
+class ExportJob(db.Model):
+    """Background data export (CSV/XLSX/Parquet) written to the instance folder"""
+    __tablename__ = 'export_job'
+    __table_args__ = (
+        db.Index('ix_export_job_status_created', 'status', 'created_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # orders, sales, products, customers
+    file_format = db.Column(db.String(10), nullable=False)  # csv, xlsx, parquet
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, completed, failed
+    start_date = db.Column(db.String(10), nullable=True)  # YYYY-MM-DD filter, inclusive
+    end_date = db.Column(db.String(10), nullable=True)
+    total_rows = db.Column(db.Integer, nullable=True)
+    processed_rows = db.Column(db.Integer, nullable=False, default=0)
+    file_name = db.Column(db.String(200), nullable=True)
+    file_size = db.Column(db.Integer, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    claim_token = db.Column(db.String(32), nullable=True)  # set by the run that holds the job
+    heartbeat_at = db.Column(db.DateTime, nullable=True)  # refreshed after every batch
+    
+    def __repr__(self):
+        return f'<ExportJob {self.id} {self.kind}.{self.file_format} {self.status}>'
+    
+    @property
+    def progress(self):
+        if self.status == 'completed':
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(99, int(self.processed_rows * 100 / self.total_rows))
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'format': self.file_format,
+            'status': self.status,
+            'start_date': self.start_date,
+            'end_date': self.end_date,
+            'total_rows': self.total_rows,
+            'processed_rows': self.processed_rows,
+            'progress': self.progress,
+            'file_name': self.file_name,
+            'file_size': self.file_size,
+            'error': self.error,
+            'created_at': isoformat_datetime_sg(self.created_at),
+            'finished_at': isoformat_datetime_sg(self.finished_at)
+        }
+
+
+class ProductDailySales(db.Model):
+    """Units and revenue per product per Singapore-local day, both channels"""
+    __tablename__ = 'product_daily_sales'
+    __table_args__ = (
+        db.UniqueConstraint('product_id', 'day', name='uq_product_daily_sales_product_day'),
+        db.Index('ix_product_daily_sales_day', 'day'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, nullable=False)  # no FK: history outlives deleted products
+    day = db.Column(db.Date, nullable=False)
+    online_units = db.Column(db.Integer, nullable=False, default=0)
+    pos_units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+
+class ProductVelocity(db.Model):
+    """Precomputed sales velocity and stock forecast per product"""
+    __tablename__ = 'product_velocity'
+    
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id', ondelete='CASCADE'), primary_key=True)
+    units_7d = db.Column(db.Integer, nullable=False, default=0)
+    units_28d = db.Column(db.Integer, nullable=False, default=0)
+    velocity_7d = db.Column(db.Float, nullable=False, default=0)  # units per day
+    velocity_28d = db.Column(db.Float, nullable=False, default=0)
+    forecast_daily = db.Column(db.Float, nullable=False, default=0)
+    days_of_stock = db.Column(db.Float, nullable=True)  # None when nothing is selling
+    sell_through_28d = db.Column(db.Float, nullable=False, default=0)  # sold / (sold + on hand)
+    reorder_qty = db.Column(db.Integer, nullable=False, default=0)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def to_dict(self):
+        return {
+            'units_7d': self.units_7d,
+            'units_28d': self.units_28d,
+            'velocity_7d': round(self.velocity_7d, 3),
+            'velocity_28d': round(self.velocity_28d, 3),
+            'forecast_daily': round(self.forecast_daily, 3),
+            'days_of_stock': round(self.days_of_stock, 1) if self.days_of_stock is not None else None,
+            'sell_through_28d': round(self.sell_through_28d, 3),
+            'reorder_qty': self.reorder_qty,
+            'computed_at': isoformat_datetime_sg(self.computed_at)
+        }
+
+
+class AnalyticsCursor(db.Model):
+    """High-water marks of incremental analytics jobs"""
+    __tablename__ = 'analytics_cursor'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    last_order_id = db.Column(db.Integer, nullable=False, default=0)
+    last_sale_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=True)
+
+
+class ChangeVersion(db.Model):
+    """Counter bumped whenever data behind a polled endpoint changes (ETag source)"""
+    __tablename__ = 'change_version'
+    
+    scope = db.Column(db.String(100), primary_key=True)  # e.g. 'orders', 'user:42:cart'
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class RealtimeEvent(db.Model):
+    """Outbox of server-sent events, written in the same transaction as the change"""
+    __tablename__ = 'realtime_event'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    channel = db.Column(db.String(50), nullable=False)  # 'admin' or 'user:<id>'
+    event = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default='{}')  # JSON
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class UserSession(db.Model):
+    """Server-side session; the cookie holds only an opaque token whose SHA-256 is the key"""
+    __tablename__ = 'user_session'
+    
+    id = db.Column(db.String(64), primary_key=True)  # sha256 hex of the cookie token
+    user_id = db.Column(db.Integer, nullable=True, index=True)
+    data = db.Column(db.Text, nullable=False, default='{}')
+    ip_address = db.Column(db.String(45))
+    user_agent = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_seen_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    
+    def to_dict(self, current_id=None):
+        return {
+            'id': self.id,
+            'user_agent': self.user_agent,
+            'ip_address': self.ip_address,
+            'created_at': isoformat_datetime_sg(self.created_at),
+            'last_seen_at': isoformat_datetime_sg(self.last_seen_at),
+            'expires_at': isoformat_datetime_sg(self.expires_at),
+            'current': self.id == current_id
+        }
+
+
+class RateLimitCounter(db.Model):
+    """Hits per key per fixed window, shared by workers when RATE_LIMIT_STORAGE=database"""
+    __tablename__ = 'rate_limit_counter'
+    
+    key = db.Column(db.String(255), primary_key=True)  # e.g. 'login:ip:60:203.0.113.7'
+    window_start = db.Column(db.Integer, primary_key=True)  # epoch seconds
+    count = db.Column(db.Integer, nullable=False, default=0)
+    expires_at = db.Column(db.Integer, nullable=False, index=True)  # epoch seconds
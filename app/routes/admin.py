@@ -2,17 +2,29 @@
 ETERNO E-Commerce Platform - Admin Routes
 Handles admin dashboard, POS, inventory management, and sales
 """
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for, session, send_file, current_app
+from flask import Blueprint, render_template, request, jsonify, url_for, session, send_file, send_from_directory, current_app, Response, stream_with_context
 from app import db
-from app.models import User, Product, Sale, Order, ReportCheckpoint, Voucher
+from app.models import User, Product, Sale, Order, ReportCheckpoint, Voucher, ExportJob
 from app.utils.helpers import (
     calculate_discount, validate_product_data, 
     sanitize_string, validate_payment_method,
     get_period_range, get_period_label, normalize_period
 )
-from app.utils.export import export_to_excel
+from app.utils.export import EXPORTS, EXPORT_FORMATS, parse_date_range, stream_csv, export_xlsx_tempfile, export_filename
+from app.utils.export_jobs import JOB_FORMATS, MIMETYPES, enqueue_export, job_file_path
+from app.utils.inventory import refresh_if_stale, velocity_by_product, low_stock_products, record_order_status_change
+from app.utils.analytics import snapshot_meta, load_snapshot, refresh_snapshot_async, compute_reports
 from app.utils.pdf import generate_sale_receipt, generate_sales_report_pdf, generate_dashboard_report_pdf
 from app.utils.email import send_order_status_email
+from app.utils.db_engine import write_transaction, get_pool_metrics
+from app.utils.db_routing import read_replica
+from app.auth.utils import role_required, staff_required, cashier_required
+from app.utils.conditional import conditional_get, for_roles
+from app.utils.events import publish
+from app.utils.session_store import list_user_sessions, revoke_user_sessions
+from app.utils.profiling import list_profiles, is_profile_name, profiles_dir
+from app.utils.query_log import top_queries, query_log_dir
+from app.utils.assets import asset_url, storage_url, signed_url, signed_or_role
 import json
 import os
 from werkzeug.utils import secure_filename
@@ -42,10 +54,9 @@ def _normalize_product_tags(raw_tags):
 # ==================== DASHBOARD ====================
 
 @admin_bp.route('/dashboard')
+@staff_required
+@read_replica
 def dashboard():
-    if session.get('role') not in ('admin', 'staff', 'cashier'):
-        return redirect(url_for('auth.login'))
-    
     total_products = Product.query.count()
     total_customers = User.query.filter_by(role='customer').count()
     checkpoint = ReportCheckpoint.query.filter_by(period='overall').first()
@@ -89,10 +100,8 @@ def dashboard():
 # ==================== POS SYSTEM ====================
 
 @admin_bp.route('/pos')
+@cashier_required
 def pos():
-    if session.get('role') not in ('admin', 'cashier'):
-        return redirect(url_for('auth.login'))
-    
     # Get all products for POS listing (tiles can visually indicate stock state).
     products = Product.query.order_by(Product.name.asc()).all()
     products_payload = [product.to_dict() for product in products]
@@ -101,10 +110,9 @@ def pos():
 
 
 @admin_bp.route('/sales/create', methods=['POST'])
+@role_required('admin', 'cashier', api=True)
+@write_transaction
 def create_sale():
-    if session.get('role') not in ('admin', 'cashier'):
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     try:
         data = request.json
         items = data.get('items', [])
@@ -168,6 +176,7 @@ def create_sale():
         for item in items:
             product = Product.query.get(item['product_id'])
             product.reduce_stock(item['quantity'])
+            product.sold_count = (product.sold_count or 0) + item['quantity']
         
         # Create sale record
         new_sale = Sale(
@@ -182,11 +191,14 @@ def create_sale():
         )
         
         db.session.add(new_sale)
+        db.session.flush()
+        publish('admin', 'new_sale', {
+            'sale_id': new_sale.id,
+            'total_amount': final_total,
+            'payment_method': payment_method
+        })
         db.session.commit()
         
-        # Export to Excel
-        export_to_excel()
-        
         return jsonify({
             'success': True,
             'sale_id': new_sale.id,
@@ -203,10 +215,8 @@ def create_sale():
 
 
 @admin_bp.route('/receipt/<int:sale_id>')
+@cashier_required
 def generate_receipt(sale_id):
-    if session.get('role') not in ('admin', 'cashier'):
-        return redirect(url_for('auth.login'))
-    
     sale = Sale.query.get_or_404(sale_id)
     buffer = generate_sale_receipt(sale)
     
@@ -221,26 +231,54 @@ def generate_receipt(sale_id):
 # ==================== INVENTORY MANAGEMENT ====================
 
 @admin_bp.route('/inventory')
+@role_required('admin', 'staff')
 def inventory():
-    if session.get('role') not in ('admin', 'staff'):
-        return redirect(url_for('auth.login'))
-    
     # Get all products
     products = Product.query.order_by(Product.name).all()
     
     # Prepare products data as JSON for JavaScript
-    products_payload = [product.to_dict() for product in products]
+    try:
+        refresh_if_stale()
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception("Sales velocity refresh failed")
+    velocity = velocity_by_product()
+    products_payload = []
+    for product in products:
+        payload = product.to_dict()
+        payload['velocity'] = velocity.get(product.id)
+        products_payload.append(payload)
     
     return render_template('admin_inventory.html', 
                          products=products, 
-                         products_payload=products_payload)
+                         products_payload=products_payload,
+                         velocity=velocity)
+
+
+@admin_bp.route('/inventory/low-stock')
+@role_required('admin', 'staff', api=True)
+def low_stock():
+    """Products forecast to sell out within ?days= (default LOW_STOCK_DAYS) or at/below LOW_STOCK_UNITS"""
+    try:
+        days = request.args.get('days', type=float)
+        if days is not None and days < 0:
+            return jsonify({'error': 'days must be zero or more'}), 400
+        refresh_if_stale()
+        alerts = low_stock_products(max_days=days)
+        return jsonify({
+            'success': True,
+            'days': days if days is not None else current_app.config.get('LOW_STOCK_DAYS', 14),
+            'products': alerts
+        })
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception("Low-stock report failed")
+        return jsonify({'error': 'Failed to build low-stock report'}), 500
 
 
 @admin_bp.route('/products/add', methods=['POST'])
+@role_required('admin', 'staff', api=True)
 def add_product():
-    if session.get('role') not in ('admin', 'staff'):
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     try:
         data = request.json
         
@@ -254,11 +292,11 @@ def add_product():
             badge = None
         image_urls_raw = data.get('image_urls')
         if isinstance(image_urls_raw, list):
-            urls = [sanitize_string(u, max_length=500) for u in image_urls_raw[:20] if u]
+            urls = [storage_url(sanitize_string(u, max_length=500)) for u in image_urls_raw[:20] if u]
         else:
-            single = sanitize_string(data.get('image_url', ''), max_length=500)
+            single = storage_url(sanitize_string(data.get('image_url', ''), max_length=500))
             urls = [single] if single else []
-        primary = urls[0] if urls else sanitize_string(data.get('image_url', ''), max_length=500)
+        primary = urls[0] if urls else storage_url(sanitize_string(data.get('image_url', ''), max_length=500))
         new_product = Product(
             name=sanitize_string(data['name'], max_length=100),
             description=sanitize_string(data.get('description', '')),
@@ -275,9 +313,6 @@ def add_product():
         db.session.add(new_product)
         db.session.commit()
         
-        # Export to Excel
-        export_to_excel()
-        
         return jsonify({
             'success': True,
             'product': new_product.to_dict()
@@ -291,10 +326,8 @@ def add_product():
 
 
 @admin_bp.route('/products/update/<int:product_id>', methods=['PUT'])
+@role_required('admin', 'staff', api=True)
 def update_product(product_id):
-    if session.get('role') not in ('admin', 'staff'):
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     try:
         product = Product.query.get_or_404(product_id)
         data = request.json
@@ -327,11 +360,11 @@ def update_product(product_id):
             product.category = sanitize_string(data['category'], max_length=50)
         
         if 'image_urls' in data and isinstance(data['image_urls'], list):
-            urls = [sanitize_string(u, max_length=500) for u in data['image_urls'][:20] if u]
+            urls = [storage_url(sanitize_string(u, max_length=500)) for u in data['image_urls'][:20] if u]
             product.image_urls = json.dumps(urls) if urls else None
             product.image_url = urls[0] if urls else (product.image_url or '')
         elif 'image_url' in data:
-            product.image_url = sanitize_string(data['image_url'], max_length=500)
+            product.image_url = storage_url(sanitize_string(data['image_url'], max_length=500))
         if 'badge' in data:
             badge = sanitize_string(data.get('badge', ''), max_length=20).lower()
             product.badge = badge if badge in ('new', 'sale', 'limited') else None
@@ -341,9 +374,6 @@ def update_product(product_id):
             product.tags = _normalize_product_tags(data.get('tags'))
         db.session.commit()
         
-        # Export to Excel
-        export_to_excel()
-        
         return jsonify({
             'success': True,
             'product': product.to_dict()
@@ -357,19 +387,14 @@ def update_product(product_id):
 
 
 @admin_bp.route('/products/delete/<int:product_id>', methods=['DELETE'])
+@role_required('admin', 'staff', api=True)
 def delete_product(product_id):
-    if session.get('role') not in ('admin', 'staff'):
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     try:
         product = Product.query.get_or_404(product_id)
         
         db.session.delete(product)
         db.session.commit()
         
-        # Export to Excel
-        export_to_excel()
-        
         return jsonify({'success': True})
     
     except Exception as e:
@@ -380,11 +405,11 @@ def delete_product(product_id):
 # ==================== ORDER MANAGEMENT ====================
 
 @admin_bp.route('/orders')
+@role_required('admin', 'staff', 'cashier', api=True)
+@read_replica
+@conditional_get(for_roles(('admin', 'staff', 'cashier'), 'orders'))
 def get_orders():
     """Get all orders for admin dashboard with pagination support"""
-    if session.get('role') not in ('admin', 'staff', 'cashier'):
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     try:
         limit = request.args.get('limit', None, type=int)
         
@@ -472,11 +497,9 @@ def get_orders():
 
 
 @admin_bp.route('/orders/<int:order_id>')
+@role_required('admin', api=True)
 def get_order_details(order_id):
     """Get detailed information about a specific order"""
-    if session.get('role') != 'admin':
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     try:
         order = Order.query.get(order_id)
         if order:
@@ -538,11 +561,9 @@ def get_order_details(order_id):
 
 
 @admin_bp.route('/orders/<int:order_id>/status', methods=['PUT'])
+@role_required('admin', api=True)
 def update_order_status(order_id):
     """Update order status"""
-    if session.get('role') != 'admin':
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     try:
         order = Order.query.get_or_404(order_id)
         data = request.json
@@ -559,8 +580,13 @@ def update_order_status(order_id):
         
         old_status = order.status
         order.status = new_status
+        record_order_status_change(order, old_status, new_status)
+        if new_status != old_status:
+            event_data = {'order_id': order.id, 'status': new_status, 'previous_status': old_status}
+            if order.user_id:
+                publish(f'user:{order.user_id}', 'order_status', event_data)
+            publish('admin', 'order_status', event_data)
         db.session.commit()
-        export_to_excel()
         try:
             send_order_status_email(order, old_status, new_status)
         except Exception:
@@ -577,10 +603,9 @@ def update_order_status(order_id):
 
 
 @admin_bp.route('/customers')
+@role_required('admin', api=True)
 def get_customers():
     """Get customer accounts for admin management."""
-    if session.get('role') != 'admin':
-        return jsonify({'error': 'Unauthorized'}), 403
     try:
         customers = User.query.filter_by(role='customer').order_by(User.created_at.desc()).all()
         return jsonify({
@@ -598,31 +623,43 @@ def get_customers():
 
 
 @admin_bp.route('/customers/<int:user_id>', methods=['DELETE'])
+@role_required('admin', api=True)
 def delete_customer(user_id):
     """Delete customer account and related records."""
-    if session.get('role') != 'admin':
-        return jsonify({'error': 'Unauthorized'}), 403
     try:
         customer = User.query.get_or_404(user_id)
         if customer.role != 'customer':
             return jsonify({'error': 'Only customer accounts can be deleted'}), 400
         if session.get('user_id') == customer.id:
             return jsonify({'error': 'You cannot delete your own active account'}), 400
+        revoke_user_sessions(customer.id)
         db.session.delete(customer)
         db.session.commit()
-        export_to_excel()
         return jsonify({'success': True})
     except Exception:
         db.session.rollback()
         return jsonify({'error': 'Failed to delete customer'}), 500
 
 
+@admin_bp.route('/customers/<int:user_id>/sessions', methods=['GET', 'DELETE'])
+@role_required('admin', api=True)
+def customer_sessions(user_id):
+    """List (GET) or sign out everywhere (DELETE) a customer's sessions."""
+    customer = User.query.get_or_404(user_id)
+    if request.method == 'DELETE':
+        revoked = revoke_user_sessions(customer.id)
+        db.session.commit()
+        return jsonify({'success': True, 'revoked': revoked})
+    return jsonify({
+        'success': True,
+        'sessions': [s.to_dict() for s in list_user_sessions(customer.id)]
+    })
+
+
 @admin_bp.route('/products/list')
+@role_required('admin', api=True)
 def get_products_list():
     """Get all products for admin dashboard"""
-    if session.get('role') != 'admin':
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     try:
         products = Product.query.order_by(Product.name).all()
         products_list = [product.to_dict() for product in products]
@@ -637,11 +674,9 @@ def get_products_list():
 
 
 @admin_bp.route('/products/<int:product_id>/orders')
+@role_required('admin', api=True)
 def get_product_orders(product_id):
     """Get order IDs that contain a specific product"""
-    if session.get('role') != 'admin':
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     try:
         # Get all orders
         orders = Order.query.all()
@@ -668,11 +703,11 @@ def get_product_orders(product_id):
 
 
 @admin_bp.route('/revenue')
+@role_required('admin', 'staff', 'cashier', api=True)
+@read_replica
+@conditional_get(for_roles(('admin', 'staff', 'cashier'), 'orders'))
 def get_revenue_breakdown():
     """Get revenue breakdown for admin dashboard"""
-    if session.get('role') not in ('admin', 'staff', 'cashier'):
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     try:
         checkpoint = ReportCheckpoint.query.filter_by(period='overall').first()
         baseline = checkpoint.last_reset_at if checkpoint else None
@@ -713,10 +748,10 @@ def get_revenue_breakdown():
 
 
 @admin_bp.route('/revenue/history')
+@role_required('admin', api=True)
+@read_replica
 def get_revenue_history():
     """Get revenue breakdown by month for history view."""
-    if session.get('role') != 'admin':
-        return jsonify({'error': 'Unauthorized'}), 403
     try:
         months = int(request.args.get('months', 12))
         months = min(max(1, months), 24)
@@ -752,11 +787,9 @@ def get_revenue_history():
 
 
 @admin_bp.route('/reports/checkpoints')
+@role_required('admin', api=True)
 def get_report_checkpoints():
     """Get last reset timestamps for report periods"""
-    if session.get('role') != 'admin':
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     try:
         checkpoints = ReportCheckpoint.query.all()
         return jsonify({
@@ -768,11 +801,9 @@ def get_report_checkpoints():
 
 
 @admin_bp.route('/reports/reset', methods=['POST'])
+@role_required('admin', api=True)
 def reset_reports():
     """Reset report baseline timestamp for a given period"""
-    if session.get('role') != 'admin':
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     try:
         data = request.json or {}
         period = data.get('period')
@@ -811,11 +842,10 @@ def reset_reports():
 
 
 @admin_bp.route('/reports/pdf')
+@role_required('admin', api=True)
+@read_replica
 def download_report_pdf():
     """Generate PDF sales report for the selected period"""
-    if session.get('role') != 'admin':
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     try:
         period = request.args.get('period', 'weekly')
         period_key = normalize_period(period)
@@ -881,10 +911,10 @@ def download_report_pdf():
 
 
 @admin_bp.route('/dashboard/report/pdf')
+@role_required('admin', 'staff', 'cashier', api=True)
+@read_replica
 def download_dashboard_report_pdf():
     """Generate PDF report for dashboard metrics and latest orders."""
-    if session.get('role') not in ('admin', 'staff', 'cashier'):
-        return jsonify({'error': 'Unauthorized'}), 403
     try:
         checkpoint = ReportCheckpoint.query.filter_by(period='overall').first()
         baseline = checkpoint.last_reset_at if checkpoint else None
@@ -938,14 +968,206 @@ def download_dashboard_report_pdf():
         return jsonify({'error': 'Failed to generate dashboard report'}), 500
 
 
+# ==================== ANALYTICS ====================
+
+@admin_bp.route('/analytics')
+@role_required('admin', api=True)
+def get_analytics():
+    """
+    Revenue by product, category, hour and payment method plus voucher
+    effectiveness, computed from the Arrow snapshot instead of the live DB
+
+    Query params: start/end (YYYY-MM-DD), include_cancelled (0/1), top.
+    """
+    try:
+        start, end = parse_date_range(request.args.get('start'), request.args.get('end'))
+    except ValueError:
+        return jsonify({'error': 'Dates must be YYYY-MM-DD'}), 400
+    top = min(max(request.args.get('top', 20, type=int), 1), 200)
+    include_cancelled = request.args.get('include_cancelled') in ('1', 'true')
+
+    meta = snapshot_meta()
+    if meta is None or meta['age_seconds'] > current_app.config.get('ANALYTICS_MAX_AGE', 900):
+        refreshing = refresh_snapshot_async(current_app._get_current_object())
+        if meta is None:
+            # Never built in the request: a full-history build can take minutes
+            message = ('Analytics snapshot is being built; try again shortly' if refreshing
+                       else 'No analytics snapshot yet; run `flask analytics-snapshot`')
+            response = jsonify({'success': False, 'building': refreshing, 'error': message})
+            response.headers['Retry-After'] = '10'
+            return response, 503
+        meta['refreshing'] = refreshing
+
+    started = datetime.utcnow()
+    transactions, line_items = load_snapshot()
+    reports = compute_reports(transactions, line_items, start, end, include_cancelled, top)
+    return jsonify({
+        'success': True,
+        'snapshot': meta,
+        'compute_ms': round((datetime.utcnow() - started).total_seconds() * 1000, 1),
+        'reports': reports
+    })
+
+
+# ==================== DATA EXPORT ====================
+
+@admin_bp.route('/export/<kind>')
+@role_required('admin', api=True)
+def export_data(kind):
+    """
+    Download orders, sales, products or customers as CSV or XLSX
+
+    Query params: format (csv|xlsx), start/end (YYYY-MM-DD, inclusive).
+    CSV streams while rows are read; XLSX is built in a temp file first.
+    """
+    if kind not in EXPORTS:
+        return jsonify({'error': 'Unknown export'}), 404
+    fmt = (request.args.get('format') or 'csv').lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': 'Format must be csv or xlsx'}), 400
+    try:
+        start, end = parse_date_range(request.args.get('start'), request.args.get('end'))
+    except ValueError:
+        return jsonify({'error': 'Dates must be YYYY-MM-DD'}), 400
+
+    filename = export_filename(kind, fmt)
+    if fmt == 'csv':
+        return Response(
+            stream_with_context(stream_csv(kind, start, end)),
+            mimetype='text/csv',
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
+
+    path = export_xlsx_tempfile(kind, start, end)
+    response = send_file(
+        path,
+        as_attachment=True,
+        download_name=filename,
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+    response.call_on_close(lambda: os.path.exists(path) and os.remove(path))
+    return response
+
+
+@admin_bp.route('/exports', methods=['POST'])
+@role_required('admin', api=True)
+def create_export_job():
+    """Queue a background export; poll GET /admin/exports/<id> for progress"""
+    data = request.json or {}
+    kind = data.get('kind')
+    fmt = (data.get('format') or 'csv').lower()
+    start_date = data.get('start') or None
+    end_date = data.get('end') or None
+    if kind not in EXPORTS:
+        return jsonify({'error': 'Unknown export'}), 400
+    if fmt not in JOB_FORMATS:
+        return jsonify({'error': 'Format must be csv, xlsx or parquet'}), 400
+    try:
+        parse_date_range(start_date, end_date)
+    except ValueError:
+        return jsonify({'error': 'Dates must be YYYY-MM-DD'}), 400
+    job = enqueue_export(kind, fmt, start_date, end_date, user_id=session.get('user_id'))
+    return jsonify({'success': True, 'job': job.to_dict()}), 202
+
+
+@admin_bp.route('/exports')
+@role_required('admin', api=True)
+def get_export_jobs():
+    """Most recent export jobs"""
+    jobs = ExportJob.query.order_by(ExportJob.created_at.desc()).limit(50).all()
+    return jsonify({'success': True, 'jobs': [job.to_dict() for job in jobs]})
+
+
+@admin_bp.route('/exports/<int:job_id>')
+@role_required('admin', api=True)
+def get_export_job(job_id):
+    job = db.session.get(ExportJob, job_id)
+    if not job:
+        return jsonify({'error': 'Export not found'}), 404
+    payload = job.to_dict()
+    if job.status == 'completed':
+        payload['download_url'] = signed_url(url_for('admin.download_export_job', job_id=job.id))
+    return jsonify({'success': True, 'job': payload})
+
+
+@admin_bp.route('/exports/<int:job_id>/download')
+@signed_or_role('admin')
+def download_export_job(job_id):
+    """Serve a finished export with conditional/Range support for resumable downloads; accepts signed URLs"""
+    job = db.session.get(ExportJob, job_id)
+    if not job or job.status != 'completed':
+        return jsonify({'error': 'Export not ready'}), 404
+    path = job_file_path(job)
+    if not path or not os.path.exists(path):
+        return jsonify({'error': 'Export file expired'}), 410
+    return send_file(
+        path,
+        as_attachment=True,
+        download_name=f'eterno_{job.kind}_{job.id}.{job.file_format}',
+        mimetype=MIMETYPES[job.file_format],
+        conditional=True,
+        max_age=0
+    )
+
+
+# ==================== DATABASE ====================
+
+@admin_bp.route('/db/pool')
+@role_required('admin', api=True)
+def db_pool_metrics():
+    """Connection pool metrics (checked-out, overflow, wait time) for this worker process"""
+    return jsonify({
+        'success': True,
+        'pid': os.getpid(),
+        'pools': get_pool_metrics()
+    })
+
+
+@admin_bp.route('/queries/top')
+@role_required('admin', api=True)
+def get_top_queries():
+    """Top query fingerprints across workers, by total/max/avg time, count or slow count"""
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 200)
+    sort = request.args.get('sort', 'total')
+    endpoint = request.args.get('endpoint') or None
+    return jsonify({
+        'success': True,
+        'slow_query_ms': current_app.config.get('SLOW_QUERY_MS', 200),
+        'queries': top_queries(query_log_dir(), limit=limit, sort=sort, endpoint=endpoint)
+    })
+
+
+# ==================== PROFILING ====================
+
+@admin_bp.route('/profiles')
+@role_required('admin', api=True)
+def get_profiles():
+    """List stored request profiles (newest first)"""
+    profiles = list_profiles()
+    for profile in profiles:
+        profile['download_url'] = signed_url(url_for('admin.download_profile', name=profile['name']))
+    return jsonify({
+        'success': True,
+        'enabled': current_app.config.get('PROFILING_ENABLED', False),
+        'profiles': profiles
+    })
+
+
+@admin_bp.route('/profiles/<name>')
+@signed_or_role('admin')
+def download_profile(name):
+    """Download a .prof (snakeviz, pstats) or .speedscope.json profile; accepts signed URLs"""
+    if not is_profile_name(name):
+        return jsonify({'error': 'Profile not found'}), 404
+    return send_from_directory(profiles_dir(), name, as_attachment=True)
+
+
 # ==================== IMAGE UPLOAD ====================
 
 @admin_bp.route('/products/upload-image', methods=['POST'])
+@role_required('admin', 'staff', api=True)
 def upload_product_image():
     """Upload product image file"""
-    if session.get('role') not in ('admin', 'staff'):
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     # Check if running on Vercel (serverless environment)
     if os.environ.get('VERCEL'):
         return jsonify({
@@ -979,12 +1201,13 @@ def upload_product_image():
         file_path = os.path.join(upload_folder, filename)
         file.save(file_path)
         
-        # Return URL path
-        image_url = url_for('static', filename=f'images/uploads/{filename}')
+        # Return the public (CDN-ready) URL; the stored path is what saving the product keeps
+        path = url_for('static', filename=f'images/uploads/{filename}')
         
         return jsonify({
             'success': True,
-            'image_url': image_url
+            'image_url': asset_url(path),
+            'path': path
         })
     
     except Exception as e:
@@ -994,17 +1217,15 @@ def upload_product_image():
 # ==================== VOUCHERS ====================
 
 @admin_bp.route('/vouchers')
+@role_required('admin', 'staff')
 def vouchers():
-    if session.get('role') not in ('admin', 'staff'):
-        return redirect(url_for('auth.login'))
     vouchers_list = Voucher.query.order_by(Voucher.id.desc()).all()
     return render_template('admin_vouchers.html', vouchers=vouchers_list)
 
 
 @admin_bp.route('/vouchers/create', methods=['POST'])
+@role_required('admin', 'staff', api=True)
 def create_voucher():
-    if session.get('role') not in ('admin', 'staff'):
-        return jsonify({'error': 'Unauthorized'}), 403
     try:
         data = request.get_json() or request.form
         code = (data.get('code') or '').strip().upper()
@@ -1062,9 +1283,8 @@ def create_voucher():
 
 
 @admin_bp.route('/vouchers/<int:voucher_id>/update', methods=['PUT'])
+@role_required('admin', 'staff', api=True)
 def update_voucher(voucher_id):
-    if session.get('role') not in ('admin', 'staff'):
-        return jsonify({'error': 'Unauthorized'}), 403
     v = Voucher.query.get_or_404(voucher_id)
     try:
         data = request.get_json()
@@ -3,18 +3,18 @@ ETERNO E-Commerce Platform - Authentication Routes
 Handles user login, registration, and logout with enhanced validation
 """
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash
-from werkzeug.security import generate_password_hash, check_password_hash
 from app.utils.crypto import encrypt_field
 from app import db
 from app.models import User
 from app.utils.helpers import is_valid_email, sanitize_string
-from app.utils.export import export_to_excel
-from app.auth.utils import verify_captcha
+from app.auth.utils import verify_captcha, hash_password, verify_password, password_needs_rehash
 from app.utils.email import send_welcome_email
+from app.utils.rate_limit import rate_limit
 
 auth_bp = Blueprint('auth', __name__)
 
 @auth_bp.route('/login', methods=['GET', 'POST'])
+@rate_limit('login', template='login.html')
 def login():
     """
     User login - validates credentials and creates session
@@ -38,7 +38,12 @@ def login():
         user = User.query.filter_by(username=username).first()
         
         # Verify credentials
-        if user and check_password_hash(user.password, password):
+        if user and verify_password(user.password, password):
+            # Upgrade hashes made with an older algorithm or cost
+            if password_needs_rehash(user.password):
+                user.password = hash_password(password)
+                db.session.commit()
+            
             # Create session
             session['user_id'] = user.id
             session['username'] = user.username
@@ -57,6 +62,7 @@ def login():
 
 
 @auth_bp.route('/register', methods=['GET', 'POST'])
+@rate_limit('register', template='register.html')
 def register():
     if 'user_id' in session:
         return redirect(url_for('customer.shop'))
@@ -95,11 +101,12 @@ def register():
         if User.query.filter_by(email=email).first():
             return render_template('register.html', error='Email already registered')
         
-        if not verify_captcha(captcha_response, request.remote_addr):
+        # A verified token is reused only for this same username/email
+        if not verify_captcha(captcha_response, request.remote_addr, subject=f'{username.lower()}|{email_lower}'):
             return render_template('register.html', error='CAPTCHA verification failed. Please try again.')
         
         try:
-            hashed_password = generate_password_hash(password)
+            hashed_password = hash_password(password)
             new_user = User(
                 username=username,
                 email=email.lower(),
@@ -113,7 +120,6 @@ def register():
             db.session.add(new_user)
             db.session.commit()
             
-            export_to_excel()
             send_welcome_email(new_user)
             
             return redirect(url_for('auth.login', toast='register'))
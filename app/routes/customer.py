@@ -4,14 +4,22 @@ Handles customer shopping, cart, and checkout functionality
 """
 from flask import Blueprint, render_template, request, jsonify, redirect, url_for, session, send_file
 from app import db
-from app.models import Product, Cart, Order, User, Review, WishlistItem, Voucher
+from app.models import Product, Cart, Order, Review, WishlistItem, Voucher
 from app.utils.helpers import (
     calculate_shipping_fee, calculate_cart_totals,
     validate_payment_method, sanitize_string
 )
 from app.utils.crypto import encrypt_field, decrypt_field
-from app.utils.export import export_to_excel
 from app.utils.email import send_order_receipt_email
+from app.utils.db_engine import write_transaction
+from app.utils.db_routing import read_replica
+from app.utils.conditional import catalog_stock, conditional_get, for_user
+from app.utils.events import publish
+from app.utils.page_cache import cached_page, cached_fragment
+from app.utils.assets import asset_url, asset_urls
+from app.utils.session_store import list_user_sessions, revoke_session, revoke_user_sessions
+from app.auth.utils import get_current_user
+from app.utils.rate_limit import rate_limit
 import json
 import random
 
@@ -33,8 +41,28 @@ def _resolve_checkout_delivery_fee(raw_fee, free_delivery=False):
 # ==================== SHOP ====================
 
 @customer_bp.route('/shop')
+@read_replica
+@cached_page(tags=('catalog',), query_args=('q',))
 def shop():
     query = (request.args.get('q') or '').strip()
+    wishlist_ids = set()
+    if 'user_id' in session:
+        wishlist_ids = {item.product_id for item in WishlistItem.query.filter_by(user_id=session['user_id']).all()}
+    if query:
+        catalog = _shop_products_payload(query)
+    else:
+        # The unfiltered listing is identical for everyone apart from wishlist flags
+        catalog = cached_fragment('shop_products', ('catalog',), lambda: _shop_products_payload(''))
+    products_payload = [dict(product, in_wishlist=product['id'] in wishlist_ids) for product in catalog]
+    return render_template(
+        'shop.html',
+        products=products_payload,
+        products_payload=products_payload
+    )
+
+
+def _shop_products_payload(query):
+    """In-stock products (optionally searched) as shop cards, pinned and newest first."""
     products_q = Product.query.filter(Product.stock > 0)
     if query:
         search = f"%{query}%"
@@ -46,15 +74,12 @@ def shop():
             )
         )
     products = products_q.order_by(Product.is_pinned.desc(), Product.created_at.desc()).all()
-    wishlist_ids = []
-    if 'user_id' in session:
-        wishlist_ids = [item.product_id for item in WishlistItem.query.filter_by(user_id=session['user_id']).all()]
     products_payload = []
     for product in products:
         avg_rating = db.session.query(db.func.avg(Review.rating)).filter(Review.product_id == product.id).scalar()
         review_count = db.session.query(db.func.count(Review.id)).filter(Review.product_id == product.id).scalar() or 0
         images = product.get_image_list()
-        first_image = images[0] if images else product.image_url
+        first_image = asset_url(images[0] if images else product.image_url)
         rating_value = round(float(avg_rating), 1) if review_count > 0 else 5.0
         badge = product.badge or ('new' if product.is_pinned else None)
         if not first_image:
@@ -68,16 +93,11 @@ def shop():
             'tags': product.get_tags_list(),
             'rating': rating_value,
             'reviews': int(review_count),
-            'stock': int(product.stock or 0),
+            'stock': catalog_stock(product.stock),
             'image_url': first_image,
-            'in_wishlist': product.id in wishlist_ids,
             'description': product.description or ''
         })
-    return render_template(
-        'shop.html',
-        products=products_payload,
-        products_payload=products_payload
-    )
+    return products_payload
 
 
 @customer_bp.route('/product/<int:product_id>')
@@ -155,6 +175,7 @@ def add_review(product_id):
 
 
 @customer_bp.route('/about')
+@cached_page(tags=())
 def about():
     """About page - brand story and values"""
     return render_template('about.html')
@@ -174,7 +195,7 @@ def cart():
     
     total_subtotal = sum(product.price * cart_item.quantity for cart_item, product in cart_items)
     delivery_fee = _resolve_checkout_delivery_fee(total_subtotal * 0)
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     
     display_address = decrypt_field(user.address) if user else ''
     return render_template(
@@ -189,9 +210,9 @@ def cart():
 
 @customer_bp.route('/profile')
 def profile():
-    if 'user_id' not in session:
+    user = get_current_user()
+    if user is None:
         return redirect(url_for('auth.login'))
-    user = User.query.get_or_404(session['user_id'])
     orders = user.orders.order_by(Order.created_at.desc()).limit(20).all()
     wishlist_items = user.wishlist_items.order_by(WishlistItem.id.desc()).all()
     wishlist_products = []
@@ -199,7 +220,8 @@ def profile():
         product = wish.product
         if not product:
             continue
-        first_image = product.get_image_list()[0] if product.get_image_list() else product.image_url
+        images = product.get_image_list()
+        first_image = asset_url(images[0] if images else product.image_url)
         if not first_image:
             continue
         wishlist_products.append({
@@ -211,7 +233,7 @@ def profile():
             'rating': 5,
             'reviews': 0,
             'desc': product.description or '',
-            'imgs': product.get_image_list() if product.get_image_list() else [first_image],
+            'imgs': asset_urls(images) if images else [first_image],
             'image_url': first_image,
             'sizes': ['S', 'M', 'L', 'XL']
         })
@@ -224,13 +246,14 @@ def profile():
 
 
 @customer_bp.route('/profile/orders/data')
+@conditional_get(for_user('orders'))
 def profile_orders_data():
     """Live profile order payload for user-side sync and status updates."""
     if 'user_id' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
     try:
-        user = User.query.get_or_404(session['user_id'])
-        orders = user.orders.order_by(Order.created_at.desc()).limit(30).all()
+        orders = (Order.query.filter_by(user_id=session['user_id'])
+                  .order_by(Order.created_at.desc()).limit(30).all())
         return jsonify({
             'success': True,
             'orders': [{
@@ -248,11 +271,45 @@ def profile_orders_data():
         return jsonify({'error': 'Failed to load orders'}), 500
 
 
+@customer_bp.route('/profile/sessions')
+def profile_sessions():
+    """Signed-in devices of the current user."""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    current_sid = getattr(session, 'sid', None)
+    return jsonify({
+        'success': True,
+        'sessions': [s.to_dict(current_sid) for s in list_user_sessions(session['user_id'])]
+    })
+
+
+@customer_bp.route('/profile/sessions/<sid>', methods=['DELETE'])
+def revoke_profile_session(sid):
+    """Sign out one of the current user's other devices."""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    if sid == getattr(session, 'sid', None):
+        return jsonify({'error': 'Use logout to end the current session'}), 400
+    if not revoke_session(sid, user_id=session['user_id']):
+        return jsonify({'error': 'Session not found'}), 404
+    return jsonify({'success': True})
+
+
+@customer_bp.route('/profile/sessions/revoke-others', methods=['POST'])
+def revoke_other_sessions():
+    """Sign out every device except this one."""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    revoked = revoke_user_sessions(session['user_id'], keep_sid=getattr(session, 'sid', None))
+    db.session.commit()
+    return jsonify({'success': True, 'revoked': revoked})
+
+
 @customer_bp.route('/profile/edit', methods=['GET', 'POST'])
 def edit_profile():
-    if 'user_id' not in session:
+    user = get_current_user()
+    if user is None:
         return redirect(url_for('auth.login'))
-    user = User.query.get_or_404(session['user_id'])
     if request.method == 'POST':
         from app.utils.helpers import is_valid_phone_ph
         phone_raw = request.form.get('phone_number', '')
@@ -275,6 +332,7 @@ def edit_profile():
 
 
 @customer_bp.route('/cart/count')
+@conditional_get(for_user('cart', shared=('cart',)))
 def cart_count():
     """API endpoint to get total items in cart (for navbar badge)"""
     if 'user_id' not in session:
@@ -288,6 +346,7 @@ def cart_count():
     return jsonify({'count': int(count)})
 
 @customer_bp.route('/cart/mini')
+@conditional_get(for_user('cart', shared=('cart', 'products')))
 def cart_mini():
     """Compact cart payload for sticky mini-cart drawer."""
     if 'user_id' not in session:
@@ -306,7 +365,7 @@ def cart_mini():
             'cart_id': cart_item.id,
             'product_id': product.id,
             'name': product.name,
-            'image_url': product.image_url,
+            'image_url': asset_url(product.image_url),
             'price': float(product.price),
             'quantity': int(cart_item.quantity),
             'line_total': round(line_total, 2)
@@ -442,6 +501,7 @@ def remove_from_cart(cart_id):
 # ==================== VOUCHER ====================
 
 @customer_bp.route('/cart/voucher/validate', methods=['POST'])
+@rate_limit('voucher')
 def validate_voucher():
     """Validate a voucher code and return discount amount for cart display."""
     try:
@@ -484,6 +544,7 @@ def validate_voucher():
 # ==================== CHECKOUT ====================
 
 @customer_bp.route('/checkout', methods=['POST'])
+@write_transaction
 def checkout():
     """Process customer checkout with shipping details"""
     if 'user_id' not in session:
@@ -505,7 +566,7 @@ def checkout():
         if payment_method == 'gcash' and not data.get('gcash_number'):
             return jsonify({'error': 'GCash number is required'}), 400
         
-        user = User.query.get(session['user_id'])
+        user = get_current_user()
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
@@ -585,9 +646,13 @@ def checkout():
             v = Voucher.query.filter_by(code=voucher_code).first()
             if v:
                 v.uses = (v.uses or 0) + 1
-        Cart.query.filter_by(user_id=session['user_id']).delete()
+        for cart_item, _ in cart_items:
+            db.session.delete(cart_item)
+        db.session.flush()
+        event_data = {'order_id': new_order.id, 'status': new_order.status, 'total_amount': total_amount}
+        publish(f"user:{session['user_id']}", 'new_order', event_data)
+        publish('admin', 'new_order', dict(event_data, customer_name=new_order.customer_name))
         db.session.commit()
-        export_to_excel()
         send_order_receipt_email(new_order)
         
         return jsonify({
@@ -0,0 +1,34 @@
+"""
+ETERNO E-Commerce Platform - Realtime Routes
+Server-sent event stream: order status changes for customers, new orders
+and POS sales for staff
+"""
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from app.auth.utils import get_current_identity
+from app.utils.events import stream_events
+
+events_bp = Blueprint('events', __name__)
+
+STAFF_ROLES = ('admin', 'staff', 'cashier')
+
+
+@events_bp.route('/events')
+def event_stream():
+    """SSE stream of the caller's channels; resumes from Last-Event-ID"""
+    identity = get_current_identity()
+    if identity is None:
+        return jsonify({'error': 'Unauthorized'}), 401
+    if not current_app.config.get('SSE_ENABLED', True):
+        # 204 tells EventSource not to reconnect; the page falls back to polling
+        return '', 204
+    
+    channels = [f"user:{identity.id}"]
+    if identity.role in STAFF_ROLES:
+        channels.append('admin')
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    
+    response = Response(stream_with_context(stream_events(channels, last_event_id)),
+                        mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # keep proxies from buffering the stream
+    return response
@@ -5,10 +5,16 @@ Handles public pages accessible to all visitors
 from flask import Blueprint, render_template
 from app.models import Product, Review
 from app import db
+from app.utils.db_routing import read_replica
+from app.utils.page_cache import cached_page, cached_fragment
+from app.utils.conditional import catalog_stock
+from app.utils.assets import asset_url
 
 main_bp = Blueprint('main', __name__)
 
 @main_bp.route('/')
+@read_replica
+@cached_page(tags=('catalog',))
 def index():
     """Landing page - show homepage with featured products"""
     # Keep homepage product data fully dynamic from admin inventory.
@@ -19,28 +25,33 @@ def index():
         .limit(10)
         .all()
     )
-    products = Product.query.filter(Product.stock > 0).order_by(Product.is_pinned.desc(), Product.created_at.desc()).all()
-    products_payload = []
-    for product in products:
-        avg_rating = db.session.query(db.func.avg(Review.rating)).filter(Review.product_id == product.id).scalar()
-        review_count = db.session.query(db.func.count(Review.id)).filter(Review.product_id == product.id).scalar() or 0
-        images = product.get_image_list()
-        first_image = images[0] if images else product.image_url
-        if not first_image:
-            continue
-        products_payload.append({
-            'id': product.id,
-            'name': product.name,
-            'cat': (product.category or 'Uncategorized').lower(),
-            'category': product.category or 'Uncategorized',
-            'price': float(product.price or 0),
-            'badge': product.badge,
-            'rating': round(float(avg_rating), 1) if review_count > 0 else 5.0,
-            'reviews': int(review_count),
-            'stock': int(product.stock or 0),
-            'desc': product.description or '',
-            'description': product.description or '',
-            'imgs': [first_image] if first_image else [],
-            'image_url': first_image
-        })
+    
+    def build_payload():
+        products = Product.query.filter(Product.stock > 0).order_by(Product.is_pinned.desc(), Product.created_at.desc()).all()
+        products_payload = []
+        for product in products:
+            avg_rating = db.session.query(db.func.avg(Review.rating)).filter(Review.product_id == product.id).scalar()
+            review_count = db.session.query(db.func.count(Review.id)).filter(Review.product_id == product.id).scalar() or 0
+            images = product.get_image_list()
+            first_image = asset_url(images[0] if images else product.image_url)
+            if not first_image:
+                continue
+            products_payload.append({
+                'id': product.id,
+                'name': product.name,
+                'cat': (product.category or 'Uncategorized').lower(),
+                'category': product.category or 'Uncategorized',
+                'price': float(product.price or 0),
+                'badge': product.badge,
+                'rating': round(float(avg_rating), 1) if review_count > 0 else 5.0,
+                'reviews': int(review_count),
+                'stock': catalog_stock(product.stock),
+                'desc': product.description or '',
+                'description': product.description or '',
+                'imgs': [first_image] if first_image else [],
+                'image_url': first_image
+            })
+        return products_payload
+    
+    products_payload = cached_fragment('landing_products', ('catalog',), build_payload)
     return render_template('landing.html', featured_products=featured_products, products_payload=products_payload)
\ No newline at end of file
@@ -23,6 +23,18 @@ const fmt = n => '₱' + Number(n).toLocaleString();
 const $ = id => document.getElementById(id);
 const saveCart = () => localStorage.setItem(CART_KEY, JSON.stringify(cart));
 const saveWish = () => localStorage.setItem(WISH_KEY, JSON.stringify([...wishlist]));
+// Conditional GET for polled JSON: resend the last ETag and reuse the last
+// payload on 304. Resolves to { ok, changed, data }.
+const conditionalCache = new Map();
+async function fetchJsonCached(url) {
+  const cached = conditionalCache.get(url);
+  const res = await fetch(url, cached ? { headers: { 'If-None-Match': cached.etag } } : {});
+  if (res.status === 304 && cached) return { ok: true, changed: false, data: cached.data };
+  const data = await res.json();
+  const etag = res.headers.get('ETag');
+  if (res.ok && etag) conditionalCache.set(url, { etag, data });
+  return { ok: res.ok, changed: true, data };
+}
 function productImage(p) {
   if (Array.isArray(p.imgs) && p.imgs.length && p.imgs[0]) return p.imgs[0];
   if (p.image_url) return p.image_url;
@@ -289,9 +301,8 @@ function updateCartUI() {
 
 async function refreshServerCartUI() {
   try {
-    const res = await fetch('/cart/mini');
-    if (!res.ok) return;
-    const data = await res.json();
+    const { ok, changed, data } = await fetchJsonCached('/cart/mini');
+    if (!ok || !changed) return;
     document.querySelectorAll('.cart-badge').forEach(el => el.textContent = data.count || 0);
     const body = $('cartBody');
     const footer = $('cartFt');
@@ -625,8 +636,8 @@ function actionMenuHTML(menuId, items) {
 }
 function renderAdminDashboard() {
   Promise.all([
-    fetch('/admin/revenue').then(r => r.json()),
-    fetch('/admin/orders?limit=10').then(r => r.json()),
+    fetchJsonCached('/admin/revenue').then(r => r.data),
+    fetchJsonCached('/admin/orders?limit=10').then(r => r.data),
     fetch('/admin/revenue/history?months=2').then(r => r.json())
   ]).then(([revenueData, ordersData, historyData]) => {
     const rev = (revenueData && revenueData.success) ? revenueData.revenue : null;
@@ -883,6 +894,39 @@ function exportDashboardReport() {
   window.location.href = '/admin/dashboard/report/pdf';
 }
 
+async function exportAdminData(format) {
+  const kind = $('dashExportKind') ? $('dashExportKind').value : 'orders';
+  const status = $('dashExportStatus');
+  const res = await fetch('/admin/exports', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ kind, format })
+  });
+  const data = await res.json();
+  if (!res.ok || !data.success) {
+    showToast(data.error || 'Failed to start export', 'err');
+    return;
+  }
+  pollExportJob(data.job.id, status);
+}
+
+function pollExportJob(jobId, status) {
+  fetch(`/admin/exports/${jobId}`).then(r => r.json()).then(data => {
+    const job = data.job || {};
+    if (status) status.textContent = job.status === 'running' || job.status === 'pending'
+      ? `Exporting ${job.kind}… ${job.progress || 0}%`
+      : '';
+    if (job.status === 'completed') {
+      showToast('Export ready', 'ok');
+      window.location.href = job.download_url || `/admin/exports/${jobId}/download`;
+    } else if (job.status === 'failed') {
+      showToast(job.error || 'Export failed', 'err');
+    } else {
+      setTimeout(() => pollExportJob(jobId, status), 1000);
+    }
+  }).catch(() => showToast('Lost track of export job', 'err'));
+}
+
 function renderAdminInventory() {
   const products = Array.isArray(window.ADMIN_PRODUCTS) ? window.ADMIN_PRODUCTS : [];
   const invTbl = $('invTable');
@@ -893,6 +937,7 @@ function renderAdminInventory() {
     <td>${p.category || ''}</td>
     <td style="font-family:'DM Mono',monospace;color:var(--accent)">${fmt(p.price || 0)}</td>
     <td style="font-family:'DM Mono',monospace">${p.stock || 0}</td>
+    <td style="font-family:'DM Mono',monospace" title="${p.velocity ? `${p.velocity.forecast_daily}/day · reorder ${p.velocity.reorder_qty}` : ''}">${p.velocity && p.velocity.days_of_stock != null ? p.velocity.days_of_stock : '—'}</td>
     <td>${p.badge || '—'}</td>
     <td style="text-align:right">${actionMenuHTML(`inventory-menu-${p.id}`, [
       { label: 'Edit Product', onClick: `openAdminProductModal(${p.id})` },
@@ -1460,16 +1505,47 @@ document.addEventListener('DOMContentLoaded', () => {
     if (e.target === $('voucherCreateOverlay')) closeVoucherModal();
   });
   document.addEventListener('click', () => closeAllActionMenus());
+  initRealtimeEvents();
   initProfileRealtime();
 });
 
+/* ── REALTIME (SSE) ── */
+// Pushes from /events replace the polling loops while the stream is open;
+// the loops keep running as a fallback and skip their fetch when live.
+let realtimeLive = false;
+let dashboardRefreshTimer = null;
+const realtimeConnected = () => realtimeLive;
+
+function scheduleDashboardRefresh() {
+  if (!$('dashOrdersTable') || typeof renderAdminDashboard !== 'function') return;
+  clearTimeout(dashboardRefreshTimer);
+  dashboardRefreshTimer = setTimeout(renderAdminDashboard, 300);
+}
+
+function initRealtimeEvents() {
+  if (!window.IS_AUTHENTICATED || !window.EventSource) return;
+  // Only the pages that react to pushes hold a stream (and a server slot) open
+  const profilePage = $('page-profile');
+  const onProfile = profilePage && profilePage.classList.contains('active');
+  if (!onProfile && !$('dashOrdersTable')) return;
+  const source = new EventSource('/events');
+  source.onopen = () => { realtimeLive = true; };
+  // EventSource reconnects on its own (with Last-Event-ID); a 204 closes it for good
+  source.onerror = () => { realtimeLive = false; };
+  ['order_status', 'new_order', 'new_sale'].forEach((type) => {
+    source.addEventListener(type, () => {
+      scheduleDashboardRefresh();
+      syncProfileOrders();
+    });
+  });
+}
+
 async function syncProfileOrders() {
   const profilePage = $('page-profile');
   if (!profilePage || !profilePage.classList.contains('active')) return;
   try {
-    const res = await fetch('/profile/orders/data');
-    const data = await res.json();
-    if (!res.ok || !data.success) return;
+    const { ok, changed, data } = await fetchJsonCached('/profile/orders/data');
+    if (!ok || !changed || !data.success) return;
     const oldMap = new Map((window.PROFILE_ORDERS || []).map(o => [o.id, String(o.status || '').toLowerCase()]));
     window.PROFILE_ORDERS = data.orders || [];
     renderProfileOrders();
@@ -1491,6 +1567,6 @@ function initProfileRealtime() {
   if (!profilePage || !profilePage.classList.contains('active')) return;
   syncProfileOrders();
   setInterval(() => {
-    if (document.visibilityState === 'visible') syncProfileOrders();
+    if (document.visibilityState === 'visible' && !realtimeConnected()) syncProfileOrders();
   }, 12000);
 }
@@ -0,0 +1,363 @@
+"""
+ETERNO E-Commerce Platform - Analytics Snapshot
+Periodically copies orders, POS sales and their line items into columnar
+Arrow (Feather v2) files, memory-maps them and computes vectorized pandas
+reports without touching the OLTP database
+"""
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from app import db
+from app.models import Order, Sale, Product
+
+SNAPSHOT_VERSION = 1
+LINE_ITEMS_FILE = 'line_items.arrow'
+TRANSACTIONS_FILE = 'transactions.arrow'
+META_FILE = 'snapshot.json'
+BATCH_SIZE = 5000
+
+_cache_lock = threading.Lock()
+_cache = {'key': None, 'frames': None}
+_refresh_lock = threading.Lock()
+
+
+def analytics_dir():
+    return current_app.config.get('ANALYTICS_DIR') or os.path.join(current_app.instance_path, 'analytics')
+
+
+# ==================== SNAPSHOT ====================
+
+def _keyset_rows(columns, id_column):
+    """Yield rows of a table in id order, one bounded batch at a time."""
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            db.select(*columns).where(id_column > last_id).order_by(id_column).limit(BATCH_SIZE)
+        ).all()
+        db.session.rollback()
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1].id
+        if len(rows) < BATCH_SIZE:
+            return
+
+
+def _parse_items(raw):
+    try:
+        items = json.loads(raw or '[]')
+    except (TypeError, ValueError):
+        return []
+    return items if isinstance(items, list) else []
+
+
+def _schemas():
+    import pyarrow as pa
+
+    timestamp = pa.timestamp('us')
+    return {
+        TRANSACTIONS_FILE: pa.schema([
+            ('channel', pa.dictionary(pa.int8(), pa.string())), ('txn_id', pa.int64()),
+            ('created_at', timestamp), ('status', pa.dictionary(pa.int8(), pa.string())),
+            ('payment_method', pa.dictionary(pa.int8(), pa.string())),
+            ('discount_type', pa.dictionary(pa.int8(), pa.string())), ('voucher_code', pa.string()),
+            ('discount', pa.float64()), ('subtotal', pa.float64()), ('total', pa.float64())
+        ]),
+        LINE_ITEMS_FILE: pa.schema([
+            ('channel', pa.dictionary(pa.int8(), pa.string())), ('txn_id', pa.int64()),
+            ('created_at', timestamp), ('status', pa.dictionary(pa.int8(), pa.string())),
+            ('payment_method', pa.dictionary(pa.int8(), pa.string())), ('voucher_code', pa.string()),
+            ('product_id', pa.int64()), ('product_name', pa.string()),
+            ('category', pa.dictionary(pa.int32(), pa.string())), ('quantity', pa.int64()),
+            ('unit_price', pa.float64()), ('line_total', pa.float64())
+        ]),
+    }
+
+
+class ArrowBatchWriter:
+    """
+    Appends rows to an Arrow IPC (Feather v2) file one RecordBatch of
+    BATCH_SIZE rows at a time. Dictionary columns keep one growing
+    dictionary, so every batch after the first only adds a delta.
+    """
+
+    def __init__(self, path, schema):
+        import pyarrow as pa
+
+        self.schema = schema
+        self.rows = 0
+        self._columns = {field.name: [] for field in schema}
+        self._dictionaries = {field.name: {} for field in schema if pa.types.is_dictionary(field.type)}
+        self._sink = pa.OSFile(path, 'wb')
+        # Uncompressed so readers can memory-map the buffers directly
+        self._writer = pa.ipc.new_file(self._sink, schema, options=pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True))
+
+    def append(self, **values):
+        for name, column in self._columns.items():
+            column.append(values[name])
+        self.rows += 1
+        if len(self._columns['txn_id']) >= BATCH_SIZE:
+            self._flush()
+
+    def _flush(self):
+        import pyarrow as pa
+
+        if not self._columns['txn_id']:
+            return
+        arrays = []
+        for field in self.schema:
+            values = self._columns[field.name]
+            dictionary = self._dictionaries.get(field.name)
+            if dictionary is None:
+                arrays.append(pa.array(values, type=field.type))
+                continue
+            indices = [None if value is None else dictionary.setdefault(value, len(dictionary)) for value in values]
+            arrays.append(pa.DictionaryArray.from_arrays(
+                pa.array(indices, type=field.type.index_type), pa.array(list(dictionary), type=pa.string())
+            ))
+        self._writer.write_batch(pa.record_batch(arrays, schema=self.schema))
+        for column in self._columns.values():
+            column.clear()
+
+    def close(self):
+        try:
+            self._flush()
+            self._writer.close()
+        finally:
+            self._sink.close()
+
+
+def build_snapshot(directory=None):
+    """
+    Write transactions and exploded line items as Arrow IPC files
+
+    Rows are read in keyset batches and written out as one RecordBatch per
+    BATCH_SIZE rows, so peak memory is about one batch per file (plus the
+    product name map), never the whole history. Files are written to a temp
+    name and swapped in atomically; readers keep their mapped copy.
+    """
+    directory = directory or analytics_dir()
+    os.makedirs(directory, exist_ok=True)
+    started = time.perf_counter()
+
+    products = {
+        row.id: (row.name, row.category or 'Uncategorized')
+        for row in db.session.execute(db.select(Product.id, Product.name, Product.category)).all()
+    }
+    db.session.rollback()
+
+    schemas = _schemas()
+    tmp_paths = {filename: os.path.join(directory, filename + '.tmp') for filename in schemas}
+    txn = ArrowBatchWriter(tmp_paths[TRANSACTIONS_FILE], schemas[TRANSACTIONS_FILE])
+    lines = ArrowBatchWriter(tmp_paths[LINE_ITEMS_FILE], schemas[LINE_ITEMS_FILE])
+
+    def add_lines(channel, row, status, voucher_code, items):
+        for item in items:
+            product_id = item.get('product_id')
+            name, category = products.get(product_id, (item.get('product_name') or 'Unknown', 'Uncategorized'))
+            quantity = int(item.get('quantity') or 0)
+            price = float(item.get('price') or 0)
+            lines.append(
+                channel=channel, txn_id=row.id, created_at=row.created_at, status=status,
+                payment_method=row.payment_method or 'unknown', voucher_code=voucher_code,
+                product_id=product_id, product_name=item.get('product_name') or name, category=category,
+                quantity=quantity, unit_price=price, line_total=price * quantity
+            )
+
+    try:
+        for row in _keyset_rows([Order.id, Order.created_at, Order.status, Order.payment_method, Order.voucher_code,
+                                 Order.voucher_discount, Order.subtotal, Order.total_amount, Order.items], Order.id):
+            items = _parse_items(row.items)
+            voucher = row.voucher_code or None
+            txn.append(
+                channel='online', txn_id=row.id, created_at=row.created_at, status=row.status or 'processing',
+                payment_method=row.payment_method or 'unknown', discount_type='voucher' if voucher else 'none',
+                voucher_code=voucher, discount=float(row.voucher_discount or 0),
+                subtotal=float(row.subtotal or 0), total=float(row.total_amount or 0)
+            )
+            add_lines('online', row, row.status or 'processing', voucher, items)
+
+        for row in _keyset_rows([Sale.id, Sale.created_at, Sale.payment_method, Sale.discount_type,
+                                 Sale.discount_amount, Sale.total_amount, Sale.items], Sale.id):
+            items = _parse_items(row.items)
+            txn.append(
+                channel='pos', txn_id=row.id, created_at=row.created_at, status='completed',
+                payment_method=row.payment_method or 'unknown', discount_type=row.discount_type or 'none',
+                voucher_code=None, discount=float(row.discount_amount or 0),
+                subtotal=sum(float(i.get('price') or 0) * int(i.get('quantity') or 0) for i in items),
+                total=float(row.total_amount or 0)
+            )
+            add_lines('pos', row, 'completed', None, items)
+    finally:
+        txn.close()
+        lines.close()
+    for filename, tmp_path in tmp_paths.items():
+        os.replace(tmp_path, os.path.join(directory, filename))
+
+    meta = {
+        'version': SNAPSHOT_VERSION,
+        'generated_at': datetime.utcnow().isoformat() + 'Z',
+        'transactions': txn.rows,
+        'line_items': lines.rows,
+        'build_seconds': round(time.perf_counter() - started, 3)
+    }
+    with open(os.path.join(directory, META_FILE + '.tmp'), 'w') as fh:
+        json.dump(meta, fh)
+    os.replace(os.path.join(directory, META_FILE + '.tmp'), os.path.join(directory, META_FILE))
+    return meta
+
+
+def snapshot_meta(directory=None):
+    path = os.path.join(directory or analytics_dir(), META_FILE)
+    try:
+        with open(path) as fh:
+            meta = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    meta['age_seconds'] = round(time.time() - os.path.getmtime(path), 1)
+    return meta
+
+
+def load_snapshot(directory=None):
+    """Memory-mapped (transactions, line_items) DataFrames, cached per snapshot file."""
+    import pyarrow as pa
+
+    directory = directory or analytics_dir()
+    meta_path = os.path.join(directory, META_FILE)
+    if not os.path.exists(meta_path):
+        return None
+    key = (directory, os.path.getmtime(meta_path))
+    with _cache_lock:
+        if _cache['key'] == key:
+            return _cache['frames']
+    frames = []
+    for filename in (TRANSACTIONS_FILE, LINE_ITEMS_FILE):
+        source = pa.memory_map(os.path.join(directory, filename), 'r')
+        table = pa.ipc.open_file(source).read_all()
+        frames.append(table.to_pandas(split_blocks=True, self_destruct=False))
+    with _cache_lock:
+        _cache['key'] = key
+        _cache['frames'] = tuple(frames)
+    return _cache['frames']
+
+
+def refresh_snapshot_async(app):
+    """
+    Rebuild the snapshot in a background thread, one rebuild per process at
+    a time. Only with ANALYTICS_REFRESH_MODE=thread; returns whether it started.
+    """
+    if app.config.get('ANALYTICS_REFRESH_MODE', 'thread') != 'thread':
+        return False
+    if not _refresh_lock.acquire(blocking=False):
+        return False
+
+    def run():
+        try:
+            with app.app_context():
+                try:
+                    build_snapshot()
+                finally:
+                    db.session.remove()
+        except Exception:
+            app.logger.exception("Analytics snapshot refresh failed")
+        finally:
+            _refresh_lock.release()
+
+    threading.Thread(target=run, name='analytics-snapshot', daemon=True).start()
+    return True
+
+
+# ==================== REPORTS ====================
+
+def _round_records(frame):
+    return json.loads(frame.round(2).to_json(orient='records'))
+
+
+def compute_reports(transactions, line_items, start=None, end=None, include_cancelled=False, top=20):
+    """Revenue by product, category, hour of day and payment method; voucher effectiveness."""
+    txn = transactions
+    lines = line_items
+    if not include_cancelled:
+        txn = txn[txn['status'] != 'cancelled']
+        lines = lines[lines['status'] != 'cancelled']
+    if start is not None:
+        txn = txn[txn['created_at'] >= start]
+        lines = lines[lines['created_at'] >= start]
+    if end is not None:
+        txn = txn[txn['created_at'] < end]
+        lines = lines[lines['created_at'] < end]
+
+    by_product = (
+        lines.groupby(['product_id', 'product_name'], observed=True)
+        .agg(revenue=('line_total', 'sum'), units=('quantity', 'sum'), orders=('txn_id', 'nunique'))
+        .reset_index().sort_values('revenue', ascending=False).head(top)
+    )
+    by_category = (
+        lines.groupby('category', observed=True)
+        .agg(revenue=('line_total', 'sum'), units=('quantity', 'sum'))
+        .reset_index().sort_values('revenue', ascending=False)
+    )
+    local_hour = txn['created_at'].dt.tz_localize('UTC').dt.tz_convert('Asia/Singapore').dt.hour
+    by_hour = (
+        txn.assign(hour=local_hour)
+        .groupby('hour').agg(revenue=('total', 'sum'), transactions=('txn_id', 'size'))
+        .reindex(range(24), fill_value=0).reset_index()
+    )
+    by_payment = (
+        txn.groupby(['payment_method', 'channel'], observed=True)
+        .agg(revenue=('total', 'sum'), transactions=('txn_id', 'size'))
+        .reset_index().sort_values('revenue', ascending=False)
+    )
+
+    online = txn[txn['channel'] == 'online']
+    # NaN when no online order went without a voucher; kept out of the JSON below
+    baseline_aov = float(online.loc[online['voucher_code'].isna(), 'total'].mean())
+    vouchers = (
+        online[online['voucher_code'].notna()]
+        .groupby('voucher_code')
+        .agg(orders=('txn_id', 'size'), revenue=('total', 'sum'),
+             discount_given=('discount', 'sum'), avg_order_value=('total', 'mean'))
+        .reset_index().sort_values('revenue', ascending=False)
+    )
+    vouchers['aov_lift_vs_no_voucher'] = vouchers['avg_order_value'] - baseline_aov  # null without a baseline
+    vouchers['revenue_per_discount'] = vouchers['revenue'] / vouchers['discount_given'].where(vouchers['discount_given'] > 0)
+    pos_discounts = (
+        txn[txn['channel'] == 'pos'].groupby('discount_type', observed=True)
+        .agg(transactions=('txn_id', 'size'), discount_given=('discount', 'sum'), revenue=('total', 'sum'))
+        .reset_index()
+    )
+
+    return {
+        'totals': {
+            'revenue': round(float(txn['total'].sum()), 2),
+            'transactions': int(len(txn)),
+            'line_items': int(len(lines)),
+            'units': int(lines['quantity'].sum())
+        },
+        'revenue_by_product': _round_records(by_product),
+        'revenue_by_category': _round_records(by_category),
+        'revenue_by_hour': _round_records(by_hour),
+        'revenue_by_payment_method': _round_records(by_payment),
+        'voucher_effectiveness': {
+            'no_voucher_avg_order_value': 0.0 if math.isnan(baseline_aov) else round(baseline_aov, 2),
+            'vouchers': _round_records(vouchers),
+            'pos_discounts': _round_records(pos_discounts)
+        }
+    }
+
+
+@click.command('analytics-snapshot')
+@with_appcontext
+def analytics_snapshot_command():
+    """Rebuild the analytics snapshot (schedule this, e.g. every 15 minutes)."""
+    meta = build_snapshot()
+    click.echo(
+        f"Snapshot written: {meta['transactions']} transactions, "
+        f"{meta['line_items']} line items in {meta['build_seconds']}s"
+    )
@@ -0,0 +1,140 @@
+"""
+ETERNO E-Commerce Platform - Static Assets
+Public image URLs (rewritten onto ASSET_BASE_URL, a CDN or separate static
+host mirroring /static, when configured), immutable caching for uploaded
+images, and short-lived signed URLs for private admin downloads.
+"""
+import hashlib
+import hmac
+import time
+from functools import wraps
+from flask import current_app, has_app_context, make_response, request
+
+# Uploaded files get a timestamp + random prefix, so a URL never changes content
+UPLOADS_SUBDIR = 'images/uploads'
+IMMUTABLE_STATUSES = (200, 206, 304)
+
+
+# ==================== PUBLIC URLS ====================
+
+def _static_prefix():
+    return (current_app.static_url_path or '/static').rstrip('/') + '/'
+
+
+def _base_url():
+    return (current_app.config.get('ASSET_BASE_URL') or '').rstrip('/')
+
+
+def asset_url(url):
+    """Public URL for a stored image path: /static/... moves to ASSET_BASE_URL when set."""
+    if not url or not has_app_context():
+        return url
+    base = _base_url()
+    prefix = _static_prefix()
+    if base and url.startswith(prefix):
+        return f'{base}/{url[len(prefix):]}'
+    return url
+
+
+def asset_urls(urls):
+    return [asset_url(url) for url in urls]
+
+
+def storage_url(url):
+    """Inverse of asset_url, applied before saving: URLs under ASSET_BASE_URL go back to /static/..."""
+    if not url or not has_app_context():
+        return url
+    base = _base_url()
+    if base and url.startswith(base + '/'):
+        return _static_prefix() + url[len(base) + 1:]
+    return url
+
+
+def _upload_cache_headers(response):
+    """Uploaded images never change under their URL; let browsers and the CDN keep them."""
+    if request.endpoint != 'static' or response.status_code not in IMMUTABLE_STATUSES:
+        return response
+    filename = (request.view_args or {}).get('filename', '')
+    if filename.startswith(UPLOADS_SUBDIR + '/'):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config.get('UPLOAD_CACHE_MAX_AGE', 31536000)
+        response.cache_control.immutable = True
+    return response
+
+
+def _admin_cache_headers(response):
+    """Admin responses that did not choose their own caching stay out of shared caches."""
+    if request.blueprint == 'admin' and 'Cache-Control' not in response.headers:
+        response.cache_control.private = True
+        response.cache_control.no_store = True
+    return response
+
+
+def init_assets(app):
+    """Register the asset_url filter and the cache header hooks."""
+    app.jinja_env.filters['asset_url'] = asset_url
+    app.after_request(_upload_cache_headers)
+    app.after_request(_admin_cache_headers)
+
+
+# ==================== SIGNED URLS ====================
+
+def _signature(path, expires):
+    key = (current_app.config.get('SIGNED_URL_KEY') or current_app.config['SECRET_KEY']).encode('utf-8')
+    return hmac.new(key, f'{path}|{expires}'.encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+def signed_url(path, expires_in=None):
+    """
+    `path` (as url_for builds it, application root included) with
+    expires/signature query args, or `path` unchanged when
+    SIGNED_URLS_ENABLED is off. The signature covers the path only.
+    """
+    config = current_app.config
+    if not config.get('SIGNED_URLS_ENABLED', False):
+        return path
+    expires = int(time.time()) + (expires_in or config.get('SIGNED_URL_TTL', 300))
+    separator = '&' if '?' in path else '?'
+    signature = _signature(path.split('?', 1)[0], expires)
+    return f'{path}{separator}expires={expires}&signature={signature}'
+
+
+def signature_expiry():
+    """Expiry (epoch seconds) of a valid signature on this request, else None."""
+    if not current_app.config.get('SIGNED_URLS_ENABLED', False):
+        return None
+    expires = request.args.get('expires', type=int)
+    signature = request.args.get('signature', '')
+    if not expires or not signature or expires < time.time():
+        return None
+    # url_for paths include the mount point (SCRIPT_NAME); request.path does not
+    if not hmac.compare_digest(signature, _signature(request.script_root + request.path, expires)):
+        return None
+    return expires
+
+
+def signed_or_role(*allowed_roles):
+    """
+    Let a request through with a valid signed URL, or else with one of the
+    roles (JSON 403 otherwise). Signed responses may only be kept by the
+    browser, and no longer than the signature lives.
+    """
+    from app.auth.utils import role_required  # auth imports the models, which import this module
+
+    def decorator(f):
+        role_view = role_required(*allowed_roles, api=True)(f)
+
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            expires = signature_expiry()
+            if expires is None:
+                return role_view(*args, **kwargs)
+            response = make_response(f(*args, **kwargs))
+            response.cache_control.no_cache = None
+            response.cache_control.public = None
+            response.cache_control.private = True
+            response.cache_control.max_age = max(0, expires - int(time.time()))
+            return response
+        return decorated_function
+    return decorator
@@ -0,0 +1,166 @@
+"""
+ETERNO E-Commerce Platform - CAPTCHA Verification
+reCAPTCHA siteverify client that reuses keep-alive connections, remembers
+tokens it already verified for the same form submission (so re-submitting
+it does not re-verify or fail as a duplicate), and stops calling the verifier for a while after
+repeated failures so registration latency stays bounded when it is down.
+"""
+import hashlib
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from flask import current_app
+from app.utils.tracing import start_as_current_span
+from app.utils.ttl_cache import TTLCache
+
+DEFAULT_VERIFY_URL = 'https://www.google.com/recaptcha/api/siteverify'
+
+
+class VerifierUnavailable(Exception):
+    """The verifier could not give an answer (network error, timeout, 5xx, bad body)"""
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `threshold` consecutive failures; open fails fast for
+    `reset_after` seconds, then lets one trial call through (half-open)
+    """
+
+    def __init__(self, threshold=5, reset_after=30):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if time.monotonic() - self.opened_at >= self.reset_after else 'open'
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_after or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+
+class CaptchaVerifier:
+    """Per-process siteverify client: pooled session, token cache and circuit breaker"""
+
+    def __init__(self, verify_url, pool_size=10, timeout=(1.0, 3.0),
+                 breaker_threshold=5, breaker_reset=30, cache_ttl=120):
+        self.verify_url = verify_url
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.tokens = TTLCache(10000, cache_ttl)  # recently verified tokens (hashed, with IP and subject)
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_reset)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    @staticmethod
+    def _cache_key(token, remote_ip, subject):
+        return hashlib.sha256(f'{remote_ip or ""}|{subject or ""}|{token}'.encode('utf-8')).hexdigest()
+
+    def _call(self, secret, token, remote_ip):
+        payload = {'secret': secret, 'response': token}
+        if remote_ip:
+            payload['remoteip'] = remote_ip
+        url = urlsplit(self.verify_url)
+        attributes = {'server.address': url.hostname, 'server.port': url.port or (443 if url.scheme == 'https' else 80),
+                      'http.request.method': 'POST'}
+        with start_as_current_span('captcha.siteverify', attributes, kind='CLIENT') as span:
+            try:
+                resp = self.session.post(self.verify_url, data=payload, timeout=self.timeout)
+                if span is not None:
+                    span.set_attribute('http.response.status_code', resp.status_code)
+                if resp.status_code >= 500:
+                    raise VerifierUnavailable(f'verifier answered {resp.status_code}')
+                return bool(resp.json().get('success'))
+            except (requests.RequestException, ValueError) as exc:
+                raise VerifierUnavailable(str(exc)) from exc
+
+    def verify(self, secret, token, remote_ip=None, subject=None):
+        """
+        True/False from the verifier (or the cache); raises VerifierUnavailable.
+        A cached pass only counts again for the same subject (e.g. the
+        username and email being registered).
+        """
+        if not token:
+            return False
+        key = self._cache_key(token, remote_ip, subject)
+        if self.tokens.get(key):
+            return True
+        if not self.breaker.allow():
+            raise VerifierUnavailable('circuit open')
+        try:
+            success = self._call(secret, token, remote_ip)
+        except Exception as exc:
+            # Any failure ends a half-open trial; unexpected ones count as unavailable
+            self.breaker.record_failure()
+            if isinstance(exc, VerifierUnavailable):
+                raise
+            raise VerifierUnavailable(f'{type(exc).__name__}: {exc}') from exc
+        self.breaker.record_success()
+        if success:
+            self.tokens.set(key, True)
+        return success
+
+
+_verifier = {'key': None, 'verifier': None}
+_verifier_lock = threading.Lock()
+
+
+def get_verifier():
+    config = current_app.config
+    settings = (
+        config.get('RECAPTCHA_VERIFY_URL') or DEFAULT_VERIFY_URL,
+        config.get('CAPTCHA_POOL_SIZE', 10),
+        (config.get('CAPTCHA_CONNECT_TIMEOUT', 1.0), config.get('CAPTCHA_READ_TIMEOUT', 3.0)),
+        config.get('CAPTCHA_BREAKER_FAILURES', 5),
+        config.get('CAPTCHA_BREAKER_RESET', 30),
+        config.get('CAPTCHA_TOKEN_CACHE_TTL', 120),
+    )
+    with _verifier_lock:
+        if _verifier['key'] != settings:
+            _verifier.update(key=settings, verifier=CaptchaVerifier(*settings))
+        return _verifier['verifier']
+
+
+def verify_token(response_token, remote_ip=None, subject=None):
+    """
+    Check a reCAPTCHA response token; True when no secret key is configured
+
+    When the verifier is unreachable (or the breaker is open) the answer is
+    CAPTCHA_FAIL_OPEN, False by default.
+    """
+    secret_key = current_app.config.get('RECAPTCHA_SECRET_KEY')
+    if not secret_key:
+        return True
+    try:
+        return get_verifier().verify(secret_key, response_token, remote_ip, subject)
+    except VerifierUnavailable as exc:
+        current_app.logger.warning("CAPTCHA verification unavailable: %s", exc)
+        return bool(current_app.config.get('CAPTCHA_FAIL_OPEN', False))
@@ -0,0 +1,242 @@
+"""
+ETERNO E-Commerce Platform - Conditional GET
+ETag / Last-Modified for polling endpoints, derived from change_version
+counters. Per-user scopes are bumped in the same transaction as the writes
+they track; the shared global scopes right after commit in their own short
+transaction, so concurrent checkouts do not queue on one row. An unchanged
+poll costs one primary-key lookup and a 304.
+"""
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+from flask import current_app, make_response, request, session as flask_session
+from sqlalchemy import event, inspect
+from app import db
+from app.auth.utils import get_current_identity
+from app.models import Cart, ChangeVersion, Order, Product, ReportCheckpoint, Review, Sale
+from app.utils.db_routing import RoutingSession
+
+SCOPES_KEY = 'change_scopes'
+GLOBAL_SCOPES_KEY = 'change_scopes_global'
+# Product columns shown by polled payloads; stock changes alone do not count
+PRODUCT_DISPLAY_FIELDS = ('name', 'price', 'image_url')
+# Columns a sale touches; the catalog shows stock only as "Only N left!" below
+# CATALOG_LOW_STOCK (and hides sold-out items), so higher stock is not shown
+SALE_FIELDS = frozenset(('stock', 'sold_count'))
+CATALOG_LOW_STOCK = 5
+# Scopes bumped for bulk UPDATE/DELETE statements, where the affected rows are unknown
+BULK_SCOPES = {
+    Cart: ('cart',), Order: ('orders',), Sale: ('orders',), ReportCheckpoint: ('orders',),
+    Product: ('products', 'catalog'), Review: ('catalog',)
+}
+
+
+def catalog_stock(stock):
+    """Stock as the cached catalog shows it: exact below CATALOG_LOW_STOCK, capped above."""
+    return min(int(stock or 0), CATALOG_LOW_STOCK)
+
+
+def _stock_display_changed(state):
+    history = state.attrs['stock'].history
+    if not history.has_changes():
+        return False
+    if not history.deleted:
+        return True  # previous value was never loaded
+    new = history.added[0] if history.added else None
+    return catalog_stock(history.deleted[0]) != catalog_stock(new)
+
+
+def _scopes_for(obj, deleted=False):
+    if isinstance(obj, Cart):
+        return [f'user:{obj.user_id}:cart']
+    if isinstance(obj, Order):
+        return ['orders'] + ([f'user:{obj.user_id}:orders'] if obj.user_id else [])
+    if isinstance(obj, (Sale, ReportCheckpoint)):
+        return ['orders']
+    if isinstance(obj, Product):
+        state = inspect(obj)
+        if deleted or state.pending or any(state.attrs[f].history.has_changes() for f in PRODUCT_DISPLAY_FIELDS):
+            return ['products', 'catalog']
+        changed = {attr.key for attr in state.attrs if attr.history.has_changes()}
+        if changed <= SALE_FIELDS and not _stock_display_changed(state):
+            return []
+        return ['catalog']
+    if isinstance(obj, Review):
+        return ['catalog']
+    return []
+
+
+def bump_versions(connection, scopes):
+    """Increment change_version for each scope (upsert) on the given connection."""
+    if not scopes:
+        return
+    table = ChangeVersion.__table__
+    now = datetime.utcnow()
+    rows = [{'scope': scope, 'version': 1} for scope in sorted(scopes)]  # fixed order avoids deadlocks
+    if connection.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif connection.dialect.name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        for row in rows:
+            updated = connection.execute(
+                table.update().where(table.c.scope == row['scope'])
+                .values(version=table.c.version + 1, updated_at=now)
+            ).rowcount
+            if not updated:
+                connection.execute(table.insert().values(updated_at=now, **row))
+        return
+    stmt = insert(table).values([dict(row, updated_at=now) for row in rows])
+    connection.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.scope],
+        set_={'version': table.c.version + 1, 'updated_at': now}
+    ))
+
+
+def _version_connection(db_session):
+    return db_session.connection(bind_arguments={'mapper': ChangeVersion.__mapper__})
+
+
+def _queue_scopes(db_session, scopes):
+    """Bump per-user scopes now, in the writing transaction; hold global ones until commit."""
+    user_scopes = {scope for scope in scopes if scope.startswith('user:')}
+    if user_scopes:
+        bump_versions(_version_connection(db_session), user_scopes)
+    if len(user_scopes) < len(scopes):
+        db_session.info.setdefault(GLOBAL_SCOPES_KEY, set()).update(set(scopes) - user_scopes)
+
+
+@event.listens_for(RoutingSession, 'before_flush')
+def _collect_scopes(db_session, flush_context, instances):
+    scopes = db_session.info.setdefault(SCOPES_KEY, set())
+    for obj in db_session.new:
+        scopes.update(_scopes_for(obj))
+    for obj in db_session.dirty:
+        if db_session.is_modified(obj, include_collections=False):
+            scopes.update(_scopes_for(obj))
+    for obj in db_session.deleted:
+        scopes.update(_scopes_for(obj, deleted=True))
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _write_scopes(db_session, flush_context):
+    scopes = db_session.info.pop(SCOPES_KEY, None)
+    if scopes:
+        _queue_scopes(db_session, scopes)
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _bulk_scopes(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    scopes = BULK_SCOPES.get(mapper.class_) if mapper is not None else None
+    if scopes:
+        _queue_scopes(orm_execute_state.session, scopes)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _write_global_scopes(db_session):
+    scopes = db_session.info.pop(GLOBAL_SCOPES_KEY, None)
+    if not scopes:
+        return
+    # Always the primary, whatever the request's read routing
+    engine = super(RoutingSession, db_session).get_bind(mapper=ChangeVersion.__mapper__)
+    try:
+        with engine.begin() as connection:
+            bump_versions(connection, scopes)
+    except Exception:
+        # The write itself is committed; a missed bump only delays revalidation
+        current_app.logger.exception("Could not bump change scopes %s", sorted(scopes))
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _clear_scopes(db_session):
+    db_session.info.pop(SCOPES_KEY, None)
+    db_session.info.pop(GLOBAL_SCOPES_KEY, None)
+
+
+# ==================== VALIDATORS ====================
+
+def scope_rows(scopes):
+    return db.session.execute(
+        db.select(ChangeVersion.scope, ChangeVersion.version, ChangeVersion.updated_at)
+        .where(ChangeVersion.scope.in_(scopes))
+    ).all()
+
+
+def scope_versions(scopes):
+    """{scope: version} for the given scopes (0 for scopes never bumped)."""
+    if not scopes:
+        return {}
+    versions = {scope: 0 for scope in scopes}
+    versions.update({row.scope: row.version for row in scope_rows(scopes)})
+    return versions
+
+
+def current_validators(scopes):
+    """(etag, last_modified) for the current request over the given scopes."""
+    rows = scope_rows(scopes)
+    versions = {row.scope: row.version for row in rows}
+    digest = hashlib.sha1(request.full_path.encode('utf-8'))
+    for scope in sorted(scopes):
+        digest.update(f'|{scope}={versions.get(scope, 0)}'.encode('utf-8'))
+    last_modified = max((row.updated_at for row in rows if row.updated_at), default=None)
+    if last_modified is not None:
+        last_modified = last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+    return digest.hexdigest()[:20], last_modified
+
+
+def for_user(*names, shared=()):
+    """Scopes of the logged-in user's data (plus shared scopes); None when anonymous."""
+    def scopes():
+        user_id = flask_session.get('user_id')
+        if not user_id:
+            return None
+        return [f'user:{user_id}:{name}' for name in names] + list(shared)
+    return scopes
+
+
+def for_roles(roles, *names):
+    """Global scopes, only for the given roles (others fall through to the view's own check)."""
+    def scopes():
+        identity = get_current_identity()
+        return list(names) if identity is not None and identity.role in roles else None
+    return scopes
+
+
+def conditional_get(scopes):
+    """
+    Answer GETs with 304 when none of the endpoint's change scopes moved
+
+    `scopes` is a callable returning scope names for the request, or None to
+    skip validation. Versions are read before the view runs, so a write that
+    lands in between only makes the next poll refetch.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            names = scopes() if request.method in ('GET', 'HEAD') else None
+            if not names or not current_app.config.get('CONDITIONAL_GET_ENABLED', True):
+                return f(*args, **kwargs)
+            etag, last_modified = current_validators(names)
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            else:
+                since = request.if_modified_since
+                not_modified = bool(since and last_modified and last_modified <= since)
+            if not_modified:
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            response.vary.add('Cookie')
+            return response
+        return decorated_function
+    return decorator
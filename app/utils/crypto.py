@@ -3,6 +3,7 @@ Field-level encryption for sensitive data at rest.
 Uses Fernet (symmetric) with key from environment FIELD_ENCRYPTION_KEY.
 """
 import os
+from app.utils.tracing import traced
 
 def _get_fernet():
     key = os.environ.get('FIELD_ENCRYPTION_KEY')
@@ -15,6 +16,7 @@ def _get_fernet():
         return None
 
 
+@traced('crypto.encrypt_field')
 def encrypt_field(plaintext):
     """Encrypt a string for storage. Returns plaintext if encryption unavailable."""
     if plaintext is None or (isinstance(plaintext, str) and not plaintext.strip()):
@@ -28,6 +30,7 @@ def encrypt_field(plaintext):
         return plaintext
 
 
+@traced('crypto.decrypt_field')
 def decrypt_field(ciphertext):
     """Decrypt a stored string. Returns ciphertext if decryption unavailable or not encrypted."""
     if ciphertext is None or (isinstance(ciphertext, str) and not ciphertext.strip()):
@@ -0,0 +1,218 @@
+"""
+ETERNO E-Commerce Platform - Database Engine Tuning
+Connection pool profiles, pool metrics, SQLite connection settings and
+write serialization helpers
+"""
+import threading
+import time
+from functools import wraps
+from flask import g, has_request_context
+from sqlalchemy import event, exc as sa_exc
+from sqlalchemy.pool import NullPool, QueuePool
+from app import db
+
+
+# ==================== CONNECTION POOL PROFILES ====================
+
+class PoolStats:
+    """Counters for one connection pool (per process)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += seconds
+            if seconds > self.wait_max:
+                self.wait_max = seconds
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_total_ms': round(self.wait_total * 1000, 3),
+                'wait_avg_ms': round(self.wait_total * 1000 / self.checkouts, 3) if self.checkouts else 0,
+                'wait_max_ms': round(self.wait_max * 1000, 3)
+            }
+
+
+class _TimedPoolMixin:
+    """Measure how long each checkout waits for a connection (including connecting)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except sa_exc.TimeoutError:
+            self.stats.record_timeout()
+            raise
+        finally:
+            self.stats.record_wait(time.perf_counter() - started)
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedNullPool(_TimedPoolMixin, NullPool):
+    pass
+
+
+def build_engine_options(config):
+    """
+    Return SQLALCHEMY_ENGINE_OPTIONS for the configured DB_POOL_PROFILE
+
+    Profiles only apply to Postgres URLs:
+        serverless: no pooling in the function (NullPool), or a single
+                    connection with DB_SERVERLESS_POOL=single; connection
+                    reuse is left to an external pooler such as PgBouncer
+        server:     sized, LIFO QueuePool with pool_recycle for long-lived
+                    gunicorn workers; pre-ping off unless DB_POOL_PRE_PING
+        default:    the base options unchanged
+    """
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    uri = config.get('SQLALCHEMY_DATABASE_URI') or ''
+    profile = config.get('DB_POOL_PROFILE', 'default')
+    if not uri.startswith('postgresql') or profile == 'default':
+        return options
+
+    options['query_cache_size'] = config.get('DB_QUERY_CACHE_SIZE', 1200)
+    if profile == 'serverless':
+        options['pool_pre_ping'] = False
+        if config.get('DB_SERVERLESS_POOL') == 'single':
+            options.update({
+                'poolclass': TimedQueuePool,
+                'pool_size': 1,
+                'max_overflow': 0,
+                'pool_timeout': config.get('DB_POOL_TIMEOUT', 10),
+                'pool_recycle': config.get('DB_POOL_RECYCLE', 300)
+            })
+        else:
+            options['poolclass'] = TimedNullPool
+    elif profile == 'server':
+        options.update({
+            'poolclass': TimedQueuePool,
+            'pool_size': config.get('DB_POOL_SIZE', 5),
+            'max_overflow': config.get('DB_MAX_OVERFLOW', 10),
+            'pool_timeout': config.get('DB_POOL_TIMEOUT', 10),
+            'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+            'pool_use_lifo': True,
+            'pool_pre_ping': config.get('DB_POOL_PRE_PING', False)
+        })
+    return options
+
+
+def get_pool_metrics():
+    """Snapshot of every engine's pool for the admin pool endpoint."""
+    metrics = {}
+    for bind_key, engine in db.engines.items():
+        pool = engine.pool
+        entry = {
+            'pool_class': type(pool).__name__,
+            'status': pool.status()
+        }
+        for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+            method = getattr(pool, name, None)
+            if callable(method):
+                entry[name] = method()
+        stats = getattr(pool, 'stats', None)
+        if stats is not None:
+            entry.update(stats.to_dict())
+        metrics[bind_key or 'default'] = entry
+    return metrics
+
+
+# ==================== SQLITE ====================
+
+
+def _is_sqlite(engine):
+    return engine.dialect.name == 'sqlite'
+
+
+def _is_memory_database(engine):
+    return engine.url.database in (None, '', ':memory:')
+
+
+def _sqlite_connect_listener(pragmas, in_memory):
+    """Build a connect listener applying the configured PRAGMAs."""
+    # WAL and mmap have no meaning for a private in-memory database
+    skipped = {'journal_mode', 'mmap_size'} if in_memory else set()
+
+    def on_connect(dbapi_connection, connection_record):
+        # Let SQLAlchemy emit BEGIN itself (see on_begin) instead of the
+        # driver's implicit deferred transactions.
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                if name in skipped:
+                    continue
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    return on_connect
+
+
+def _sqlite_on_begin(conn):
+    if has_request_context() and g.get('sqlite_begin_immediate'):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+    else:
+        conn.exec_driver_sql("BEGIN")
+
+
+def configure_engines(app):
+    """
+    Attach connection tuning to every engine of the app
+
+    SQLite engines get the SQLITE_PRAGMAS profile (WAL, busy_timeout, mmap,
+    cache size, in-memory temp store) on connect and explicit BEGIN handling
+    so write_transaction can take the write lock up front.
+    """
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    for engine in db.engines.values():
+        if not _is_sqlite(engine) or not app.config.get('SQLITE_TUNING', True):
+            continue
+        event.listen(engine, 'connect', _sqlite_connect_listener(pragmas, _is_memory_database(engine)))
+        event.listen(engine, 'begin', _sqlite_on_begin)
+
+
+def write_transaction(f):
+    """
+    Serialize a write-heavy view on SQLite with BEGIN IMMEDIATE
+
+    The view's transaction acquires SQLite's write lock when it starts, so
+    concurrent checkouts queue on busy_timeout instead of failing with
+    "database is locked" when a read lock cannot be upgraded. No-op on
+    other databases. Transactions begun after the view returns (e.g. in
+    after_request hooks) use a plain BEGIN again.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not _is_sqlite(db.engine):
+            return f(*args, **kwargs)
+        # End any read transaction opened earlier in the request so the
+        # view's first statement starts a fresh, immediate one.
+        if db.session().in_transaction():
+            db.session.commit()
+        previous = g.get('sqlite_begin_immediate', False)
+        g.sqlite_begin_immediate = True
+        try:
+            return f(*args, **kwargs)
+        finally:
+            g.sqlite_begin_immediate = previous
+    return decorated_function
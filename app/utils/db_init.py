@@ -1,69 +1,21 @@
 """
 ETERNO E-Commerce Platform - Database Initialization
-Creates database tables and default admin account
+Applies schema migrations and creates the default admin account
 """
+import click
+from flask import current_app
+from flask.cli import with_appcontext
 from app import db
 from app.models import User
-from werkzeug.security import generate_password_hash
+from app.utils.migrations import get_schema_version, head_version, upgrade
+from app.utils.passwords import hash_password
 
-def _add_missing_columns():
-    """Add columns that were added to models after the table was first created."""
-    if db.engine.url.drivername != "sqlite":
-        return
-    with db.engine.connect() as conn:
-        # Add missing product columns
-        result = conn.execute(db.text("PRAGMA table_info(product)"))
-        product_columns = [row[1] for row in result.fetchall()]
-        if "image_urls" not in product_columns:
-            conn.execute(db.text("ALTER TABLE product ADD COLUMN image_urls TEXT"))
-        if "badge" not in product_columns:
-            conn.execute(db.text("ALTER TABLE product ADD COLUMN badge VARCHAR(20)"))
-        if "tags" not in product_columns:
-            conn.execute(db.text("ALTER TABLE product ADD COLUMN tags VARCHAR(100)"))
-        conn.commit()
-
-        # Add missing sale columns
-        result = conn.execute(db.text("PRAGMA table_info(sale)"))
-        sale_columns = [row[1] for row in result.fetchall()]
-        if "amount_paid" not in sale_columns:
-            conn.execute(db.text("ALTER TABLE sale ADD COLUMN amount_paid FLOAT DEFAULT 0"))
-        if "change_amount" not in sale_columns:
-            conn.execute(db.text("ALTER TABLE sale ADD COLUMN change_amount FLOAT DEFAULT 0"))
-        conn.commit()
-
-        # Add missing voucher columns
-        result = conn.execute(db.text("PRAGMA table_info(voucher)"))
-        voucher_columns = [row[1] for row in result.fetchall()]
-        if "voucher_type" not in voucher_columns:
-            conn.execute(db.text("ALTER TABLE voucher ADD COLUMN voucher_type VARCHAR(50) DEFAULT 'min_spend_discount'"))
-        if "discount_value" not in voucher_columns:
-            conn.execute(db.text("ALTER TABLE voucher ADD COLUMN discount_value FLOAT DEFAULT 0"))
-        if "max_uses" not in voucher_columns:
-            conn.execute(db.text("ALTER TABLE voucher ADD COLUMN max_uses INTEGER DEFAULT 1"))
-        if "uses" not in voucher_columns:
-            conn.execute(db.text("ALTER TABLE voucher ADD COLUMN uses INTEGER DEFAULT 0"))
-        if "start_at" not in voucher_columns:
-            conn.execute(db.text("ALTER TABLE voucher ADD COLUMN start_at DATETIME"))
-        if "end_at" not in voucher_columns:
-            conn.execute(db.text("ALTER TABLE voucher ADD COLUMN end_at DATETIME"))
-        if "is_active" not in voucher_columns:
-            conn.execute(db.text("ALTER TABLE voucher ADD COLUMN is_active BOOLEAN DEFAULT 1"))
-        if "applies_to_product_id" not in voucher_columns:
-            conn.execute(db.text("ALTER TABLE voucher ADD COLUMN applies_to_product_id INTEGER"))
-        if "min_purchase" not in voucher_columns:
-            conn.execute(db.text("ALTER TABLE voucher ADD COLUMN min_purchase FLOAT DEFAULT 0"))
-        conn.commit()
+def _is_memory_database():
+    return db.engine.url.drivername.startswith('sqlite') and db.engine.url.database in (None, '', ':memory:')
 
 
-def init_database():
-    """
-    Initialize database tables and create default admin account
-    This function is called automatically when the app starts
-    """
-    db.create_all()
-    _add_missing_columns()
-
-    # Check if default admin exists
+def ensure_default_admin():
+    """Create the default admin account if it does not exist yet."""
     admin = User.query.filter_by(username='admin').first()
     
     if not admin:
@@ -71,7 +23,7 @@ def init_database():
         admin = User(
             username='admin',
             email='admin@eterno.com',
-            password=generate_password_hash('admin123'),
+            password=hash_password('admin123'),
             role='admin'
         )
         
@@ -82,9 +34,48 @@ def init_database():
         print("  Username: admin")
         print("  Password: admin123")
         print("  Email: admin@eterno.com")
+
+
+def init_database():
+    """
+    Verify the schema version when the app starts
     
+    An up-to-date database costs a single schema_version lookup. Pending
+    migrations are applied here only when AUTO_MIGRATE is enabled (or the
+    database is in-memory); otherwise run `flask db-upgrade` at deploy time.
+    """
+    version = get_schema_version()
+    head = head_version()
+    if version is not None and version >= head:
+        return
+
+    if not current_app.config.get('AUTO_MIGRATE', True) and not _is_memory_database():
+        current_app.logger.warning(
+            "Database schema is at version %s but the code expects %s; run `flask db-upgrade`.",
+            version, head
+        )
+        return
+
+    upgrade(logger=current_app.logger)
+    ensure_default_admin()
     print("[OK] Database initialized successfully")
 
+
+@click.command('db-upgrade')
+@click.option('--target', type=int, default=None, help='Migrate up to this version (default: latest)')
+@with_appcontext
+def db_upgrade_command(target):
+    """Apply pending schema migrations."""
+    before = get_schema_version()
+    try:
+        applied = upgrade(target=target)
+    except ValueError as exc:
+        raise click.ClickException(str(exc))
+    ensure_default_admin()
+    for migration in applied:
+        click.echo(f"[OK] Applied {migration.version:04d}_{migration.name}")
+    click.echo(f"[OK] Schema version {before or 0} -> {get_schema_version()} (latest {head_version()})")
+
 def seed_sample_data():
     """
     Sample seeding intentionally disabled.
@@ -0,0 +1,92 @@
+"""
+ETERNO E-Commerce Platform - Read Replica Routing
+Session class that sends read-only endpoints to the 'replica' bind
+"""
+import time
+from functools import wraps
+from flask import g, has_request_context, current_app, request, session as flask_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql import Select
+
+REPLICA_BIND_KEY = 'replica'
+PRIMARY_PIN_KEY = '_db_primary_until'
+
+
+def _primary_pinned():
+    """True while the current user is inside the read-your-writes window."""
+    pinned_until = flask_session.get(PRIMARY_PIN_KEY)
+    return bool(pinned_until) and pinned_until > time.time()
+
+
+class RoutingSession(Session):
+    """
+    Flask-SQLAlchemy session that routes SELECTs of replica-enabled requests
+
+    Reads go to the replica only when the request opted in (read_replica or
+    replica_reads_for_blueprint), the replica bind is configured, nothing is
+    being flushed, and the user has not written recently. Everything else
+    goes to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._route_to_replica(clause):
+            engine = self._db.engines.get(REPLICA_BIND_KEY)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _route_to_replica(self, clause):
+        if not has_request_context() or not g.get('db_read_replica'):
+            return False
+        if self._flushing:
+            return False
+        if clause is not None and (not isinstance(clause, Select) or clause._for_update_arg is not None):
+            return False
+        return not _primary_pinned()
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_write(db_session, flush_context):
+    db_session.info['db_wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _mark_bulk_write(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        orm_execute_state.session.info['db_wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _pin_primary_after_write(db_session):
+    """Keep a user's reads on the primary for a while after their own writes."""
+    wrote = db_session.info.pop('db_wrote', False)
+    if not wrote or not has_request_context() or 'user_id' not in flask_session:
+        return
+    if REPLICA_BIND_KEY not in (current_app.config.get('SQLALCHEMY_BINDS') or {}):
+        return
+    window = current_app.config.get('REPLICA_READ_YOUR_WRITES_SECONDS', 10)
+    flask_session[PRIMARY_PIN_KEY] = time.time() + window
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _clear_write_mark(db_session):
+    db_session.info.pop('db_wrote', None)
+
+
+def read_replica(f):
+    """Serve this endpoint's reads from the replica when one is configured."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.db_read_replica = True
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def replica_reads_for_blueprint(blueprint):
+    """Route the reads of every GET/HEAD request in a blueprint to the replica."""
+    @blueprint.before_request
+    def _use_replica():
+        if request.method in ('GET', 'HEAD'):
+            g.db_read_replica = True
+    return blueprint
@@ -2,9 +2,11 @@ from email.message import EmailMessage
 import smtplib
 from flask import current_app
 from app.utils.helpers import format_datetime_sg
+from app.utils.tracing import traced
 import json
 
 
+@traced('email.smtp_connect')
 def _build_smtp_client():
   host = current_app.config.get('MAIL_SERVER') or None
   username = current_app.config.get('MAIL_USERNAME') or None
@@ -22,6 +24,7 @@ def _build_smtp_client():
   return client
 
 
+@traced('email.send')
 def send_email(to_address, subject, html_body, text_body=None):
   sender = current_app.config.get('MAIL_DEFAULT_SENDER') or current_app.config.get('MAIL_USERNAME')
   if not sender or not to_address:
@@ -0,0 +1,207 @@
+"""
+ETERNO E-Commerce Platform - Realtime Events
+Server-sent events backed by the realtime_event outbox table. Writers add
+events in the same transaction as the change; one hub thread per process
+polls the table and fans new rows out to that process's open streams, so
+delivery works across gunicorn workers without a broker.
+"""
+import json
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import event as sa_event
+from app import db
+from app.models import RealtimeEvent
+from app.utils.db_routing import RoutingSession
+
+PUBLISHED_KEY = 'events_published'
+# Re-read this many ids below the high-water mark: on PostgreSQL a lower id can
+# commit after a higher one, and would otherwise be skipped
+ID_LOOKBACK = 100
+FETCH_LIMIT = 500
+
+
+def publish(channel, event, data):
+    """Queue an event in the current transaction; it is delivered once that commits."""
+    db.session.add(RealtimeEvent(channel=channel, event=event, payload=json.dumps(data, default=str)))
+    db.session.info[PUBLISHED_KEY] = True
+
+
+@sa_event.listens_for(RoutingSession, 'after_commit')
+def _wake_hub(db_session):
+    if db_session.info.pop(PUBLISHED_KEY, False):
+        hub.wake()
+
+
+@sa_event.listens_for(RoutingSession, 'after_rollback')
+def _drop_published(db_session):
+    db_session.info.pop(PUBLISHED_KEY, None)
+
+
+def format_event(row):
+    return f'id: {row.id}\nevent: {row.event}\ndata: {row.payload}\n\n'
+
+
+class Subscription:
+    """One open stream: its channels and a bounded queue of pending rows"""
+
+    def __init__(self, channels, maxsize):
+        self.channels = frozenset(channels)
+        self.queue = queue.Queue(maxsize=maxsize)
+
+
+class EventHub:
+    """Per-process poller of realtime_event that feeds every local Subscription"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+        self._wake = threading.Event()
+        self._thread = None
+        self._last_id = None
+        self._floor = 0
+        self._seen = deque(maxlen=ID_LOOKBACK * 4)
+        self._last_purge = 0.0
+
+    def wake(self):
+        self._wake.set()
+
+    def subscribe(self, app, channels, start_id):
+        """Register a stream; start_id seeds the poll position if the hub is idle."""
+        sub = Subscription(channels, app.config.get('SSE_QUEUE_SIZE', 100))
+        with self._lock:
+            self._subscriptions.add(sub)
+            if self._last_id is None:
+                self._last_id = self._floor = start_id
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, args=(app,), name='sse-hub', daemon=True)
+                self._thread.start()
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscriptions.discard(sub)
+
+    def _run(self, app):
+        with app.app_context():
+            interval = app.config.get('SSE_POLL_INTERVAL', 1.0)
+            while True:
+                self._wake.wait(interval)
+                self._wake.clear()
+                with self._lock:
+                    if not self._subscriptions:
+                        self._last_id = None
+                        continue
+                try:
+                    rows = self._fetch()
+                    self._purge(app.config.get('SSE_EVENT_RETENTION', 3600))
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception("Realtime event poll failed")
+                    rows = []
+                finally:
+                    db.session.remove()
+                if rows:
+                    self._dispatch(rows)
+
+    def _fetch(self):
+        rows = db.session.execute(
+            db.select(RealtimeEvent.id, RealtimeEvent.channel, RealtimeEvent.event, RealtimeEvent.payload)
+            .where(RealtimeEvent.id > max(self._last_id - ID_LOOKBACK, 0))
+            .order_by(RealtimeEvent.id).limit(FETCH_LIMIT)
+        ).all()
+        seen = set(self._seen)
+        fresh = [row for row in rows if row.id > self._floor and row.id not in seen]
+        for row in fresh:
+            self._seen.append(row.id)
+        if rows:
+            self._last_id = max(self._last_id, rows[-1].id)
+        if len(rows) == FETCH_LIMIT:
+            self.wake()  # more waiting
+        return fresh
+
+    def _purge(self, retention):
+        now = time.monotonic()
+        if now - self._last_purge < 60:
+            return
+        self._last_purge = now
+        cutoff = datetime.utcnow() - timedelta(seconds=retention)
+        db.session.execute(db.delete(RealtimeEvent).where(RealtimeEvent.created_at < cutoff))
+        db.session.commit()
+
+    def _dispatch(self, rows):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for sub in subscriptions:
+            for row in rows:
+                if row.channel not in sub.channels:
+                    continue
+                try:
+                    sub.queue.put_nowait(row)
+                except queue.Full:
+                    # Slow reader: end its stream; the browser reconnects with
+                    # Last-Event-ID and catches up from the table
+                    self.unsubscribe(sub)
+                    _force_put(sub.queue, None)
+                    break
+
+
+def _force_put(q, item):
+    try:
+        q.put_nowait(item)
+    except queue.Full:
+        try:
+            q.get_nowait()
+        except queue.Empty:
+            pass
+        q.put_nowait(item)
+
+
+hub = EventHub()
+
+
+def stream_events(channels, last_event_id=None):
+    """
+    Generator of SSE text for one client
+
+    Subscribes before replaying rows after Last-Event-ID (or after the head
+    at connect time) so nothing falls in between; the DB connection is
+    released before waiting on the queue.
+    Streams end after SSE_MAX_STREAM_SECONDS and the browser reconnects.
+    """
+    app = current_app._get_current_object()
+    config = app.config
+    head = db.session.execute(db.select(db.func.max(RealtimeEvent.id))).scalar() or 0
+    if last_event_id is None or last_event_id > head:
+        last_event_id = head
+    sub = hub.subscribe(app, channels, head)
+    try:
+        yield f"retry: {int(config.get('SSE_RETRY_MS', 3000))}\n\n"
+        rows = db.session.execute(
+            db.select(RealtimeEvent.id, RealtimeEvent.channel, RealtimeEvent.event, RealtimeEvent.payload)
+            .where(RealtimeEvent.id > last_event_id, RealtimeEvent.channel.in_(sub.channels))
+            .order_by(RealtimeEvent.id).limit(config.get('SSE_REPLAY_LIMIT', 200))
+        ).all()
+        db.session.close()
+        replayed = {row.id for row in rows}
+        for row in rows:
+            yield format_event(row)
+
+        heartbeat = config.get('SSE_HEARTBEAT', 15)
+        deadline = time.monotonic() + config.get('SSE_MAX_STREAM_SECONDS', 300)
+        while time.monotonic() < deadline:
+            try:
+                row = sub.queue.get(timeout=heartbeat)
+            except queue.Empty:
+                yield ': ping\n\n'
+                continue
+            if row is None:
+                return
+            if row.id in replayed:
+                continue
+            yield format_event(row)
+    finally:
+        hub.unsubscribe(sub)
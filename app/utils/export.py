@@ -1,5 +1,223 @@
-"""Placeholder for removed Excel export (environment-independent)."""
+"""
+ETERNO E-Commerce Platform - Data Export
+Streams orders, sales, products and customers to CSV or XLSX in constant
+memory: rows are read in keyset-paginated batches and written out as they
+arrive (CSV as a generator response, XLSX via openpyxl write-only mode)
+"""
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta
+from app import db
+from app.models import User, Product, Sale, Order
+from app.utils.crypto import decrypt_field
+from app.utils.helpers import format_datetime_sg
 
-def export_to_excel():
-    """No-op: local Excel export removed."""
-    pass
+EXPORT_FORMATS = ('csv', 'xlsx')
+DEFAULT_BATCH_SIZE = 2000
+
+
+def _item_summary(raw_items):
+    """Item count and 'name x qty' summary from an order/sale items JSON column."""
+    try:
+        items = json.loads(raw_items or '[]')
+    except (TypeError, ValueError):
+        return 0, ''
+    count = sum(int(item.get('quantity') or 0) for item in items)
+    summary = '; '.join(
+        f"{item.get('product_name') or item.get('name') or item.get('product_id')} x{item.get('quantity')}"
+        for item in items
+    )
+    return count, summary
+
+
+def _timestamp(value):
+    return format_datetime_sg(value, include_timezone_suffix=False) if value else ''
+
+
+def _order_row(row):
+    count, summary = _item_summary(row.items)
+    return [
+        row.id, _timestamp(row.created_at), row.customer_name, row.customer_email, row.status,
+        row.payment_method, row.subtotal, row.shipping_fee or 0.0, row.voucher_code or '',
+        row.voucher_discount or 0.0, row.total_amount, count, summary
+    ]
+
+
+def _sale_row(row):
+    count, _ = _item_summary(row.items)
+    return [
+        row.id, _timestamp(row.created_at), row.cashier or '', row.payment_method,
+        row.discount_type or 'none', row.discount_amount or 0.0, row.total_amount,
+        row.amount_paid or 0.0, row.change_amount or 0.0, count
+    ]
+
+
+def _product_row(row):
+    return [
+        row.id, row.name, row.category or '', row.price, row.stock, row.sold_count or 0,
+        row.badge or '', row.tags or '', bool(row.is_pinned), _timestamp(row.created_at)
+    ]
+
+
+def _customer_row(row):
+    return [
+        row.id, row.username, row.full_name or '', row.email, decrypt_field(row.phone_number) or '',
+        decrypt_field(row.address) or '', row.default_payment_method or '', _timestamp(row.created_at)
+    ]
+
+
+EXPORTS = {
+    'orders': {
+        'model': Order,
+        'columns': lambda: [Order.id, Order.created_at, Order.customer_name, Order.customer_email,
+                            Order.status, Order.payment_method, Order.subtotal, Order.shipping_fee,
+                            Order.voucher_code, Order.voucher_discount, Order.total_amount, Order.items],
+        'headers': ['Order ID', 'Date', 'Customer', 'Email', 'Status', 'Payment Method', 'Subtotal',
+                    'Shipping Fee', 'Voucher', 'Voucher Discount', 'Total', 'Item Count', 'Items'],
+        'row': _order_row
+    },
+    'sales': {
+        'model': Sale,
+        'columns': lambda: [Sale.id, Sale.created_at, User.username.label('cashier'), Sale.payment_method,
+                            Sale.discount_type, Sale.discount_amount, Sale.total_amount, Sale.amount_paid,
+                            Sale.change_amount, Sale.items],
+        'join': lambda stmt: stmt.outerjoin(User, User.id == Sale.user_id),
+        'headers': ['Sale ID', 'Date', 'Cashier', 'Payment Method', 'Discount Type', 'Discount',
+                    'Total', 'Amount Paid', 'Change', 'Item Count'],
+        'row': _sale_row
+    },
+    'products': {
+        'model': Product,
+        'columns': lambda: [Product.id, Product.name, Product.category, Product.price, Product.stock,
+                            Product.sold_count, Product.badge, Product.tags, Product.is_pinned,
+                            Product.created_at],
+        'headers': ['Product ID', 'Name', 'Category', 'Price', 'Stock', 'Sold', 'Badge', 'Tags',
+                    'Pinned', 'Created'],
+        'row': _product_row
+    },
+    'customers': {
+        'model': User,
+        'columns': lambda: [User.id, User.username, User.full_name, User.email, User.phone_number,
+                            User.address, User.default_payment_method, User.created_at],
+        'filter': lambda stmt: stmt.where(User.role == 'customer'),
+        'headers': ['Customer ID', 'Username', 'Full Name', 'Email', 'Phone', 'Address',
+                    'Default Payment', 'Joined'],
+        'row': _customer_row
+    },
+}
+
+
+def parse_date_range(start=None, end=None):
+    """Turn YYYY-MM-DD strings into a [start, end) datetime range; raises ValueError."""
+    start_dt = datetime.strptime(start, '%Y-%m-%d') if start else None
+    end_dt = datetime.strptime(end, '%Y-%m-%d') + timedelta(days=1) if end else None
+    return start_dt, end_dt
+
+
+def _export_statement(kind, start=None, end=None):
+    spec = EXPORTS[kind]
+    model = spec['model']
+    stmt = db.select(*spec['columns']())
+    if 'join' in spec:
+        stmt = spec['join'](stmt)
+    if 'filter' in spec:
+        stmt = spec['filter'](stmt)
+    if start is not None:
+        stmt = stmt.where(model.created_at >= start)
+    if end is not None:
+        stmt = stmt.where(model.created_at < end)
+    return stmt
+
+
+def count_export_rows(kind, start=None, end=None):
+    stmt = _export_statement(kind, start, end)
+    return db.session.execute(db.select(db.func.count()).select_from(stmt.subquery())).scalar() or 0
+
+
+def iter_export_batches(kind, start=None, end=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Yield lists of formatted rows, one keyset-paginated batch at a time
+
+    Each batch is a fresh `WHERE id > :last ORDER BY id LIMIT :n` query, so
+    memory stays flat on every driver (pg8000 has no server-side cursors)
+    and no transaction is held open between batches.
+    """
+    spec = EXPORTS[kind]
+    model = spec['model']
+    last_id = 0
+    while True:
+        stmt = _export_statement(kind, start, end).where(model.id > last_id).order_by(model.id).limit(batch_size)
+        rows = db.session.execute(stmt).all()
+        # Release the connection between batches
+        db.session.rollback()
+        if not rows:
+            return
+        yield [spec['row'](row) for row in rows]
+        last_id = rows[-1].id
+        if len(rows) < batch_size:
+            return
+
+
+def iter_export_rows(kind, start=None, end=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield formatted rows for an export (see iter_export_batches)."""
+    for batch in iter_export_batches(kind, start, end, batch_size):
+        yield from batch
+
+
+def safe_cell(value):
+    """Neutralize spreadsheet formulas in text cells (CSV/formula injection)."""
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@', '\t', '\r'):
+        return "'" + value
+    return value
+
+
+def stream_csv(kind, start=None, end=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Generator of CSV text chunks (header first), one chunk per batch."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORTS[kind]['headers'])
+    pending = 0
+    for row in iter_export_rows(kind, start, end, batch_size):
+        writer.writerow([safe_cell(value) for value in row])
+        pending += 1
+        if pending >= batch_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+    yield buffer.getvalue()
+
+
+def write_xlsx(kind, path, start=None, end=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Write an export to an .xlsx file with openpyxl's write-only workbook; returns row count."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=kind.capitalize())
+    sheet.append(EXPORTS[kind]['headers'])
+    count = 0
+    for row in iter_export_rows(kind, start, end, batch_size):
+        sheet.append([safe_cell(value) for value in row])
+        count += 1
+    workbook.save(path)
+    return count
+
+
+def export_xlsx_tempfile(kind, start=None, end=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Build an XLSX export in a temporary file and return its path (caller deletes it)."""
+    handle, path = tempfile.mkstemp(prefix=f'eterno_{kind}_', suffix='.xlsx')
+    os.close(handle)
+    try:
+        write_xlsx(kind, path, start, end, batch_size)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+
+def export_filename(kind, fmt):
+    stamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+    return f'eterno_{kind}_{stamp}.{fmt}'
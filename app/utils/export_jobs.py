@@ -0,0 +1,286 @@
+"""
+ETERNO E-Commerce Platform - Background Export Jobs
+Runs ExportJob rows outside the request: CSV, XLSX or Parquet files are
+written batch by batch into EXPORT_DIR with progress saved after every batch
+"""
+import csv
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from app import db
+from app.models import ExportJob
+from app.utils.export import EXPORTS, count_export_rows, iter_export_batches, parse_date_range, safe_cell
+
+JOB_FORMATS = ('csv', 'xlsx', 'parquet')
+MIMETYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'parquet': 'application/vnd.apache.parquet'
+}
+
+
+def export_dir():
+    return current_app.config.get('EXPORT_DIR') or os.path.join(current_app.instance_path, 'exports')
+
+
+def job_file_path(job):
+    return os.path.join(export_dir(), job.file_name) if job.file_name else None
+
+
+# ==================== WRITERS ====================
+
+def _write_csv(path, headers, batches, on_batch):
+    with open(path, 'w', newline='', encoding='utf-8') as fh:
+        writer = csv.writer(fh)
+        writer.writerow(headers)
+        for batch in batches:
+            writer.writerows([safe_cell(value) for value in row] for row in batch)
+            fh.flush()
+            on_batch(len(batch))
+
+
+def _write_xlsx(path, headers, batches, on_batch, title):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=title)
+    sheet.append(headers)
+    for batch in batches:
+        for row in batch:
+            sheet.append([safe_cell(value) for value in row])
+        on_batch(len(batch))
+    workbook.save(path)
+
+
+def _write_parquet(path, headers, batches, on_batch):
+    """One Parquet row group per batch; the first batch fixes the schema."""
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for batch in batches:
+            frame = pd.DataFrame(batch, columns=headers)
+            if writer is None:
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                writer = pq.ParquetWriter(path, table.schema)
+            else:
+                table = pa.Table.from_pandas(frame, schema=writer.schema, preserve_index=False)
+            writer.write_table(table)
+            on_batch(len(batch))
+        if writer is None:
+            empty = pa.Table.from_pandas(pd.DataFrame(columns=headers), preserve_index=False)
+            pq.write_table(empty, path)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+# ==================== RUNNER ====================
+
+class ClaimLost(Exception):
+    """The job was requeued and taken by another run while this one was writing"""
+
+
+def _claim(job_id):
+    """Atomically move a pending job to running; its claim token, or None if another worker has it."""
+    token = uuid.uuid4().hex
+    now = datetime.utcnow()
+    result = db.session.execute(
+        db.update(ExportJob)
+        .where(ExportJob.id == job_id, ExportJob.status == 'pending')
+        .values(status='running', started_at=now, heartbeat_at=now, claim_token=token,
+                processed_rows=0, error=None)
+    )
+    db.session.commit()
+    return token if result.rowcount == 1 else None
+
+
+def _update_claimed(job_id, token, **values):
+    """Update the job only while this run still holds it; raises ClaimLost otherwise."""
+    result = db.session.execute(
+        db.update(ExportJob)
+        .where(ExportJob.id == job_id, ExportJob.claim_token == token, ExportJob.status == 'running')
+        .values(**values)
+    )
+    db.session.commit()
+    if result.rowcount != 1:
+        raise ClaimLost(f'export job {job_id} was taken over')
+
+
+def _set_progress(job_id, token, processed):
+    _update_claimed(job_id, token, processed_rows=processed, heartbeat_at=datetime.utcnow())
+
+
+def run_export_job(job_id):
+    """Run one export job to completion inside the current app context."""
+    token = _claim(job_id)
+    if token is None:
+        return False
+    job = db.session.get(ExportJob, job_id)
+    kind, fmt, start_date, end_date = job.kind, job.file_format, job.start_date, job.end_date
+    db.session.rollback()
+    directory = export_dir()
+    # Named per claim, so a run that lost its job never writes over the new owner's files
+    file_name = f'export_{job_id}_{kind}_{token[:8]}.{fmt}'
+    part_path = os.path.join(directory, file_name + '.part')
+    final_path = os.path.join(directory, file_name)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        start, end = parse_date_range(start_date, end_date)
+        total_rows = count_export_rows(kind, start, end)
+        # End the read transaction before writing (SQLite cannot upgrade a
+        # stale read snapshot to a write lock)
+        db.session.rollback()
+        _update_claimed(job_id, token, total_rows=total_rows, heartbeat_at=datetime.utcnow())
+
+        batch_size = current_app.config.get('EXPORT_BATCH_SIZE', 2000)
+        batches = iter_export_batches(kind, start, end, batch_size)
+        headers = EXPORTS[kind]['headers']
+        processed = [0]
+
+        def on_batch(count):
+            processed[0] += count
+            _set_progress(job_id, token, processed[0])
+
+        if fmt == 'csv':
+            _write_csv(part_path, headers, batches, on_batch)
+        elif fmt == 'xlsx':
+            _write_xlsx(part_path, headers, batches, on_batch, kind.capitalize())
+        else:
+            _write_parquet(part_path, headers, batches, on_batch)
+
+        os.replace(part_path, final_path)
+        _update_claimed(
+            job_id, token, status='completed', processed_rows=processed[0], file_name=file_name,
+            file_size=os.path.getsize(final_path), finished_at=datetime.utcnow(), claim_token=None
+        )
+        return True
+    except ClaimLost:
+        db.session.rollback()
+        current_app.logger.warning("Export job %s was requeued while running; abandoning this run", job_id)
+        _remove_files(part_path, final_path)
+        return False
+    except Exception as exc:
+        db.session.rollback()
+        current_app.logger.exception("Export job %s failed", job_id)
+        _remove_files(part_path, final_path)
+        db.session.execute(
+            db.update(ExportJob).where(ExportJob.id == job_id, ExportJob.claim_token == token)
+            .values(status='failed', error=str(exc)[:500], finished_at=datetime.utcnow(), claim_token=None)
+        )
+        db.session.commit()
+        return False
+
+
+def _remove_files(*paths):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def enqueue_export(kind, file_format, start_date=None, end_date=None, user_id=None):
+    """
+    Create an ExportJob and start it
+
+    EXPORT_JOB_MODE=thread (default) runs it, and any other pending jobs, in
+    a daemon thread of this process; EXPORT_JOB_MODE=worker leaves it for
+    `flask export-worker`.
+    """
+    job = ExportJob(kind=kind, file_format=file_format, start_date=start_date,
+                    end_date=end_date, created_by=user_id)
+    db.session.add(job)
+    db.session.commit()
+    if current_app.config.get('EXPORT_JOB_MODE', 'thread') == 'thread':
+        app = current_app._get_current_object()
+        threading.Thread(target=_run_in_thread, args=(app,), name=f'export-job-{job.id}', daemon=True).start()
+    return job
+
+
+def requeue_stale_jobs(max_age_minutes):
+    """
+    Reset jobs left 'running' by a worker that died: no progress heartbeat
+    for max_age_minutes. A run that is still alive notices on its next
+    batch and stops.
+    """
+    cutoff = datetime.utcnow() - timedelta(minutes=max_age_minutes)
+    result = db.session.execute(
+        db.update(ExportJob)
+        .where(ExportJob.status == 'running',
+               db.func.coalesce(ExportJob.heartbeat_at, ExportJob.started_at) < cutoff)
+        .values(status='pending', processed_rows=0, claim_token=None)
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def pending_job_ids():
+    job_ids = [job_id for (job_id,) in db.session.execute(
+        db.select(ExportJob.id).where(ExportJob.status == 'pending').order_by(ExportJob.created_at)
+    ).all()]
+    db.session.rollback()
+    return job_ids
+
+
+def run_pending_jobs():
+    """
+    Requeue stale jobs, purge expired exports, then run every pending job
+
+    Returns [(job_id, ok)]. Claims are atomic, so several threads or
+    workers can call this at once.
+    """
+    config = current_app.config
+    requeued = requeue_stale_jobs(config.get('EXPORT_JOB_STALE_MINUTES', 30))
+    if requeued:
+        current_app.logger.info("Requeued %s stale export job(s)", requeued)
+    purge_expired_exports(config.get('EXPORT_RETENTION_DAYS', 7))
+    return [(job_id, run_export_job(job_id)) for job_id in pending_job_ids()]
+
+
+def _run_in_thread(app):
+    with app.app_context():
+        try:
+            run_pending_jobs()
+        finally:
+            db.session.remove()
+
+
+def purge_expired_exports(retention_days):
+    """Delete export files, job rows and abandoned .part files older than the retention period."""
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    directory = export_dir()
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.endswith('.part') and os.path.getmtime(path) < time.time() - retention_days * 86400:
+                os.remove(path)
+    expired = ExportJob.query.filter(
+        ExportJob.created_at < cutoff, ExportJob.status.in_(('completed', 'failed'))
+    ).all()
+    for job in expired:
+        path = job_file_path(job)
+        if path and os.path.exists(path):
+            os.remove(path)
+        db.session.delete(job)
+    db.session.commit()
+    return len(expired)
+
+
+@click.command('export-worker')
+@click.option('--once', is_flag=True, help='Process pending jobs and exit.')
+@click.option('--interval', default=2.0, show_default=True, help='Seconds between polls.')
+@with_appcontext
+def export_worker_command(once, interval):
+    """Run pending export jobs (use with EXPORT_JOB_MODE=worker)."""
+    while True:
+        for job_id, ok in run_pending_jobs():
+            click.echo(f"Export job {job_id}: {'completed' if ok else 'failed or taken'}")
+        if once:
+            return
+        time.sleep(interval)
@@ -0,0 +1,134 @@
+"""
+ETERNO E-Commerce Platform - Instrumentation Plumbing
+Shared by request metrics, the slow query log and tracing: one pair of
+cursor listeners per engine that times each statement once and hands it to
+every subscribed collector, and per-worker JSON snapshots in a directory
+local to the host (written atomically, merged by readers, deleted once
+their process is gone).
+"""
+import json
+import os
+import re
+import threading
+import time
+import weakref
+from flask import current_app, has_request_context
+from sqlalchemy import event
+
+# engine -> [callback(conn, statement, start_ns, seconds, error)]
+_query_callbacks = weakref.WeakKeyDictionary()
+
+
+# ==================== SQL TIMING ====================
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('instrumentation_start', []).append((time.perf_counter(), time.time_ns()))
+
+
+def _finish(conn, statement, error=None):
+    stack = conn.info.get('instrumentation_start')
+    if not stack:
+        return
+    started, start_ns = stack.pop()
+    elapsed = time.perf_counter() - started
+    for callback in _query_callbacks.get(conn.engine, ()):
+        callback(conn, statement, start_ns, elapsed, error)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _finish(conn, statement)
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None:
+        _finish(conn, exception_context.statement or '', exception_context.original_exception)
+
+
+def on_query(engine, callback):
+    """
+    Call callback(conn, statement, start_ns, seconds, error) after every
+    statement on engine; error is the raised exception, or None.
+    """
+    callbacks = _query_callbacks.get(engine)
+    if callbacks is None:
+        callbacks = _query_callbacks[engine] = []
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine, 'handle_error', _handle_error)
+    callbacks.append(callback)
+
+
+# ==================== PER-WORKER SNAPSHOTS ====================
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+class WorkerSnapshots:
+    """<directory>/<prefix>_<pid>.json written by each worker process"""
+
+    def __init__(self, prefix, label, max_age=86400):
+        self.prefix = prefix
+        self.label = label
+        self.max_age = max_age  # seconds; older files are treated as abandoned
+        self._pattern = re.compile(rf'^{re.escape(prefix)}_(\d+)\.json$')
+        self._last_write = 0.0
+        self._warned = False
+        self._lock = threading.Lock()
+
+    def write(self, directory, snapshot, force=False, interval=5.0):
+        """Store snapshot() as this process's file, at most once per interval unless forced."""
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_write < interval:
+                return
+            self._last_write = now
+            self._write(directory, snapshot)
+
+    def _write(self, directory, snapshot):
+        try:
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f'{self.prefix}_{os.getpid()}.json')
+            tmp_path = f'{path}.{threading.get_ident()}.tmp'  # path already carries the pid
+            with open(tmp_path, 'w') as fh:
+                json.dump(snapshot(), fh)
+            os.replace(tmp_path, path)
+        except OSError:
+            # Read-only filesystems (e.g. serverless) keep in-process data only
+            if not self._warned and has_request_context():
+                current_app.logger.warning("%s directory %s is not writable", self.label, directory)
+            self._warned = True
+
+    def read_others(self, directory):
+        """
+        Snapshots of the other live workers
+
+        Files of processes that no longer exist, or not rewritten for
+        max_age seconds, are deleted instead of being merged forever.
+        """
+        snapshots = []
+        if not os.path.isdir(directory):
+            return snapshots
+        own_pid = os.getpid()
+        now = time.time()
+        for filename in os.listdir(directory):
+            match = self._pattern.match(filename)
+            if not match or int(match.group(1)) == own_pid:
+                continue
+            path = os.path.join(directory, filename)
+            try:
+                if not _process_alive(int(match.group(1))) or now - os.path.getmtime(path) > self.max_age:
+                    os.remove(path)
+                    continue
+                with open(path) as fh:
+                    snapshots.append(json.load(fh))
+            except (OSError, ValueError):
+                continue
+        return snapshots
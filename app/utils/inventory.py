@@ -0,0 +1,268 @@
+"""
+ETERNO E-Commerce Platform - Inventory Analytics
+Incremental per-product daily sales across online orders and POS sales,
+rolling velocity, days of stock remaining and reorder suggestions
+"""
+import json
+import math
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from app import db
+from app.models import Order, Sale, Product, ProductDailySales, ProductVelocity, AnalyticsCursor
+from app.utils.helpers import to_singapore_time
+
+CURSOR_NAME = 'sales_velocity'
+BATCH_SIZE = 5000
+_last_refresh = {'at': 0.0}
+
+
+def _local_day(dt):
+    return to_singapore_time(dt).date()
+
+
+def _read_cursor():
+    cursor = db.session.get(AnalyticsCursor, CURSOR_NAME)
+    if cursor is None:
+        db.session.add(AnalyticsCursor(name=CURSOR_NAME, last_order_id=0, last_sale_id=0))
+        db.session.commit()
+        return 0, 0
+    return cursor.last_order_id, cursor.last_sale_id
+
+
+def _settled(rows, cutoff):
+    """
+    Rows up to (not including) the first one created after cutoff
+
+    On PostgreSQL a lower id can commit after a higher one. Stopping at the
+    first unsettled row keeps the cursor below any id whose transaction may
+    still be open, so it is folded in on a later run instead of skipped.
+    """
+    for index, row in enumerate(rows):
+        if row.created_at is not None and row.created_at > cutoff:
+            return rows[:index], False
+    return rows, len(rows) < BATCH_SIZE
+
+
+def _collect(last_order_id, last_sale_id):
+    """Aggregate one batch of new orders and sales into {(product_id, day): [online, pos, revenue]}."""
+    totals = defaultdict(lambda: [0, 0, 0.0])
+    cutoff = datetime.utcnow() - timedelta(seconds=current_app.config.get('INVENTORY_SETTLE_SECONDS', 120))
+    orders, orders_done = _settled(db.session.execute(
+        db.select(Order.id, Order.created_at, Order.status, Order.items)
+        .where(Order.id > last_order_id).order_by(Order.id).limit(BATCH_SIZE)
+    ).all(), cutoff)
+    sales, sales_done = _settled(db.session.execute(
+        db.select(Sale.id, Sale.created_at, Sale.items)
+        .where(Sale.id > last_sale_id).order_by(Sale.id).limit(BATCH_SIZE)
+    ).all(), cutoff)
+    db.session.rollback()
+
+    for row in orders:
+        if row.status == 'cancelled':
+            continue
+        day = _local_day(row.created_at)
+        for item in json.loads(row.items or '[]'):
+            quantity = int(item.get('quantity') or 0)
+            entry = totals[(item.get('product_id'), day)]
+            entry[0] += quantity
+            entry[2] += float(item.get('price') or 0) * quantity
+    for row in sales:
+        day = _local_day(row.created_at)
+        for item in json.loads(row.items or '[]'):
+            quantity = int(item.get('quantity') or 0)
+            entry = totals[(item.get('product_id'), day)]
+            entry[1] += quantity
+            entry[2] += float(item.get('price') or 0) * quantity
+
+    new_order_id = orders[-1].id if orders else last_order_id
+    new_sale_id = sales[-1].id if sales else last_sale_id
+    done = orders_done and sales_done
+    return totals, new_order_id, new_sale_id, done
+
+
+def _apply(totals, old_ids, new_ids):
+    """
+    Add a batch to product_daily_sales and advance the cursor atomically
+
+    The conditional cursor UPDATE runs first and doubles as a lock: a
+    concurrent run that read the same cursor matches no row and backs off.
+    """
+    advanced = db.session.execute(
+        db.update(AnalyticsCursor)
+        .where(AnalyticsCursor.name == CURSOR_NAME,
+               AnalyticsCursor.last_order_id == old_ids[0],
+               AnalyticsCursor.last_sale_id == old_ids[1])
+        .values(last_order_id=new_ids[0], last_sale_id=new_ids[1], updated_at=datetime.utcnow())
+    ).rowcount
+    if not advanced:
+        db.session.rollback()
+        return False
+
+    keys = [key for key in totals if key[0] is not None]
+    if keys:
+        existing = {
+            (row.product_id, row.day): row
+            for row in ProductDailySales.query.filter(
+                ProductDailySales.product_id.in_({k[0] for k in keys}),
+                ProductDailySales.day.in_({k[1] for k in keys})
+            )
+        }
+        for key in keys:
+            online, pos, revenue = totals[key]
+            row = existing.get(key)
+            if row is None:
+                db.session.add(ProductDailySales(product_id=key[0], day=key[1], online_units=online,
+                                                 pos_units=pos, revenue=revenue))
+            else:
+                row.online_units += online
+                row.pos_units += pos
+                row.revenue += revenue
+    db.session.commit()
+    return True
+
+
+def record_order_status_change(order, old_status, new_status):
+    """
+    Keep already-folded daily sales in step when an order is cancelled or restored
+
+    Orders past the cursor are picked up (or skipped) by the next run; only
+    ones already counted need adjusting. Runs in the caller's transaction.
+    """
+    was_counted = old_status != 'cancelled'
+    if was_counted == (new_status != 'cancelled'):
+        return
+    cursor = db.session.get(AnalyticsCursor, CURSOR_NAME)
+    if cursor is None or order.id > cursor.last_order_id:
+        return  # not folded in yet (possibly still settling)
+    sign = -1 if was_counted else 1
+    day = _local_day(order.created_at)
+    for item in json.loads(order.items or '[]'):
+        quantity = int(item.get('quantity') or 0) * sign
+        row = ProductDailySales.query.filter_by(product_id=item.get('product_id'), day=day).first()
+        if row is None:
+            if sign < 0:
+                continue
+            row = ProductDailySales(product_id=item.get('product_id'), day=day, online_units=0, pos_units=0, revenue=0)
+            db.session.add(row)
+        row.online_units += quantity
+        row.revenue += float(item.get('price') or 0) * quantity
+
+
+def recompute_velocity(today=None):
+    """Rebuild product_velocity from the last 28 days of product_daily_sales."""
+    today = today or _local_day(datetime.utcnow())
+    week_start = today - timedelta(days=6)
+    window_start = today - timedelta(days=27)
+    units = ProductDailySales.online_units + ProductDailySales.pos_units
+    rows = db.session.execute(
+        db.select(
+            ProductDailySales.product_id,
+            db.func.sum(db.case((ProductDailySales.day >= week_start, units), else_=0)).label('units_7d'),
+            db.func.sum(units).label('units_28d')
+        ).where(ProductDailySales.day >= window_start).group_by(ProductDailySales.product_id)
+    ).all()
+    recent = {row.product_id: (int(row.units_7d or 0), int(row.units_28d or 0)) for row in rows}
+
+    lead_time = current_app.config.get('INVENTORY_LEAD_TIME_DAYS', 7)
+    cover = current_app.config.get('INVENTORY_COVER_DAYS', 14)
+    velocities = {v.product_id: v for v in ProductVelocity.query.all()}
+    now = datetime.utcnow()
+    for product_id, stock in db.session.execute(db.select(Product.id, Product.stock)).all():
+        units_7d, units_28d = recent.get(product_id, (0, 0))
+        velocity_7d = units_7d / 7.0
+        velocity_28d = units_28d / 28.0
+        # Weight the last week more so trends show up without overreacting
+        forecast = 0.6 * velocity_7d + 0.4 * velocity_28d
+        stock = max(stock or 0, 0)
+        row = velocities.get(product_id)
+        if row is None:
+            row = ProductVelocity(product_id=product_id)
+            db.session.add(row)
+        row.units_7d = units_7d
+        row.units_28d = units_28d
+        row.velocity_7d = velocity_7d
+        row.velocity_28d = velocity_28d
+        row.forecast_daily = forecast
+        row.days_of_stock = stock / forecast if forecast > 0 else None
+        row.sell_through_28d = units_28d / (units_28d + stock) if (units_28d + stock) else 0.0
+        row.reorder_qty = max(0, math.ceil(forecast * (lead_time + cover)) - stock)
+        row.computed_at = now
+    db.session.commit()
+
+
+def refresh_sales_velocity(max_batches=None):
+    """
+    Fold new orders/sales into daily sales, then recompute velocity.
+    Returns batches applied; stops after max_batches when given.
+    """
+    applied = 0
+    while max_batches is None or applied < max_batches:
+        old_ids = _read_cursor()
+        db.session.rollback()
+        totals, new_order_id, new_sale_id, done = _collect(*old_ids)
+        if (new_order_id, new_sale_id) == old_ids:
+            break  # nothing new, or only rows still settling
+        if not _apply(totals, old_ids, (new_order_id, new_sale_id)):
+            break  # another process is running the same job
+        applied += 1
+        if done:
+            break
+    recompute_velocity()
+    _last_refresh['at'] = time.monotonic()
+    return applied
+
+
+def refresh_if_stale():
+    """
+    Run one batch of the incremental job when this process has not done so
+    recently; a larger backlog is left to `flask inventory-velocity`.
+    """
+    max_age = current_app.config.get('INVENTORY_VELOCITY_MAX_AGE', 300)
+    if time.monotonic() - _last_refresh['at'] >= max_age:
+        refresh_sales_velocity(max_batches=1)
+
+
+def velocity_by_product():
+    return {row.product_id: row.to_dict() for row in ProductVelocity.query.all()}
+
+
+def low_stock_products(max_days=None, min_units=None):
+    """Products projected to sell out within max_days, or already at/below min_units."""
+    max_days = current_app.config.get('LOW_STOCK_DAYS', 14) if max_days is None else max_days
+    min_units = current_app.config.get('LOW_STOCK_UNITS', 5) if min_units is None else min_units
+    rows = db.session.query(Product, ProductVelocity).outerjoin(
+        ProductVelocity, ProductVelocity.product_id == Product.id
+    ).filter(db.or_(
+        ProductVelocity.days_of_stock <= max_days,
+        Product.stock <= min_units
+    )).all()
+    alerts = []
+    for product, velocity in rows:
+        alerts.append({
+            'id': product.id,
+            'name': product.name,
+            'category': product.category,
+            'stock': product.stock,
+            'velocity': velocity.to_dict() if velocity else None
+        })
+    # Soonest to run out first; sold-out items lead, non-moving low stock trails
+    def urgency(alert):
+        days = (alert['velocity'] or {}).get('days_of_stock')
+        if alert['stock'] <= 0:
+            return -1
+        return days if days is not None else float('inf')
+    alerts.sort(key=urgency)
+    return alerts
+
+
+@click.command('inventory-velocity')
+@with_appcontext
+def inventory_velocity_command():
+    """Process new orders/sales into daily product sales and refresh velocity."""
+    started = time.perf_counter()
+    applied = refresh_sales_velocity()
+    click.echo(f"Applied {applied} batch(es); velocity refreshed in {time.perf_counter() - started:.2f}s")
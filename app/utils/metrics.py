@@ -0,0 +1,221 @@
+"""
+ETERNO E-Commerce Platform - Request Metrics
+Per-endpoint latency histograms, status counters, DB and template timings
+exposed in Prometheus text format. Each worker process periodically writes
+its counters to METRICS_DIR; /metrics merges the files of live workers.
+"""
+import atexit
+import hmac
+import os
+import threading
+import time
+from flask import g, request, current_app, has_request_context, Response, jsonify
+from flask.signals import before_render_template, template_rendered
+from app.utils.instrumentation import WorkerSnapshots, on_query
+from app.auth.utils import get_current_identity
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRIC_HELP = {
+    'eterno_http_requests_total': ('counter', 'HTTP requests by endpoint, method and status code'),
+    'eterno_http_request_duration_seconds': ('histogram', 'HTTP request latency by endpoint'),
+    'eterno_db_queries_total': ('counter', 'SQL statements executed by endpoint'),
+    'eterno_db_duration_seconds': ('histogram', 'Time spent in SQL per request by endpoint'),
+    'eterno_template_render_seconds': ('histogram', 'Jinja template render time by template'),
+}
+
+
+class MetricsRegistry:
+    """In-process counters and histograms keyed by (metric name, label tuple)"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    hist['buckets'][i] += 1
+                    break
+            hist['sum'] += value
+            hist['count'] += 1
+
+    def snapshot(self):
+        """JSON-serializable copy of all series."""
+        with self._lock:
+            return {
+                'buckets': list(self.buckets),
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'histograms': [
+                    [name, list(labels), {'buckets': list(h['buckets']), 'sum': h['sum'], 'count': h['count']}]
+                    for (name, labels), h in self.histograms.items()
+                ]
+            }
+
+
+registry = MetricsRegistry()
+snapshots = WorkerSnapshots('metrics', 'Metrics')
+
+
+def _metrics_dir():
+    return current_app.config.get('METRICS_DIR') or os.path.join(current_app.instance_path, 'metrics')
+
+
+def flush_to_disk(directory, force=False, interval=5.0):
+    """Write this process's snapshot to <directory>/metrics_<pid>.json."""
+    snapshots.write(directory, registry.snapshot, force=force, interval=interval)
+
+
+def _merged_snapshots(directory):
+    """Combine the live registry with the files written by other workers."""
+    all_snapshots = [registry.snapshot()] + snapshots.read_others(directory)
+
+    counters = {}
+    histograms = {}
+    buckets = list(registry.buckets)
+    for snap in all_snapshots:
+        if snap.get('buckets') != buckets:
+            continue
+        for name, labels, value in snap['counters']:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, hist in snap['histograms']:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            merged = histograms.setdefault(key, {'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0})
+            merged['buckets'] = [a + b for a, b in zip(merged['buckets'], hist['buckets'])]
+            merged['sum'] += hist['sum']
+            merged['count'] += hist['count']
+    return buckets, counters, histograms
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + (list(extra) if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def render_prometheus(directory):
+    """Render merged metrics in the Prometheus text exposition format."""
+    buckets, counters, histograms = _merged_snapshots(directory)
+    lines = []
+    for name, (metric_type, help_text) in METRIC_HELP.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        if metric_type == 'counter':
+            for (series, labels), value in sorted(counters.items()):
+                if series == name:
+                    lines.append(f'{name}{_format_labels(labels)} {value}')
+            continue
+        for (series, labels), hist in sorted(histograms.items()):
+            if series != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets, hist['buckets']):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {hist["count"]}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {hist["sum"]}')
+            lines.append(f'{name}_count{_format_labels(labels)} {hist["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+# ==================== HOOKS ====================
+
+def _endpoint_label():
+    return request.endpoint or 'unmatched'
+
+
+def _before_request():
+    g.metrics_start = time.perf_counter()
+    g.metrics_db_time = 0.0
+    g.metrics_db_count = 0
+
+
+def _after_request(response):
+    started = g.pop('metrics_start', None)
+    if started is None:
+        return response
+    endpoint = _endpoint_label()
+    elapsed = time.perf_counter() - started
+    registry.inc('eterno_http_requests_total', {
+        'endpoint': endpoint, 'method': request.method, 'status': str(response.status_code)
+    })
+    registry.observe('eterno_http_request_duration_seconds', {'endpoint': endpoint, 'method': request.method}, elapsed)
+    registry.inc('eterno_db_queries_total', {'endpoint': endpoint}, g.get('metrics_db_count', 0))
+    registry.observe('eterno_db_duration_seconds', {'endpoint': endpoint}, g.get('metrics_db_time', 0.0))
+    flush_to_disk(_metrics_dir(), interval=current_app.config.get('METRICS_FLUSH_INTERVAL', 5))
+    return response
+
+
+def _record_query(conn, statement, start_ns, seconds, error):
+    if error is None and has_request_context() and 'metrics_db_count' in g:
+        g.metrics_db_count += 1
+        g.metrics_db_time += seconds
+
+
+def _before_render(sender, template, context, **extra):
+    if has_request_context():
+        g.setdefault('metrics_render_stack', []).append(time.perf_counter())
+
+
+def _after_render(sender, template, context, **extra):
+    if not has_request_context():
+        return
+    stack = g.get('metrics_render_stack')
+    if stack:
+        registry.observe(
+            'eterno_template_render_seconds',
+            {'template': template.name or 'string'},
+            time.perf_counter() - stack.pop()
+        )
+
+
+def _authorized():
+    token = current_app.config.get('METRICS_TOKEN')
+    header = request.headers.get('Authorization', '')
+    if token and header.startswith('Bearer ') and hmac.compare_digest(header[7:].strip(), token):
+        return True
+    identity = get_current_identity()
+    return identity is not None and identity.role == 'admin'
+
+
+def metrics_view():
+    """Prometheus scrape endpoint (admin session or METRICS_TOKEN bearer)."""
+    if not _authorized():
+        return jsonify({'error': 'Unauthorized'}), 403
+    directory = _metrics_dir()
+    flush_to_disk(directory, force=True)
+    return Response(render_prometheus(directory), mimetype='text/plain; version=0.0.4')
+
+
+def init_metrics(app, db):
+    """Register request, SQL and template instrumentation plus GET /metrics."""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+    with app.app_context():
+        for engine in db.engines.values():
+            on_query(engine, _record_query)
+        directory = _metrics_dir()
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+    atexit.register(flush_to_disk, directory, True)
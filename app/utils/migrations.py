@@ -0,0 +1,241 @@
+"""
+ETERNO E-Commerce Platform - Schema Migrations
+Versioned, dialect-aware migration runner backed by a schema_version table
+"""
+import os
+import re
+import importlib.util
+from datetime import datetime
+from app import db
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'migrations')
+MIGRATION_FILE_PATTERN = re.compile(r'^(\d{4})_(\w+)\.py$')
+
+# Arbitrary constant used to serialize concurrent upgrades on Postgres
+PG_ADVISORY_LOCK_ID = 724100026
+
+_migration_cache = None
+
+
+class Migration:
+    """A single numbered migration script loaded from app/migrations"""
+
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+        self._module = None
+
+    def __repr__(self):
+        return f'<Migration {self.version:04d}_{self.name}>'
+
+    @property
+    def module(self):
+        if self._module is None:
+            spec = importlib.util.spec_from_file_location(
+                f'eterno_migration_{self.version:04d}', self.path
+            )
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            self._module = module
+        return self._module
+
+    def upgrade(self, conn):
+        self.module.upgrade(conn, conn.dialect.name)
+
+
+def discover_migrations():
+    """
+    Return all migration scripts sorted by version
+
+    Scripts live in app/migrations and are named NNNN_description.py.
+    Each one defines upgrade(conn, dialect).
+    """
+    global _migration_cache
+    if _migration_cache is not None:
+        return _migration_cache
+    migrations = []
+    seen = set()
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = MIGRATION_FILE_PATTERN.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in seen:
+            raise RuntimeError(f'Duplicate migration version {version:04d}')
+        seen.add(version)
+        migrations.append(Migration(version, match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    _migration_cache = migrations
+    return migrations
+
+
+def head_version():
+    """Latest migration version shipped with the code."""
+    migrations = discover_migrations()
+    return migrations[-1].version if migrations else 0
+
+
+def _ensure_version_table(conn):
+    conn.execute(db.text(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, "
+        "name VARCHAR(100) NOT NULL, "
+        "applied_at TIMESTAMP NOT NULL)"
+    ))
+
+
+def _read_version(conn):
+    try:
+        return conn.execute(db.text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+    except Exception:
+        conn.rollback()
+        return None
+
+
+def get_schema_version():
+    """
+    Return the applied schema version, or None if the database was never migrated
+
+    This is the only schema check done at boot: one lookup on the
+    schema_version primary key.
+    """
+    with db.engine.connect() as conn:
+        version = _read_version(conn)
+        conn.rollback()
+        return version
+
+
+def _is_empty(conn):
+    """True when none of the model tables exist yet (a brand-new database)."""
+    return not set(db.inspect(conn).get_table_names()) & set(db.metadata.tables)
+
+
+def _record(conn, migration):
+    conn.execute(
+        db.text("INSERT INTO schema_version (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+        {'version': migration.version, 'name': migration.name, 'applied_at': datetime.utcnow()}
+    )
+
+
+def upgrade(target=None, logger=None):
+    """
+    Bring the database schema up to the target version (default: head)
+
+    An empty database is bootstrapped from the models at head and every
+    migration is recorded as applied; it cannot stop at an earlier target
+    (ValueError), since the models only describe head. Any other database (including one
+    created before versioning, at version 0) only runs the numbered
+    migrations, each of which carries its own DDL. Every migration commits
+    on its own together with its schema_version row, so a failed run can
+    simply be retried.
+
+    Returns:
+        List of applied Migration instances
+    """
+    target = head_version() if target is None else target
+    applied = []
+    with db.engine.connect() as conn:
+        is_postgres = conn.dialect.name == 'postgresql'
+        if is_postgres:
+            # Serialize concurrent upgrades (e.g. several workers booting at once)
+            conn.execute(db.text("SELECT pg_advisory_lock(:lock_id)"), {'lock_id': PG_ADVISORY_LOCK_ID})
+            conn.commit()
+        try:
+            _ensure_version_table(conn)
+            conn.commit()
+            current = _read_version(conn) or 0
+            conn.commit()
+            if not current and _is_empty(conn):
+                # The models describe head, so a fresh database skips the history
+                if target != head_version():
+                    raise ValueError(f"An empty database can only be created at the latest version "
+                                     f"({head_version():04d}), not {target:04d}")
+                db.metadata.create_all(bind=conn)
+                for migration in discover_migrations():
+                    _record(conn, migration)
+                    applied.append(migration)
+                conn.commit()
+                if logger:
+                    logger.info("Created schema at version %04d from the models", head_version())
+                    for migration in applied:
+                        logger.info("Recorded migration %04d_%s as applied", migration.version, migration.name)
+                return applied
+            pending = [m for m in discover_migrations() if current < m.version <= target]
+            for migration in pending:
+                migration.upgrade(conn)
+                _record(conn, migration)
+                conn.commit()
+                applied.append(migration)
+                if logger:
+                    logger.info("Applied migration %04d_%s", migration.version, migration.name)
+        finally:
+            if is_postgres:
+                conn.rollback()
+                conn.execute(db.text("SELECT pg_advisory_unlock(:lock_id)"), {'lock_id': PG_ADVISORY_LOCK_ID})
+                conn.commit()
+    return applied
+
+
+# ==================== DDL HELPERS FOR MIGRATION SCRIPTS ====================
+
+def _quote(conn, name):
+    return conn.dialect.identifier_preparer.quote(name)
+
+
+def column_names(conn, table):
+    """Return the set of column names currently present on a table."""
+    return {column['name'] for column in db.inspect(conn).get_columns(table)}
+
+
+def add_column(conn, table, column, ddl_type, default=None):
+    """
+    Add a column if it does not exist yet
+
+    Args:
+        conn: Connection the migration runs on
+        table: Table name
+        column: Column name
+        ddl_type: SQL type, or dict mapping dialect name to SQL type
+        default: Optional SQL default expression, or dict per dialect
+    """
+    if column in column_names(conn, table):
+        return False
+    dialect = conn.dialect.name
+    if isinstance(ddl_type, dict):
+        ddl_type = ddl_type.get(dialect, ddl_type.get('default'))
+    if isinstance(default, dict):
+        default = default.get(dialect, default.get('default'))
+    statement = f"ALTER TABLE {_quote(conn, table)} ADD COLUMN {_quote(conn, column)} {ddl_type}"
+    if default is not None:
+        statement += f" DEFAULT {default}"
+    conn.execute(db.text(statement))
+    return True
+
+
+def create_table(conn, name, *items):
+    """
+    Create a table if it does not exist, with the columns, constraints and
+    indexes given here (frozen at the migration's version, never read from
+    the models). Tables referenced by foreign keys must already exist.
+    """
+    metadata = db.MetaData()
+    for item in items:
+        for fk in getattr(item, 'foreign_keys', ()):
+            ref_table, ref_column = fk.target_fullname.rsplit('.', 1)
+            if ref_table not in metadata.tables:
+                db.Table(ref_table, metadata, db.Column(ref_column, db.Integer, primary_key=True))
+    db.Table(name, metadata, *items).create(conn, checkfirst=True)
+
+
+def create_index(conn, name, table, columns, unique=False, where=None):
+    """Create an index if it does not exist (optionally partial)."""
+    cols = ", ".join(_quote(conn, c) for c in columns)
+    statement = f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {_quote(conn, name)} ON {_quote(conn, table)} ({cols})"
+    if where:
+        statement += f" WHERE {where}"
+    conn.execute(db.text(statement))
+
+
+def drop_index(conn, name):
+    """Drop an index if it exists."""
+    conn.execute(db.text(f"DROP INDEX IF EXISTS {_quote(conn, name)}"))
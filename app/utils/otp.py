@@ -0,0 +1,100 @@
+"""
+ETERNO E-Commerce Platform - OTP Token Store
+Keyed digests of one-time codes (the codes themselves are never stored),
+per-user active token limits and the batched purge of expired tokens.
+"""
+import hashlib
+import hmac
+import time
+from datetime import datetime
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from app import db
+from app.models import OtpToken
+
+_last_purge = {'at': 0.0}
+
+
+def otp_digest(user_id, purpose, code):
+    """HMAC-SHA256 of a code, bound to its user and purpose, keyed by SECRET_KEY."""
+    key = current_app.config['SECRET_KEY'].encode('utf-8')
+    message = f'{user_id}:{purpose}:{code.upper().strip()}'.encode('utf-8')
+    return hmac.new(key, message, hashlib.sha256).hexdigest()
+
+
+def active_tokens_query(user_id, purpose, now=None):
+    now = now or datetime.utcnow()
+    return OtpToken.query.filter(
+        OtpToken.user_id == user_id, OtpToken.purpose == purpose,
+        OtpToken.used.is_(False), OtpToken.expires_at >= now
+    )
+
+
+def retire_excess_tokens(user_id, purpose, keep):
+    """Mark all but the newest `keep` active tokens of a user/purpose as used."""
+    stale = [token.id for token in active_tokens_query(user_id, purpose)
+             .order_by(OtpToken.created_at.desc(), OtpToken.id.desc())
+             .offset(keep).with_entities(OtpToken.id)]
+    if stale:
+        OtpToken.query.filter(OtpToken.id.in_(stale)).update({'used': True}, synchronize_session=False)
+
+
+def match_token(tokens, digest):
+    """The token whose digest equals `digest`; every candidate is compared in constant time."""
+    match = None
+    for token in tokens:
+        if hmac.compare_digest(token.code, digest) and match is None:
+            match = token
+    return match
+
+
+def purge_otp_tokens(batch_size=None, before=None, max_batches=None):
+    """
+    Delete expired tokens (used ones included) in batches of batch_size
+
+    Each batch is its own short transaction on the expires_at index, so a
+    large backlog never holds a long write lock. Stops after max_batches
+    when given. Returns rows deleted.
+    """
+    batch_size = batch_size or current_app.config.get('OTP_PURGE_BATCH', 5000)
+    before = before or datetime.utcnow()
+    table = OtpToken.__table__
+    deleted = batches = 0
+    while max_batches is None or batches < max_batches:
+        with db.engine.begin() as conn:
+            ids = conn.execute(
+                db.select(table.c.id).where(table.c.expires_at < before).limit(batch_size)
+            ).scalars().all()
+            if ids:
+                conn.execute(table.delete().where(table.c.id.in_(ids)))
+        deleted += len(ids)
+        batches += 1
+        if len(ids) < batch_size:
+            break
+    return deleted
+
+
+def purge_if_due():
+    """
+    Delete one batch of expired tokens when this process has not done so for
+    OTP_PURGE_INTERVAL seconds; a larger backlog is left to `flask otp-purge`.
+    """
+    now = time.monotonic()
+    if now - _last_purge['at'] < current_app.config.get('OTP_PURGE_INTERVAL', 600):
+        return
+    _last_purge['at'] = now
+    try:
+        purge_otp_tokens(max_batches=1)
+    except Exception:
+        current_app.logger.exception("OTP token purge failed")
+
+
+@click.command('otp-purge')
+@click.option('--batch-size', type=int, default=None, help='Rows per delete (default OTP_PURGE_BATCH)')
+@with_appcontext
+def otp_purge_command(batch_size):
+    """Delete expired one-time passcodes (used ones included)."""
+    started = time.perf_counter()
+    deleted = purge_otp_tokens(batch_size)
+    click.echo(f"Purged {deleted} OTP token(s) in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,245 @@
+"""
+ETERNO E-Commerce Platform - Page Cache
+Response and fragment cache for the public catalog pages. Entries record the
+change_version of their surrogate keys (tags) when rendered and are ignored
+once a tag moves, so product or review edits invalidate them on every worker.
+Anonymous responses also carry Cache-Control s-maxage for the CDN edge.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from functools import wraps
+from flask import current_app, make_response, request, session
+from app.utils.conditional import scope_versions
+from app.utils.ttl_cache import TTLCache
+
+# Response headers kept in cached pages (Set-Cookie and friends never are)
+STORED_HEADERS = ('Content-Type', 'Content-Language')
+
+
+# ==================== BACKENDS ====================
+
+class MemoryBackend(TTLCache):
+    """Per-process LRU with per-entry expiry"""
+
+
+class FileSystemBackend:
+    """One file per entry, shared by the workers of one host"""
+
+    def __init__(self, directory, max_entries=1000):
+        self.directory = directory
+        self.max_entries = max_entries
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.cache')
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as fh:
+                expires = float(fh.readline())
+                if expires < time.time():
+                    return None
+                return fh.read()
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key, value, ttl):
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as fh:
+            fh.write(f'{time.time() + ttl}\n'.encode('ascii'))
+            fh.write(value)
+        os.replace(tmp_path, path)
+        self._prune()
+
+    def _prune(self):
+        entries = [e for e in os.scandir(self.directory) if e.name.endswith('.cache')]
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.cache'):
+                os.remove(entry.path)
+
+
+class SQLiteBackend:
+    """Single SQLite file (WAL) shared by every worker on the host"""
+
+    def __init__(self, path, max_entries=1000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        conn = self._conn()
+        conn.execute('CREATE TABLE IF NOT EXISTS page_cache '
+                     '(key TEXT PRIMARY KEY, expires REAL NOT NULL, value BLOB NOT NULL)')
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute('SELECT expires, value FROM page_cache WHERE key = ?', (key,)).fetchone()
+        if row is None or row[0] < time.time():
+            return None
+        return row[1]
+
+    def set(self, key, value, ttl):
+        conn = self._conn()
+        now = time.time()
+        try:
+            conn.execute('INSERT OR REPLACE INTO page_cache (key, expires, value) VALUES (?, ?, ?)',
+                         (key, now + ttl, value))
+            conn.execute('DELETE FROM page_cache WHERE expires < ?', (now,))
+            conn.execute('DELETE FROM page_cache WHERE key IN (SELECT key FROM page_cache '
+                         'ORDER BY expires DESC LIMIT -1 OFFSET ?)', (self.max_entries,))
+            conn.commit()
+        except sqlite3.OperationalError:
+            # Another worker holds the write lock; skipping one store is fine
+            conn.rollback()
+
+    def clear(self):
+        conn = self._conn()
+        conn.execute('DELETE FROM page_cache')
+        conn.commit()
+
+
+_backend = {'key': None, 'backend': None}
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Backend for PAGE_CACHE_BACKEND (memory, filesystem, sqlite) or None when off."""
+    config = current_app.config
+    name = (config.get('PAGE_CACHE_BACKEND') or 'memory').lower()
+    if name == 'none':
+        return None
+    max_entries = config.get('PAGE_CACHE_MAX_ENTRIES', 256)
+    directory = config.get('PAGE_CACHE_DIR') or os.path.join(current_app.instance_path, 'page_cache')
+    key = (name, directory, max_entries)
+    with _backend_lock:
+        if _backend['key'] != key:
+            if name == 'filesystem':
+                backend = FileSystemBackend(directory, max_entries)
+            elif name == 'sqlite':
+                backend = SQLiteBackend(os.path.join(directory, 'page_cache.sqlite3'), max_entries)
+            else:
+                backend = MemoryBackend(max_entries)
+            _backend.update(key=key, backend=backend)
+        return _backend['backend']
+
+
+# ==================== CACHING ====================
+
+def _lookup(backend, key, tags):
+    """
+    (entry, versions): the cached payload for key, or None if missing, expired
+    or stale, plus the current tag versions to store with a fresh render.
+    """
+    versions = scope_versions(tags)
+    raw = backend.get(key)
+    if raw is None:
+        return None, versions
+    entry = json.loads(raw)
+    if entry.get('tags') != versions:
+        return None, versions
+    return entry, versions
+
+
+def cached_fragment(name, tags, builder, ttl=None):
+    """
+    Return builder()'s JSON-serializable result, cached under `name` until
+    a tag's version moves or ttl passes. Use for data shared by every visitor.
+    """
+    backend = get_backend()
+    if backend is None:
+        return builder()
+    key = f'fragment:{name}'
+    entry, versions = _lookup(backend, key, tags)
+    if entry is not None:
+        return entry['value']
+    value = builder()
+    ttl = ttl or current_app.config.get('PAGE_CACHE_TTL', 300)
+    backend.set(key, json.dumps({'tags': versions, 'value': value}).encode('utf-8'), ttl)
+    return value
+
+
+def _page_key(query_args):
+    query = '&'.join(f'{arg}={value}' for arg in query_args for value in request.args.getlist(arg))
+    auth_state = 'anon'  # only anonymous responses are cached
+    return f'page:{auth_state}:{request.path}?{query}'
+
+
+def _shared_headers(response, cacheable):
+    response.vary.add('Cookie')
+    if cacheable:
+        config = current_app.config
+        response.cache_control.public = True
+        response.cache_control.max_age = 0
+        response.cache_control.s_maxage = config.get('PAGE_CACHE_S_MAXAGE', 60)
+        if config.get('PAGE_CACHE_STALE_WHILE_REVALIDATE'):
+            response.cache_control.stale_while_revalidate = config['PAGE_CACHE_STALE_WHILE_REVALIDATE']
+    else:
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+    return response
+
+
+def cached_page(tags=('catalog',), query_args=()):
+    """
+    Serve anonymous GETs of this view from the page cache
+
+    The key is path + the listed query args + auth state; other query args
+    (tracking parameters and the like) do not split the cache. Logged-in
+    requests always render and are marked private for the edge.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            backend = get_backend()
+            anonymous = not session.get('user_id')
+            if backend is None or request.method != 'GET' or not anonymous:
+                response = make_response(f(*args, **kwargs))
+                response.headers['X-Page-Cache'] = 'BYPASS'
+                return _shared_headers(response, False) if not anonymous else response
+
+            key = _page_key(query_args)
+            entry, versions = _lookup(backend, key, tags)
+            if entry is not None:
+                response = current_app.response_class(entry['body'], status=entry['status'], headers=entry['headers'])
+                response.headers['X-Page-Cache'] = 'HIT'
+                response.headers['Surrogate-Key'] = ' '.join(tags)
+                return _shared_headers(response, True)
+
+            response = make_response(f(*args, **kwargs))
+            cacheable = response.status_code == 200 and 'Set-Cookie' not in response.headers
+            if cacheable:
+                entry = {
+                    'tags': versions,
+                    'status': response.status_code,
+                    'headers': [(name, response.headers[name]) for name in STORED_HEADERS if name in response.headers],
+                    'body': response.get_data(as_text=True)
+                }
+                backend.set(key, json.dumps(entry).encode('utf-8'), current_app.config.get('PAGE_CACHE_TTL', 300))
+            response.headers['X-Page-Cache'] = 'MISS'
+            response.headers['Surrogate-Key'] = ' '.join(tags)
+            return _shared_headers(response, cacheable)
+        return decorated_function
+    return decorator
@@ -0,0 +1,108 @@
+"""
+ETERNO E-Commerce Platform - Password Hashing
+Configurable password hashing (scrypt, pbkdf2 or bcrypt) with cost set per
+deployment, detection of hashes made with older settings so login can
+upgrade them, and a bounded thread pool that caps how many hashes one
+worker process computes at once.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+HASH_METHODS = ('scrypt', 'pbkdf2', 'bcrypt')
+
+_pool = {'size': None, 'executor': None}
+_pool_lock = threading.Lock()
+
+
+def hash_settings(config=None):
+    """
+    (method, werkzeug method string or bcrypt rounds) from the config
+
+    PASSWORD_HASH_METHOD picks the algorithm; PASSWORD_SCRYPT_N/R/P,
+    PASSWORD_PBKDF2_ITERATIONS and PASSWORD_BCRYPT_ROUNDS set its cost.
+    """
+    config = config if config is not None else current_app.config
+    method = (config.get('PASSWORD_HASH_METHOD') or 'scrypt').lower()
+    if method == 'scrypt':
+        return method, (f"scrypt:{config.get('PASSWORD_SCRYPT_N', 32768)}:"
+                        f"{config.get('PASSWORD_SCRYPT_R', 8)}:{config.get('PASSWORD_SCRYPT_P', 1)}")
+    if method == 'pbkdf2':
+        return method, f"pbkdf2:sha256:{config.get('PASSWORD_PBKDF2_ITERATIONS', 600000)}"
+    if method == 'bcrypt':
+        return method, int(config.get('PASSWORD_BCRYPT_ROUNDS', 12))
+    raise ValueError(f"PASSWORD_HASH_METHOD must be one of {', '.join(HASH_METHODS)}")
+
+
+def _is_bcrypt(password_hash):
+    return password_hash.startswith(('$2a$', '$2b$', '$2y$'))
+
+
+def _bcrypt_bytes(password):
+    # bcrypt only reads 72 bytes (and bcrypt>=5 rejects longer input)
+    return password.encode('utf-8')[:72]
+
+
+def compute_hash(password, settings):
+    method, params = settings
+    if method == 'bcrypt':
+        import bcrypt
+        return bcrypt.hashpw(_bcrypt_bytes(password), bcrypt.gensalt(rounds=params)).decode('ascii')
+    return generate_password_hash(password, method=params)
+
+
+def check_hash(password_hash, password):
+    """True if password matches a werkzeug (scrypt/pbkdf2) or bcrypt hash."""
+    if not password_hash:
+        return False
+    if _is_bcrypt(password_hash):
+        import bcrypt
+        try:
+            return bcrypt.checkpw(_bcrypt_bytes(password), password_hash.encode('ascii'))
+        except ValueError:
+            return False
+    return check_password_hash(password_hash, password)
+
+
+def hash_needs_update(password_hash, settings):
+    """True when password_hash was not made with the given algorithm and cost."""
+    method, params = settings
+    if method == 'bcrypt':
+        return not (_is_bcrypt(password_hash) and password_hash[4:6] == f'{params:02d}')
+    return _is_bcrypt(password_hash) or password_hash.split('$', 1)[0] != params
+
+
+# ==================== THREAD POOL ====================
+
+def _executor():
+    size = current_app.config.get('PASSWORD_HASH_WORKERS', 2)
+    if size <= 0:
+        return None
+    with _pool_lock:
+        if _pool['size'] != size:
+            if _pool['executor'] is not None:
+                _pool['executor'].shutdown(wait=False)
+            _pool.update(size=size, executor=ThreadPoolExecutor(max_workers=size, thread_name_prefix='pwhash'))
+        return _pool['executor']
+
+
+def _run(fn, *args):
+    # The hashes release the GIL, so request threads only queue here; the
+    # pool bounds concurrent CPU (and scrypt memory) per process during bursts
+    executor = _executor()
+    if executor is None:
+        return fn(*args)
+    return executor.submit(fn, *args).result()
+
+
+def hash_password(password):
+    return _run(compute_hash, password, hash_settings())
+
+
+def verify_password(password_hash, password):
+    return _run(check_hash, password_hash, password)
+
+
+def needs_rehash(password_hash):
+    return hash_needs_update(password_hash, hash_settings())
@@ -8,7 +8,9 @@ from io import BytesIO
 import json
 from datetime import datetime
 from app.utils.helpers import format_datetime_sg
+from app.utils.tracing import traced
 
+@traced('pdf.generate_sale_receipt')
 def generate_sale_receipt(sale):
     """
     Generate PDF receipt for POS sale
@@ -113,6 +115,7 @@ def generate_sale_receipt(sale):
     buffer.seek(0)
     return buffer
 
+@traced('pdf.generate_order_receipt')
 def generate_order_receipt(order):
     """
     Generate PDF receipt for customer order
@@ -215,6 +218,7 @@ def generate_order_receipt(order):
     return buffer
 
 
+@traced('pdf.generate_sales_report')
 def generate_sales_report_pdf(period_label, start_date, end_date, metrics):
     """
     Generate PDF summary report for selected period.
@@ -277,6 +281,7 @@ def generate_sales_report_pdf(period_label, start_date, end_date, metrics):
     return buffer
 
 
+@traced('pdf.generate_dashboard_report')
 def generate_dashboard_report_pdf(metrics, status_breakdown, recent_orders):
     """Generate PDF report for admin dashboard snapshot."""
     buffer = BytesIO()
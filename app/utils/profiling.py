@@ -0,0 +1,258 @@
+"""
+ETERNO E-Commerce Platform - On-Demand Request Profiling
+Admin-triggered cProfile (.prof) or sampling (speedscope JSON) profiles,
+stored per endpoint and rate limited so the hook can stay enabled
+"""
+import cProfile
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+from flask import g, request, current_app
+from app.auth.utils import get_current_identity
+
+PROFILE_PARAM = '_profile'
+PROFILE_HEADER = 'X-Eterno-Profile'
+PROFILE_MODES = ('cprofile', 'sample')
+PROFILE_SUFFIXES = {'cprofile': '.prof', 'sample': '.speedscope.json'}
+SAFE_NAME = re.compile(r'^[A-Za-z0-9_.\-]+$')
+
+_rate_lock = threading.Lock()
+_last_by_endpoint = {}
+_recent = []
+
+
+def profiles_dir():
+    return current_app.config.get('PROFILING_DIR') or os.path.join(current_app.instance_path, 'profiles')
+
+
+def _requested_mode():
+    """Mode asked for by ?_profile= or the X-Eterno-Profile header, else None."""
+    value = (request.args.get(PROFILE_PARAM) or request.headers.get(PROFILE_HEADER) or '').strip().lower()
+    if not value:
+        return None
+    if value in ('1', 'true', 'yes'):
+        return current_app.config.get('PROFILING_DEFAULT_MODE', 'cprofile')
+    return value if value in PROFILE_MODES else None
+
+
+def _acquire_slot(endpoint):
+    """Per-endpoint interval plus a per-minute cap for this process."""
+    now = time.monotonic()
+    interval = current_app.config.get('PROFILING_MIN_INTERVAL', 10)
+    per_minute = current_app.config.get('PROFILING_MAX_PER_MINUTE', 6)
+    with _rate_lock:
+        while _recent and now - _recent[0] > 60:
+            _recent.pop(0)
+        if len(_recent) >= per_minute:
+            return False
+        if now - _last_by_endpoint.get(endpoint, float('-inf')) < interval:
+            return False
+        _last_by_endpoint[endpoint] = now
+        _recent.append(now)
+        return True
+
+
+# ==================== SAMPLING PROFILER ====================
+
+class SamplingProfiler:
+    """
+    Samples one thread's Python stack on a timer
+
+    Runs in a background thread using sys._current_frames(), so the profiled
+    request pays almost nothing beyond the GIL switches. Output follows the
+    speedscope "sampled" file format.
+    """
+
+    def __init__(self, interval=0.001, max_depth=128):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.frames = []
+        self._frame_index = {}
+        self.samples = []
+        self.weights = []
+        self._target = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.started_at = None
+        self.ended_at = None
+
+    def start(self):
+        self._target = threading.get_ident()
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='eterno-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.ended_at = time.perf_counter()
+
+    def _frame_id(self, code, lineno):
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        index = self._frame_index.get(key)
+        if index is None:
+            index = self._frame_index[key] = len(self.frames)
+            self.frames.append({'name': code.co_name, 'file': code.co_filename, 'line': code.co_firstlineno})
+        return index
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            now = time.perf_counter()
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                stack.append(self._frame_id(frame.f_code, frame.f_lineno))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples.append(stack)
+            self.weights.append(now - last)
+            last = now
+
+    def to_speedscope(self, name):
+        duration = (self.ended_at or time.perf_counter()) - self.started_at
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'exporter': 'eterno-profiler',
+            'shared': {'frames': self.frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': duration,
+                'samples': self.samples,
+                'weights': self.weights
+            }]
+        }
+
+
+# ==================== HOOKS ====================
+
+def _before_request():
+    identity = get_current_identity()
+    if identity is None or identity.role != 'admin':
+        return
+    mode = _requested_mode()
+    if mode is None:
+        return
+    endpoint = request.endpoint or 'unmatched'
+    if not _acquire_slot(endpoint):
+        g.profile_skipped = True
+        return
+    if mode == 'sample':
+        profiler = SamplingProfiler(interval=current_app.config.get('PROFILING_SAMPLE_INTERVAL', 0.001))
+        profiler.start()
+    else:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is active (Python 3.12+ allows one per process)
+            g.profile_skipped = True
+            return
+    g.profile = (mode, endpoint, profiler, time.perf_counter())
+
+
+def _stop_profiler():
+    state = g.pop('profile', None)
+    if state is None:
+        return None
+    mode, endpoint, profiler, started = state
+    if mode == 'sample':
+        profiler.stop()
+    else:
+        profiler.disable()
+    return mode, endpoint, profiler, time.perf_counter() - started
+
+
+def _save_profile(mode, endpoint, profiler, elapsed):
+    directory = profiles_dir()
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+    safe_endpoint = re.sub(r'[^A-Za-z0-9_.]', '_', endpoint)
+    filename = f'{stamp}_{safe_endpoint}_{int(elapsed * 1000)}ms{PROFILE_SUFFIXES[mode]}'
+    path = os.path.join(directory, filename)
+    if mode == 'sample':
+        with open(path, 'w') as fh:
+            json.dump(profiler.to_speedscope(f'{request.method} {request.path} ({endpoint})'), fh)
+    else:
+        profiler.dump_stats(path)
+    _prune(directory, current_app.config.get('PROFILING_MAX_FILES', 50))
+    return filename
+
+
+def _prune(directory, keep):
+    """Delete the oldest profiles beyond the retention count."""
+    names = sorted(name for name in os.listdir(directory) if name.endswith(tuple(PROFILE_SUFFIXES.values())))
+    for name in names[:-keep] if keep > 0 else []:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass
+
+
+def _after_request(response):
+    if g.pop('profile_skipped', False):
+        response.headers[PROFILE_HEADER] = 'rate-limited'
+        return response
+    state = _stop_profiler()
+    if state is None:
+        return response
+    try:
+        response.headers[PROFILE_HEADER] = _save_profile(*state)
+    except OSError as exc:
+        current_app.logger.warning("Could not save profile: %s", exc)
+    return response
+
+
+def _teardown_request(exc):
+    # Unhandled errors skip after_request; never leave a profiler running
+    _stop_profiler()
+
+
+# ==================== STORAGE ====================
+
+def list_profiles():
+    """Stored profiles, newest first."""
+    directory = profiles_dir()
+    if not os.path.isdir(directory):
+        return []
+    entries = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        mode = next((m for m, suffix in PROFILE_SUFFIXES.items() if name.endswith(suffix)), None)
+        if mode is None:
+            continue
+        stem = name[:-len(PROFILE_SUFFIXES[mode])]
+        parts = stem.split('_')
+        stat = os.stat(os.path.join(directory, name))
+        entries.append({
+            'name': name,
+            'mode': mode,
+            'endpoint': '_'.join(parts[1:-1]) if len(parts) > 2 else None,
+            'duration_ms': int(parts[-1][:-2]) if parts[-1].endswith('ms') and parts[-1][:-2].isdigit() else None,
+            'size': stat.st_size,
+            'created_at': datetime.utcfromtimestamp(stat.st_mtime).isoformat()
+        })
+    return entries
+
+
+def is_profile_name(name):
+    return bool(SAFE_NAME.match(name or '')) and name.endswith(tuple(PROFILE_SUFFIXES.values()))
+
+
+def init_profiling(app):
+    """Register the profiling hooks when PROFILING_ENABLED is set."""
+    if not app.config.get('PROFILING_ENABLED'):
+        return
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
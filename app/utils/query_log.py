@@ -0,0 +1,158 @@
+"""
+ETERNO E-Commerce Platform - Slow Query Log
+Fingerprints SQL statements (literals stripped) and aggregates count, total
+and max time per fingerprint per endpoint. Each worker periodically dumps its
+aggregates to QUERY_LOG_DIR; the admin top-N view merges the files of live
+workers.
+"""
+import atexit
+import os
+import re
+import threading
+from functools import lru_cache
+from flask import request, current_app, has_request_context
+from app.utils.instrumentation import WorkerSnapshots, on_query
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|(?<!:):\w+|\$\d+|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_LIST = re.compile(r"(VALUES\s*\([^)]*\))(?:\s*,\s*\([^)]*\))+", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement):
+    """
+    Normalize a SQL statement so executions differing only in values match
+
+    String and numeric literals and driver placeholders become '?', IN lists
+    and multi-row VALUES collapse to one entry, whitespace is squeezed.
+    """
+    text = _STRING_LITERAL.sub('?', statement)
+    text = _PLACEHOLDER.sub('?', text)
+    text = _NUMBER_LITERAL.sub('?', text)
+    text = _IN_LIST.sub('(?+)', text)
+    text = _VALUES_LIST.sub(r'\1, ...', text)
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+class QueryLog:
+    """Per-process aggregates keyed by (endpoint, fingerprint)"""
+
+    def __init__(self, max_entries=2000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.entries = {}
+        self.dropped = 0
+
+    def record(self, endpoint, statement, seconds, slow):
+        key = (endpoint, fingerprint(statement))
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                if len(self.entries) >= self.max_entries:
+                    self.dropped += 1
+                    return
+                entry = self.entries[key] = {'count': 0, 'total': 0.0, 'max': 0.0, 'slow': 0}
+            entry['count'] += 1
+            entry['total'] += seconds
+            if seconds > entry['max']:
+                entry['max'] = seconds
+            if slow:
+                entry['slow'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'dropped': self.dropped,
+                'entries': [
+                    {'endpoint': endpoint, 'fingerprint': fp, **entry}
+                    for (endpoint, fp), entry in self.entries.items()
+                ]
+            }
+
+
+query_log = QueryLog()
+snapshots = WorkerSnapshots('query_log', 'Query log')
+
+
+def query_log_dir():
+    return current_app.config.get('QUERY_LOG_DIR') or os.path.join(current_app.instance_path, 'query_log')
+
+
+def dump_to_disk(directory, force=False, interval=60):
+    """Write this process's aggregates to <directory>/query_log_<pid>.json."""
+    snapshots.write(directory, query_log.snapshot, force=force, interval=interval)
+
+
+def top_queries(directory, limit=20, sort='total', endpoint=None):
+    """Merge the live log with other workers' dumps and return the top N."""
+    all_snapshots = [query_log.snapshot()] + snapshots.read_others(directory)
+
+    merged = {}
+    for snap in all_snapshots:
+        for entry in snap.get('entries', []):
+            if endpoint and entry['endpoint'] != endpoint:
+                continue
+            key = (entry['endpoint'], entry['fingerprint'])
+            target = merged.setdefault(key, {'count': 0, 'total': 0.0, 'max': 0.0, 'slow': 0})
+            target['count'] += entry['count']
+            target['total'] += entry['total']
+            target['max'] = max(target['max'], entry['max'])
+            target['slow'] += entry['slow']
+
+    rows = []
+    for (ep, fp), entry in merged.items():
+        rows.append({
+            'endpoint': ep,
+            'fingerprint': fp,
+            'count': entry['count'],
+            'slow_count': entry['slow'],
+            'total_ms': round(entry['total'] * 1000, 3),
+            'avg_ms': round(entry['total'] * 1000 / entry['count'], 3) if entry['count'] else 0,
+            'max_ms': round(entry['max'] * 1000, 3)
+        })
+    sort_key = {'total': 'total_ms', 'max': 'max_ms', 'avg': 'avg_ms', 'count': 'count', 'slow': 'slow_count'}.get(sort, 'total_ms')
+    rows.sort(key=lambda row: row[sort_key], reverse=True)
+    return rows[:limit]
+
+
+# ==================== HOOKS ====================
+
+def _endpoint_label():
+    if has_request_context():
+        return request.endpoint or 'unmatched'
+    return 'background'
+
+
+def _make_record_query(slow_seconds, logger):
+    def record_query(conn, statement, start_ns, seconds, error):
+        if error is not None:
+            return
+        slow = seconds >= slow_seconds
+        endpoint = _endpoint_label()
+        query_log.record(endpoint, statement, seconds, slow)
+        if slow:
+            logger.warning("Slow query (%.1f ms) in %s: %s", seconds * 1000, endpoint, fingerprint(statement))
+    return record_query
+
+
+def _after_request(response):
+    dump_to_disk(query_log_dir(), interval=current_app.config.get('QUERY_LOG_DUMP_INTERVAL', 60))
+    return response
+
+
+def init_query_log(app, db):
+    """Attach the slow query logger to every engine of the app."""
+    if not app.config.get('QUERY_LOG_ENABLED', True):
+        return
+    query_log.max_entries = app.config.get('QUERY_LOG_MAX_ENTRIES', 2000)
+    record_query = _make_record_query(app.config.get('SLOW_QUERY_MS', 200) / 1000.0, app.logger)
+    with app.app_context():
+        for engine in db.engines.values():
+            on_query(engine, record_query)
+        directory = query_log_dir()
+    app.after_request(_after_request)
+    atexit.register(dump_to_disk, directory, True)
@@ -0,0 +1,253 @@
+"""
+ETERNO E-Commerce Platform - Rate Limiting
+Sliding-window rate limits keyed by client IP, submitted username or
+signed-in user. Counters live in process memory, or in the
+rate_limit_counter table when RATE_LIMIT_STORAGE=database so every worker
+shares them. A rejected key is remembered locally until its retry time, so
+rejections never write to (or usually even read) the database.
+"""
+import math
+import threading
+import time
+from functools import wraps
+import click
+from flask import current_app, jsonify, make_response, render_template, request, session
+from flask.cli import with_appcontext
+from app import db
+from app.models import RateLimitCounter
+
+# Rule kinds and how each finds its key in the request
+KEY_FUNCS = {
+    'ip': lambda: request.remote_addr or 'unknown',
+    'username': lambda: (request.form.get('username') or '').strip().lower() or None,
+    'user': lambda: session.get('user_id'),
+}
+
+
+def _windows(now, window):
+    current = int(now // window * window)
+    return current, current - window
+
+
+def _estimate(now, window, current_count, previous_count):
+    """Sliding-window count: this window's hits plus the overlapping share of the last one."""
+    current_start, _ = _windows(now, window)
+    weight = 1 - (now - current_start) / window
+    return current_count + previous_count * weight
+
+
+def _retry_after(now, window, limit, current_count, previous_count):
+    """Seconds until the estimate drops below limit again (at least 1)."""
+    current_start, _ = _windows(now, window)
+    if current_count >= limit or not previous_count:
+        return max(1, math.ceil(current_start + window - now))
+    # Decay of the previous window's share brings the estimate under the limit
+    needed = (current_count + previous_count - limit + 1) / previous_count * window
+    return max(1, math.ceil(current_start + needed - now))
+
+
+# ==================== STORES ====================
+
+class MemoryStore:
+    """Per-process counters; limits multiply by the number of workers"""
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+
+    def counts(self, key, window, now):
+        current_start, previous_start = _windows(now, window)
+        with self._lock:
+            return (self._counts.get((key, current_start), (0, 0))[0],
+                    self._counts.get((key, previous_start), (0, 0))[0])
+
+    def hit(self, keys, now):
+        with self._lock:
+            for key, window in keys:
+                current_start, _ = _windows(now, window)
+                count, _ = self._counts.get((key, current_start), (0, 0))
+                self._counts[(key, current_start)] = (count + 1, current_start + 2 * window)
+            if now - self._last_prune >= 60:
+                self._last_prune = now
+                for item in [k for k, (_, expires) in self._counts.items() if expires < now]:
+                    del self._counts[item]
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+
+
+class DatabaseStore:
+    """Counters in rate_limit_counter, shared by every worker and host"""
+
+    def __init__(self):
+        self._last_purge = 0.0
+
+    def counts(self, key, window, now):
+        current_start, previous_start = _windows(now, window)
+        table = RateLimitCounter.__table__
+        with db.engine.connect() as conn:
+            rows = dict(conn.execute(
+                db.select(table.c.window_start, table.c.count)
+                .where(table.c.key == key, table.c.window_start.in_((current_start, previous_start)))
+            ).all())
+        return rows.get(current_start, 0), rows.get(previous_start, 0)
+
+    def hit(self, keys, now):
+        table = RateLimitCounter.__table__
+        rows = []
+        for key, window in keys:
+            current_start, _ = _windows(now, window)
+            rows.append({'key': key, 'window_start': current_start, 'count': 1,
+                         'expires_at': current_start + 2 * window})
+        rows.sort(key=lambda row: row['key'])  # fixed order avoids deadlocks
+        with db.engine.begin() as conn:
+            if conn.dialect.name in ('postgresql', 'sqlite'):
+                if conn.dialect.name == 'postgresql':
+                    from sqlalchemy.dialects.postgresql import insert
+                else:
+                    from sqlalchemy.dialects.sqlite import insert
+                stmt = insert(table).values(rows)
+                conn.execute(stmt.on_conflict_do_update(
+                    index_elements=[table.c.key, table.c.window_start],
+                    set_={'count': table.c.count + 1}
+                ))
+            else:
+                for row in rows:
+                    updated = conn.execute(
+                        table.update()
+                        .where(table.c.key == row['key'], table.c.window_start == row['window_start'])
+                        .values(count=table.c.count + 1)
+                    ).rowcount
+                    if not updated:
+                        conn.execute(table.insert().values(**row))
+            if now - self._last_purge >= 60:
+                self._last_purge = now
+                conn.execute(table.delete().where(table.c.expires_at < int(now)))
+
+    def clear(self):
+        with db.engine.begin() as conn:
+            conn.execute(RateLimitCounter.__table__.delete())
+
+
+class RateLimiter:
+    """Checks a named rule set against the store; remembers rejected keys locally"""
+
+    def __init__(self, store):
+        self.store = store
+        self._blocked = {}
+        self._lock = threading.Lock()
+
+    def _blocked_for(self, keys, now):
+        with self._lock:
+            return max((self._blocked.get(key, 0) - now for key, _ in keys), default=0)
+
+    def _block(self, key, until):
+        with self._lock:
+            self._blocked[key] = until
+            if len(self._blocked) > 10000:
+                now = time.time()
+                for item in [k for k, t in self._blocked.items() if t <= now]:
+                    del self._blocked[item]
+
+    def hit(self, rules):
+        """
+        Count one attempt against rules [(key, limit, window)]
+
+        Returns 0 when allowed, else seconds to wait. A rejected attempt is
+        not counted, so a blocked client cannot extend its own lockout.
+        """
+        now = time.time()
+        keys = [(key, window) for key, _, window in rules]
+        wait = self._blocked_for(keys, now)
+        if wait > 0:
+            return max(1, math.ceil(wait))
+        for key, limit, window in rules:
+            current_count, previous_count = self.store.counts(key, window, now)
+            if _estimate(now, window, current_count, previous_count) >= limit:
+                retry_after = _retry_after(now, window, limit, current_count, previous_count)
+                self._block(key, now + retry_after)
+                return retry_after
+        self.store.hit(keys, now)
+        return 0
+
+    def reset(self):
+        with self._lock:
+            self._blocked.clear()
+        self.store.clear()
+
+
+_limiter = {'storage': None, 'limiter': None}
+_limiter_lock = threading.Lock()
+
+
+def get_limiter():
+    """Limiter for RATE_LIMIT_STORAGE (memory or database), or None when 'none'."""
+    storage = (current_app.config.get('RATE_LIMIT_STORAGE') or 'memory').lower()
+    if storage == 'none' or not current_app.config.get('RATE_LIMIT_ENABLED', True):
+        return None
+    with _limiter_lock:
+        if _limiter['storage'] != storage:
+            store = DatabaseStore() if storage == 'database' else MemoryStore()
+            _limiter.update(storage=storage, limiter=RateLimiter(store))
+        return _limiter['limiter']
+
+
+# ==================== RULES ====================
+
+def _rules(name, values):
+    """[(key, limit, window)] for RATE_LIMITS[name], skipping kinds without a value."""
+    rules = []
+    for kind, limit, window in current_app.config.get('RATE_LIMITS', {}).get(name, ()):
+        value = values.get(kind)
+        if value is not None:
+            rules.append((f'{name}:{kind}:{window}:{value}', limit, window))
+    return rules
+
+
+def check_rate_limit(name, **values):
+    """
+    Count an attempt against RATE_LIMITS[name] for the given key values
+    (e.g. user=42); returns 0 when allowed, else seconds to wait.
+    """
+    limiter = get_limiter()
+    rules = _rules(name, values) if limiter else []
+    return limiter.hit(rules) if rules else 0
+
+
+def rate_limit(name, methods=('POST',), template=None):
+    """
+    Apply RATE_LIMITS[name] to a view, keyed by the kinds in its rules
+
+    Over the limit the view answers 429 with Retry-After: the given
+    template rendered with an error message, or a JSON error.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method not in methods:
+                return f(*args, **kwargs)
+            kinds = {kind for kind, _, _ in current_app.config.get('RATE_LIMITS', {}).get(name, ())}
+            retry_after = check_rate_limit(name, **{kind: KEY_FUNCS[kind]() for kind in kinds})
+            if not retry_after:
+                return f(*args, **kwargs)
+            message = f'Too many attempts. Please try again in {retry_after} seconds.'
+            if template:
+                response = make_response(render_template(template, error=message), 429)
+            else:
+                response = make_response(jsonify({'error': message}), 429)
+            response.headers['Retry-After'] = str(retry_after)
+            return response
+        return decorated_function
+    return decorator
+
+
+@click.command('rate-limit-reset')
+@with_appcontext
+def rate_limit_reset_command():
+    """Clear all rate limit counters and local blocks."""
+    limiter = get_limiter()
+    if limiter is not None:
+        limiter.reset()
+    click.echo("Rate limit counters cleared")
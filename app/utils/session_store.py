@@ -0,0 +1,256 @@
+"""
+ETERNO E-Commerce Platform - Server-Side Sessions
+Flask SessionInterface keeping session data in the user_session table. The
+cookie carries only a random token; rows are keyed by its SHA-256 so a leaked
+table cannot be replayed as cookies. A per-process LRU with a short TTL keeps
+lookups off the database on the hot path.
+"""
+import hashlib
+import secrets
+import time
+from datetime import datetime, timedelta
+import click
+from flask import current_app, has_request_context, request
+from flask.cli import with_appcontext
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+from app import db
+from app.models import UserSession
+from app.utils.ttl_cache import TTLCache
+
+serializer = TaggedJSONSerializer()
+
+
+def hash_token(token):
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    """Session dict that remembers its row and the user it was loaded for"""
+
+    def __init__(self, initial=None, sid=None, new=False, user_id=None, touched_at=None):
+        def on_update(self):
+            self.modified = True
+            self.accessed = True
+        super().__init__(initial, on_update)
+        self.sid = sid  # sha256 of the cookie token, None until first saved
+        self.new = new
+        self.loaded_user_id = user_id
+        self.touched_at = touched_at
+        self.modified = False
+        self.accessed = False
+
+
+class DatabaseSessionInterface(SessionInterface):
+    """
+    Sessions stored in user_session
+
+    Writes go through their own engine connection, never the request's ORM
+    session, so saving a session cannot commit a view's unfinished work.
+    Unmodified sessions are re-written only every SESSION_TOUCH_INTERVAL to
+    slide their expiry; empty sessions are never stored. Rows are inserted
+    only for a new session id, so a revoked session is never re-created.
+    """
+
+    def __init__(self, cache_size=10000, cache_ttl=10, touch_interval=300, purge_interval=600):
+        self.cache = TTLCache(cache_size, cache_ttl)
+        self.touch_interval = touch_interval
+        self.purge_interval = purge_interval
+        self._last_purge = 0.0
+
+    # ---- storage ----
+
+    def _load(self, sid):
+        record = self.cache.get(sid)
+        if record is not None:
+            return record
+        table = UserSession.__table__
+        with db.engine.connect() as conn:
+            row = conn.execute(
+                db.select(table.c.data, table.c.user_id, table.c.expires_at, table.c.last_seen_at)
+                .where(table.c.id == sid)
+            ).first()
+        if row is None or row.expires_at < datetime.utcnow():
+            return None
+        record = {'data': row.data, 'user_id': row.user_id, 'expires_at': row.expires_at,
+                  'touched_at': row.last_seen_at}
+        self.cache.set(sid, record)
+        return record
+
+    def _insert(self, sid, data, user_id, expires_at, replaces=None):
+        """Store a freshly issued session id, dropping the row it replaces."""
+        table = UserSession.__table__
+        now = datetime.utcnow()
+        user_agent = request.user_agent.string[:255] if has_request_context() else None
+        ip_address = request.remote_addr if has_request_context() else None
+        with db.engine.begin() as conn:
+            if replaces:
+                conn.execute(table.delete().where(table.c.id == replaces))
+            conn.execute(table.insert().values(id=sid, data=data, user_id=user_id, expires_at=expires_at,
+                                               last_seen_at=now, created_at=now, user_agent=user_agent,
+                                               ip_address=ip_address))
+        if replaces:
+            self.cache.evict(replaces)
+        self.cache.set(sid, {'data': data, 'user_id': user_id, 'expires_at': expires_at, 'touched_at': now})
+
+    def _update(self, sid, record, **values):
+        """
+        Write values to an existing row; False when the row is gone (revoked
+        or purged), in which case it is never re-created.
+        """
+        table = UserSession.__table__
+        now = datetime.utcnow()
+        with db.engine.begin() as conn:
+            updated = conn.execute(
+                table.update().where(table.c.id == sid).values(last_seen_at=now, **values)
+            ).rowcount
+        if not updated:
+            self.cache.evict(sid)
+            return False
+        self.cache.set(sid, dict(record, touched_at=now, **values))
+        return True
+
+    def _delete(self, sid):
+        table = UserSession.__table__
+        with db.engine.begin() as conn:
+            conn.execute(table.delete().where(table.c.id == sid))
+        self.cache.evict(sid)
+
+    def _maybe_purge(self):
+        now = time.monotonic()
+        if now - self._last_purge < self.purge_interval:
+            return
+        self._last_purge = now
+        purge_expired_sessions()
+
+    # ---- SessionInterface ----
+
+    def open_session(self, app, request):
+        token = request.cookies.get(self.get_cookie_name(app))
+        if not token:
+            return ServerSession(new=True)
+        sid = hash_token(token)
+        record = self._load(sid)
+        if record is None:
+            return ServerSession(new=True)
+        return ServerSession(serializer.loads(record['data']), sid=sid, user_id=record['user_id'],
+                             touched_at=record['touched_at'])
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if not session:
+            if session.modified and session.sid:
+                self._delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path, secure=secure,
+                                       samesite=samesite, httponly=httponly)
+                response.vary.add('Cookie')
+            return
+
+        expires_at = datetime.utcnow() + app.permanent_session_lifetime
+        # A new session id whenever the signed-in user changes (login, switch
+        # account) so a pre-login cookie cannot be fixed onto an account
+        if session.sid is None or session.get('user_id') != session.loaded_user_id:
+            token = secrets.token_urlsafe(32)
+            sid = hash_token(token)
+            self._insert(sid, serializer.dumps(dict(session)), session.get('user_id'), expires_at,
+                         replaces=session.sid)
+            session.sid = sid
+            session.loaded_user_id = session.get('user_id')
+            response.set_cookie(name, token, expires=self.get_expiration_time(app, session),
+                                httponly=httponly, domain=domain, path=path, secure=secure,
+                                samesite=samesite)
+            response.vary.add('Cookie')
+        elif session.modified or session.touched_at is None or \
+                datetime.utcnow() - session.touched_at > timedelta(seconds=self.touch_interval):
+            data = serializer.dumps(dict(session))
+            record = self.cache.get(session.sid) or {'data': data, 'user_id': session.get('user_id')}
+            values = {'expires_at': expires_at}
+            if session.modified:
+                values.update(data=data, user_id=session.get('user_id'))
+            if not self._update(session.sid, record, **values):
+                # Revoked while this request ran: end it rather than resurrect it
+                session.clear()
+                response.delete_cookie(name, domain=domain, path=path, secure=secure,
+                                       samesite=samesite, httponly=httponly)
+                response.vary.add('Cookie')
+                return
+        self._maybe_purge()
+
+
+# ==================== MANAGEMENT ====================
+
+def _interface():
+    interface = current_app.session_interface
+    return interface if isinstance(interface, DatabaseSessionInterface) else None
+
+
+def list_user_sessions(user_id):
+    """Active sessions of a user, most recently used first."""
+    return (UserSession.query
+            .filter(UserSession.user_id == user_id, UserSession.expires_at >= datetime.utcnow())
+            .order_by(UserSession.last_seen_at.desc())
+            .all())
+
+
+def revoke_session(sid, user_id=None):
+    """Delete one session (optionally only if it belongs to user_id); True if found."""
+    query = UserSession.query.filter(UserSession.id == sid)
+    if user_id is not None:
+        query = query.filter(UserSession.user_id == user_id)
+    deleted = query.delete(synchronize_session=False)
+    db.session.commit()
+    interface = _interface()
+    if interface is not None:
+        interface.cache.evict(sid)
+    return bool(deleted)
+
+
+def revoke_user_sessions(user_id, keep_sid=None):
+    """
+    Delete every session of a user (except keep_sid) in the caller's transaction
+
+    Other workers drop their cached copy within SESSION_CACHE_TTL seconds.
+    """
+    query = UserSession.query.filter(UserSession.user_id == user_id)
+    if keep_sid:
+        query = query.filter(UserSession.id != keep_sid)
+    deleted = query.delete(synchronize_session=False)
+    interface = _interface()
+    if interface is not None:
+        interface.cache.evict_where(lambda sid, record: record['user_id'] == user_id)
+    return deleted
+
+
+def purge_expired_sessions():
+    table = UserSession.__table__
+    with db.engine.begin() as conn:
+        return conn.execute(table.delete().where(table.c.expires_at < datetime.utcnow())).rowcount
+
+
+def init_session_store(app):
+    """Switch to server-side sessions unless SESSION_BACKEND=cookie."""
+    if app.config.get('SESSION_BACKEND', 'server') != 'server':
+        return
+    app.session_interface = DatabaseSessionInterface(
+        cache_size=app.config.get('SESSION_CACHE_SIZE', 10000),
+        cache_ttl=app.config.get('SESSION_CACHE_TTL', 10),
+        touch_interval=app.config.get('SESSION_TOUCH_INTERVAL', 300),
+        purge_interval=app.config.get('SESSION_PURGE_INTERVAL', 600)
+    )
+
+
+@click.command('sessions-purge')
+@with_appcontext
+def sessions_purge_command():
+    """Delete expired server-side sessions."""
+    click.echo(f"Purged {purge_expired_sessions()} expired session(s)")
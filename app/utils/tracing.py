@@ -0,0 +1,331 @@
+"""
+ETERNO E-Commerce Platform - Request Tracing
+Span-based tracing with an OpenTelemetry-shaped API (start_as_current_span,
+set_attribute, record_exception, W3C trace/span ids). Finished traces are
+written as JSONL spans and, optionally, shipped to an OTLP/HTTP collector.
+"""
+import contextvars
+import json
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import g, request, session, current_app
+from app.utils.instrumentation import on_query
+from app.utils.query_log import fingerprint
+
+STATUS_UNSET = 'UNSET'
+STATUS_OK = 'OK'
+STATUS_ERROR = 'ERROR'
+
+_current_span = contextvars.ContextVar('eterno_current_span', default=None)
+
+
+class Span:
+    """One timed operation; attribute and status names follow OTel semantics"""
+
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'kind', 'attributes',
+                 'events', 'status', 'status_message', 'start_ns', 'end_ns', '_trace')
+
+    def __init__(self, name, trace, parent=None, kind='INTERNAL', attributes=None):
+        self.name = name
+        self.trace_id = trace['trace_id'] if parent is None else parent.trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.events = []
+        self.status = STATUS_UNSET
+        self.status_message = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self._trace = trace
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes):
+        self.attributes.update(attributes)
+
+    def set_status(self, status, message=None):
+        self.status = status
+        self.status_message = message
+
+    def record_exception(self, exc):
+        self.events.append({
+            'name': 'exception',
+            'time_ns': time.time_ns(),
+            'attributes': {'exception.type': type(exc).__name__, 'exception.message': str(exc)}
+        })
+        self.set_status(STATUS_ERROR, str(exc))
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self._trace['spans'].append(self)
+
+    def to_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_span_id': self.parent_id,
+            'name': self.name,
+            'kind': self.kind,
+            'start_time_unix_nano': self.start_ns,
+            'end_time_unix_nano': self.end_ns,
+            'duration_ms': round((self.end_ns - self.start_ns) / 1e6, 3) if self.end_ns else None,
+            'attributes': self.attributes,
+            'events': self.events,
+            'status': {'code': self.status, 'message': self.status_message}
+        }
+
+
+def get_current_span():
+    return _current_span.get()
+
+
+@contextmanager
+def start_as_current_span(name, attributes=None, kind='INTERNAL'):
+    """
+    Run a block inside a child span of the current span
+
+    Outside a sampled trace this yields None and records nothing, so
+    instrumented helpers cost a single context variable lookup.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    span = Span(name, parent._trace, parent=parent, kind=kind, attributes=attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except Exception as exc:
+        span.record_exception(exc)
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end()
+
+
+def traced(name, **attributes):
+    """Decorator form of start_as_current_span."""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if _current_span.get() is None:
+                return f(*args, **kwargs)
+            with start_as_current_span(name, attributes):
+                return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+
+# ==================== EXPORTERS ====================
+
+class JsonlExporter:
+    """Append finished spans, one JSON object per line"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    def export(self, spans):
+        lines = ''.join(json.dumps(span.to_dict(), default=str) + '\n' for span in spans)
+        with self._lock:
+            with open(self.path, 'a') as fh:
+                fh.write(lines)
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _otlp_attributes(attributes):
+    return [{'key': key, 'value': _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+class OtlpHttpExporter:
+    """
+    Ship spans to an OTLP/HTTP (JSON) collector from a background thread
+
+    Requests never wait on the collector: batches go through a bounded
+    queue and are dropped when it is full.
+    """
+
+    KINDS = {'INTERNAL': 1, 'SERVER': 2, 'CLIENT': 3}
+    STATUS_CODES = {STATUS_UNSET: 0, STATUS_OK: 1, STATUS_ERROR: 2}
+
+    def __init__(self, endpoint, service_name, headers=None, timeout=5):
+        self.url = endpoint.rstrip('/') + '/v1/traces'
+        self.service_name = service_name
+        self.headers = dict(headers or {}, **{'Content-Type': 'application/json'})
+        self.timeout = timeout
+        self._queue = queue.Queue(maxsize=1000)
+        self._thread = threading.Thread(target=self._run, name='eterno-otlp-exporter', daemon=True)
+        self._thread.start()
+
+    def export(self, spans):
+        try:
+            self._queue.put_nowait([span.to_dict() for span in spans])
+        except queue.Full:
+            pass
+
+    def _payload(self, spans):
+        return {'resourceSpans': [{
+            'resource': {'attributes': _otlp_attributes({'service.name': self.service_name})},
+            'scopeSpans': [{
+                'scope': {'name': 'eterno.tracing'},
+                'spans': [{
+                    'traceId': span['trace_id'],
+                    'spanId': span['span_id'],
+                    'parentSpanId': span['parent_span_id'] or '',
+                    'name': span['name'],
+                    'kind': self.KINDS.get(span['kind'], 1),
+                    'startTimeUnixNano': str(span['start_time_unix_nano']),
+                    'endTimeUnixNano': str(span['end_time_unix_nano']),
+                    'attributes': _otlp_attributes(span['attributes']),
+                    'events': [{
+                        'name': e['name'],
+                        'timeUnixNano': str(e['time_ns']),
+                        'attributes': _otlp_attributes(e['attributes'])
+                    } for e in span['events']],
+                    'status': {'code': self.STATUS_CODES[span['status']['code']],
+                               'message': span['status']['message'] or ''}
+                } for span in spans]
+            }]
+        }]}
+
+    def _run(self):
+        import requests
+        http = requests.Session()
+        while True:
+            spans = self._queue.get()
+            try:
+                http.post(self.url, data=json.dumps(self._payload(spans), default=str),
+                          headers=self.headers, timeout=self.timeout)
+            except requests.RequestException:
+                pass
+
+
+# ==================== HOOKS ====================
+
+def _enduser_role(refresh=False):
+    """Role of the signed-in user; refresh drops the per-request identity after a login or logout."""
+    from app.auth.utils import get_current_identity  # auth imports this module for @traced
+    if refresh:
+        g.pop('current_identity', None)
+        g.pop('current_user', None)
+    identity = get_current_identity()
+    return identity.role if identity else 'anonymous'
+
+
+def _before_request():
+    if random.random() >= current_app.config.get('TRACING_SAMPLE_RATE', 1.0):
+        return
+    trace = {'trace_id': os.urandom(16).hex(), 'spans': []}
+    rule = request.url_rule.rule if request.url_rule else request.path
+    span = Span(f'{request.method} {rule}', trace, kind='SERVER', attributes={
+        'http.request.method': request.method,
+        'http.route': rule,
+        'url.path': request.path,
+        'flask.endpoint': request.endpoint,
+        'enduser.role': _enduser_role(),
+        'enduser.id': session.get('user_id')
+    })
+    g.trace_root = (span, _current_span.set(span), session.get('user_id'))
+
+
+def _after_request(response):
+    state = g.get('trace_root')
+    if state is not None:
+        span = state[0]
+        span.set_attribute('http.response.status_code', response.status_code)
+        # Login/logout change the role mid-request
+        span.set_attribute('enduser.role', _enduser_role(refresh=session.get('user_id') != state[2]))
+        span.set_attribute('enduser.id', session.get('user_id'))
+        if response.status_code >= 500:
+            span.set_status(STATUS_ERROR)
+        response.headers['traceparent'] = f'00-{span.trace_id}-{span.span_id}-01'
+    return response
+
+
+def _teardown_request(exc):
+    state = g.pop('trace_root', None)
+    if state is None:
+        return
+    span, token, _ = state
+    if exc is not None:
+        span.record_exception(exc)
+    try:
+        _current_span.reset(token)
+    except ValueError:
+        _current_span.set(None)
+    span.end()
+    for exporter in current_app.extensions.get('eterno_tracing', []):
+        try:
+            exporter.export(span._trace['spans'])
+        except OSError as error:
+            current_app.logger.warning("Trace export failed: %s", error)
+
+
+def _record_query(conn, statement, start_ns, seconds, error):
+    parent = _current_span.get()
+    if parent is None:
+        return
+    span = Span('db.query', parent._trace, parent=parent, kind='CLIENT', attributes={
+        'db.system': conn.dialect.name,
+        'db.statement': fingerprint(statement),
+        'db.operation': statement.lstrip().split(None, 1)[0].upper() if statement.strip() else None
+    })
+    span.start_ns = start_ns
+    if error is not None:
+        span.record_exception(error)
+    span.end()
+
+
+def init_tracing(app, db):
+    """Register request/DB tracing and the configured exporters when TRACING_ENABLED."""
+    if not app.config.get('TRACING_ENABLED'):
+        return
+    exporters = []
+    path = app.config.get('TRACING_JSONL_PATH') or os.path.join(app.instance_path, 'traces', 'spans.jsonl')
+    try:
+        exporters.append(JsonlExporter(path))
+    except OSError as exc:
+        app.logger.warning("Trace JSONL path %s is not writable: %s", path, exc)
+    endpoint = app.config.get('TRACING_OTLP_ENDPOINT')
+    if endpoint:
+        exporters.append(OtlpHttpExporter(
+            endpoint,
+            app.config.get('TRACING_SERVICE_NAME', 'eterno'),
+            headers=_parse_headers(app.config.get('TRACING_OTLP_HEADERS', ''))
+        ))
+    app.extensions['eterno_tracing'] = exporters
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    with app.app_context():
+        for engine in db.engines.values():
+            on_query(engine, _record_query)
+
+
+def _parse_headers(raw):
+    """OTEL_EXPORTER_OTLP_HEADERS style 'key=value,key2=value2'."""
+    headers = {}
+    for pair in (raw or '').split(','):
+        if '=' in pair:
+            key, value = pair.split('=', 1)
+            headers[key.strip()] = value.strip()
+    return headers
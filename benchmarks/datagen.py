@@ -0,0 +1,215 @@
+"""
+ETERNO E-Commerce Platform - Synthetic Data Generator
+Seeded, reproducible catalogue/customer/order data built on the app models.
+
+Usage (inside an app context):
+    from datagen import generate
+    counts = generate(scale='10k', seed=42)
+"""
+import json
+import random
+from datetime import datetime, timedelta
+from werkzeug.security import generate_password_hash
+
+from app import db
+from app.models import User, Product, Review, WishlistItem, Sale, Order, Voucher
+
+# Rows per table for each named scale; the name is roughly the total row count
+SCALES = {
+    '1k': {'products': 60, 'users': 150, 'orders': 400, 'sales': 250, 'reviews': 100, 'wishlist': 60, 'vouchers': 10},
+    '10k': {'products': 600, 'users': 1500, 'orders': 4000, 'sales': 2500, 'reviews': 1000, 'wishlist': 600, 'vouchers': 50},
+    '100k': {'products': 6000, 'users': 15000, 'orders': 40000, 'sales': 25000, 'reviews': 10000, 'wishlist': 6000, 'vouchers': 200},
+}
+
+BENCH_PASSWORD = 'bench-password'
+CATEGORIES = ['Tops', 'Bottoms', 'Outerwear', 'Accessories', 'Footwear', 'Dresses']
+ADJECTIVES = ['Classic', 'Oversized', 'Relaxed', 'Cropped', 'Vintage', 'Essential', 'Heavyweight', 'Linen']
+NOUNS = {
+    'Tops': ['Tee', 'Shirt', 'Polo', 'Hoodie'],
+    'Bottoms': ['Jeans', 'Chinos', 'Shorts', 'Cargo Pants'],
+    'Outerwear': ['Jacket', 'Coat', 'Windbreaker'],
+    'Accessories': ['Cap', 'Tote', 'Belt', 'Socks'],
+    'Footwear': ['Sneakers', 'Loafers', 'Slides'],
+    'Dresses': ['Slip Dress', 'Shirt Dress', 'Midi Dress'],
+}
+IMAGES = [
+    '/static/images/uploads/20260408_094712_shirt2.jpg',
+    '/static/images/uploads/20260408_094821_shirt1.jpg',
+    '/static/images/uploads/20260408_094906_cool2.jpg',
+    '/static/images/uploads/20260408_094940_cool1.jpg',
+    '/static/images/uploads/20260408_095031_jack1.jpg',
+    '/static/images/uploads/20260408_095106_jack2.jpg',
+    '/static/images/uploads/20260408_095146_pants2.jpg',
+    '/static/images/uploads/20260408_095222_pants1.jpg',
+]
+TAGS = ['new', 'limited', 'sale']
+ORDER_STATUSES = ['processing', 'shipped', 'delivered', 'completed', 'cancelled']
+STATUS_WEIGHTS = [20, 15, 25, 35, 5]
+CHUNK_SIZE = 5000
+
+
+def _insert(model, rows):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.session.execute(db.insert(model), rows[start:start + CHUNK_SIZE])
+    db.session.commit()
+
+
+def _timestamp(rng, now, days=365):
+    return now - timedelta(seconds=rng.randint(0, days * 86400))
+
+
+def _line_items(rng, products, max_lines=4):
+    items = []
+    for product in rng.sample(products, k=min(len(products), rng.randint(1, max_lines))):
+        items.append({
+            'product_id': product['id'],
+            'product_name': product['name'],
+            'quantity': rng.choices([1, 2, 3], weights=[70, 22, 8])[0],
+            'price': product['price']
+        })
+    return items
+
+
+def generate(scale='1k', seed=42, now=None):
+    """
+    Populate the current database with synthetic data
+
+    Args:
+        scale: One of SCALES ('1k', '10k', '100k') or a dict of row counts
+        seed: Random seed; the same seed and scale produce identical rows
+        now: Reference time for created_at values (default: utcnow)
+
+    Returns:
+        Dict of inserted row counts per table
+    """
+    counts = SCALES[scale] if isinstance(scale, str) else scale
+    rng = random.Random(seed)
+    now = now or datetime.utcnow()
+    # One shared hash: hashing every synthetic user would dominate seeding time
+    password_hash = generate_password_hash(BENCH_PASSWORD)
+
+    admin = User.query.filter_by(username='admin').first()
+    staff_rows = [
+        {'username': f'cashier{i}', 'email': f'cashier{i}@eterno.test', 'password': password_hash,
+         'role': 'cashier', 'full_name': f'Cashier {i}', 'created_at': _timestamp(rng, now)}
+        for i in range(1, 4)
+    ]
+    customer_rows = [
+        {'username': f'customer{i}', 'email': f'customer{i}@gmail.com', 'password': password_hash,
+         'role': 'customer', 'full_name': f'Customer {i}', 'address': f'{i} Sample Street, Manila',
+         'phone_number': f'0917{i:07d}'[:11], 'default_payment_method': rng.choice(['cod', 'gcash']),
+         'created_at': _timestamp(rng, now)}
+        for i in range(1, counts['users'] + 1)
+    ]
+    _insert(User, staff_rows + customer_rows)
+    cashier_ids = [u.id for u in User.query.filter(User.role == 'cashier').all()] + ([admin.id] if admin else [])
+    customers = [(u.id, u.full_name, u.email, u.address) for u in User.query.filter_by(role='customer').all()]
+
+    product_rows = []
+    for i in range(1, counts['products'] + 1):
+        category = rng.choice(CATEGORIES)
+        images = rng.sample(IMAGES, k=rng.randint(1, 3))
+        product_rows.append({
+            'name': f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS[category])} {i}",
+            'description': f"Synthetic product {i} for benchmarking.",
+            'price': float(rng.randrange(199, 3999, 10)),
+            'stock': rng.choices([0, rng.randint(1, 5), rng.randint(10, 500)], weights=[8, 12, 80])[0],
+            'sold_count': 0,
+            'is_pinned': rng.random() < 0.05,
+            'badge': rng.choice([None, None, None, 'new', 'sale', 'limited']),
+            'tags': ','.join(rng.sample(TAGS, k=rng.randint(0, 2))),
+            'category': category,
+            'image_url': images[0],
+            'image_urls': json.dumps(images),
+            'created_at': _timestamp(rng, now),
+        })
+    _insert(Product, product_rows)
+    products = [{'id': p.id, 'name': p.name, 'price': p.price} for p in Product.query.all()]
+    product_ids = [p['id'] for p in products]
+
+    order_rows = []
+    for _ in range(counts['orders']):
+        user_id, name, email, address = rng.choice(customers)
+        items = _line_items(rng, products)
+        subtotal = sum(item['price'] * item['quantity'] for item in items)
+        shipping_fee = float(rng.randint(50, 100))
+        voucher_discount = rng.choice([0, 0, 0, 100.0])
+        order_rows.append({
+            'user_id': user_id,
+            'customer_name': name,
+            'customer_email': email,
+            'customer_address': address,
+            'subtotal': subtotal,
+            'shipping_fee': shipping_fee,
+            'total_amount': max(0, subtotal - voucher_discount) + shipping_fee,
+            'payment_method': rng.choice(['cod', 'gcash']),
+            'items': json.dumps(items),
+            'status': rng.choices(ORDER_STATUSES, weights=STATUS_WEIGHTS)[0],
+            'voucher_code': 'BENCH100' if voucher_discount else None,
+            'voucher_discount': voucher_discount,
+            'created_at': _timestamp(rng, now),
+        })
+    _insert(Order, order_rows)
+
+    sale_rows = []
+    for _ in range(counts['sales']):
+        items = [
+            {'product_id': item['product_id'], 'quantity': item['quantity'], 'price': item['price']}
+            for item in _line_items(rng, products, max_lines=3)
+        ]
+        subtotal = sum(item['price'] * item['quantity'] for item in items)
+        discount_type = rng.choices([None, 'pwd', 'senior', 'voucher'], weights=[80, 8, 8, 4])[0]
+        discount = round(subtotal * 0.2, 2) if discount_type in ('pwd', 'senior') else (100.0 if discount_type else 0)
+        total = max(0, subtotal - discount)
+        amount_paid = float(-(-total // 100) * 100)
+        sale_rows.append({
+            'user_id': rng.choice(cashier_ids),
+            'total_amount': total,
+            'payment_method': rng.choice(['cash', 'gcash', 'bank_transfer']),
+            'discount_type': discount_type,
+            'discount_amount': discount,
+            'amount_paid': amount_paid,
+            'change_amount': amount_paid - total,
+            'items': json.dumps(items),
+            'created_at': _timestamp(rng, now),
+        })
+    _insert(Sale, sale_rows)
+
+    customer_ids = [c[0] for c in customers]
+    review_rows = [{
+        'product_id': rng.choice(product_ids),
+        'user_id': rng.choice(customer_ids),
+        'rating': rng.choices([1, 2, 3, 4, 5], weights=[3, 5, 12, 35, 45])[0],
+        'comment': 'Synthetic review',
+        'created_at': _timestamp(rng, now),
+    } for _ in range(counts['reviews'])]
+    _insert(Review, review_rows)
+
+    wishlist_pairs = set()
+    while len(wishlist_pairs) < min(counts['wishlist'], len(customer_ids) * len(product_ids)):
+        wishlist_pairs.add((rng.choice(customer_ids), rng.choice(product_ids)))
+    _insert(WishlistItem, [
+        {'user_id': user_id, 'product_id': product_id, 'created_at': _timestamp(rng, now)}
+        for user_id, product_id in sorted(wishlist_pairs)
+    ])
+
+    voucher_rows = [{
+        'code': f'BENCH{i:04d}',
+        'voucher_type': rng.choice(['free_delivery', 'product_discount', 'min_spend_discount']),
+        'discount_value': float(rng.choice([50, 100, 150, 200])),
+        'max_uses': 10 ** 6,
+        'uses': 0,
+        'is_active': True,
+        'min_purchase': float(rng.choice([0, 500, 1000])),
+    } for i in range(counts['vouchers'])]
+    _insert(Voucher, voucher_rows)
+
+    return {
+        'users': len(staff_rows) + len(customer_rows),
+        'products': len(product_rows),
+        'orders': len(order_rows),
+        'sales': len(sale_rows),
+        'reviews': len(review_rows),
+        'wishlist': len(wishlist_pairs),
+        'vouchers': len(voucher_rows),
+    }
@@ -0,0 +1,93 @@
+"""
+ETERNO E-Commerce Platform - Stand-in reCAPTCHA Verifier
+Local siteverify endpoint for tests and load tests, so registration can run
+without Google. Point the app at it with
+RECAPTCHA_VERIFY_URL=http://127.0.0.1:8765/siteverify and any
+RECAPTCHA_SECRET_KEY.
+
+Tokens starting with 'pass' verify; anything else fails with
+invalid-input-response. A token verifies only once, as with Google
+(timeout-or-duplicate afterwards). --delay and --error-rate simulate a
+slow or failing verifier for exercising timeouts and the circuit breaker.
+
+Usage:
+    python benchmarks/fake_captcha_server.py --port 8765 --delay 0.2 --error-rate 0.1
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class VerifierHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real endpoint
+    disable_nagle_algorithm = True
+    delay = 0.0
+    error_rate = 0.0
+    used = set()
+    lock = threading.Lock()
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        form = parse_qs(self.rfile.read(length).decode('utf-8'))
+        if self.delay:
+            time.sleep(self.delay)
+        if self.error_rate and random.random() < self.error_rate:
+            self._reply(503, {'error': 'unavailable'})
+            return
+        secret = (form.get('secret') or [''])[0]
+        token = (form.get('response') or [''])[0]
+        if not secret:
+            self._reply(200, {'success': False, 'error-codes': ['missing-input-secret']})
+            return
+        with self.lock:
+            duplicate = token in self.used
+            self.used.add(token)
+        if duplicate:
+            self._reply(200, {'success': False, 'error-codes': ['timeout-or-duplicate']})
+        elif token.startswith('pass'):
+            self._reply(200, {'success': True, 'hostname': 'localhost'})
+        else:
+            self._reply(200, {'success': False, 'error-codes': ['invalid-input-response']})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host='127.0.0.1', port=8765, delay=0.0, error_rate=0.0):
+    """Start the server in a daemon thread and return it (call .shutdown() to stop)."""
+    handler = type('Handler', (VerifierHandler,), {'delay': delay, 'error_rate': error_rate, 'used': set()})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', type=float, default=0.0, help='Seconds to wait before answering')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with 503')
+    args = parser.parse_args()
+    server = serve(args.host, args.port, args.delay, args.error_rate)
+    print(f"Fake siteverify on http://{args.host}:{server.server_port}/siteverify")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,363 @@
+"""
+ETERNO E-Commerce Platform - Load Test Harness
+Starts gunicorn serving run:app against a seeded database and drives
+concurrent storefront, checkout, POS and admin traffic with asyncio + httpx.
+Runs fully offline against SQLite or a local Postgres.
+
+Scenarios (one virtual user = one cookie jar looping its scenario):
+    browse    anonymous GET / and /shop
+    shopper   customer login, /cart/add -> /cart/mini -> /checkout
+    cashier   cashier login, bursts of /admin/sales/create
+    admin     admin login, polls /admin/dashboard and /admin/revenue
+
+Usage:
+    python benchmarks/loadtest.py --duration 30 --workers 4 \\
+        --browse 20 --shoppers 5 --cashiers 2 --admins 1
+    python benchmarks/loadtest.py --database-url postgresql://localhost/eterno_load
+    python benchmarks/loadtest.py --base-url http://127.0.0.1:8000 --no-seed
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional benchmark dependency
+    httpx = None
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+LOAD_STOCK = 10 ** 7
+ADMIN_CREDENTIALS = ('admin', 'admin123')
+
+
+# ==================== DATABASE ====================
+
+def seed_database(scale, seed, product_count):
+    """Seed the TEST_DATABASE_URL database and return products for the scenarios."""
+    sys.path.insert(0, ROOT_DIR)
+    sys.path.insert(0, BENCH_DIR)
+    from app import create_app, db
+    from app.models import Product
+    from datagen import generate
+
+    app = create_app('testing')
+    with app.app_context():
+        counts = generate(scale=scale, seed=seed)
+        products = Product.query.order_by(Product.id).limit(product_count).all()
+        # Checkouts and POS sales must never run out of stock mid-run
+        for product in products:
+            product.stock = LOAD_STOCK
+        db.session.commit()
+        return {
+            'rows': counts,
+            'products': [{'id': p.id, 'price': p.price} for p in products]
+        }
+
+
+def _seed_in_subprocess(env, args):
+    output = subprocess.check_output(
+        [sys.executable, __file__, '--seed-only', '--scale', args.scale, '--seed', str(args.seed)],
+        env=env, cwd=ROOT_DIR, text=True
+    )
+    return json.loads(output.strip().splitlines()[-1])
+
+
+# ==================== SERVER ====================
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(env, workers, threads, port):
+    command = [
+        sys.executable, '-m', 'gunicorn', 'run:app',
+        '--bind', f'127.0.0.1:{port}',
+        '--workers', str(workers),
+        '--threads', str(threads),
+        '--log-level', 'warning',
+    ]
+    return subprocess.Popen(command, env=env, cwd=ROOT_DIR)
+
+
+def wait_until_ready(base_url, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError('gunicorn exited before becoming ready')
+        try:
+            if httpx.get(f'{base_url}/', timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f'Server at {base_url} not ready after {timeout}s')
+
+
+# ==================== STATS ====================
+
+def _percentile(ordered, pct):
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class LoadStats:
+    """Latencies and error counts per request name"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self.error_samples = {}
+
+    def record(self, name, seconds, ok, detail=None):
+        self.latencies.setdefault(name, []).append(seconds)
+        if not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+            samples = self.error_samples.setdefault(name, [])
+            if detail and len(samples) < 5:
+                samples.append(detail)
+
+    def summary(self, elapsed):
+        report = {}
+        total = errors = 0
+        for name in sorted(self.latencies):
+            ordered = sorted(self.latencies[name])
+            count = len(ordered)
+            failed = self.errors.get(name, 0)
+            total += count
+            errors += failed
+            report[name] = {
+                'requests': count,
+                'errors': failed,
+                'error_rate': round(failed / count, 4),
+                'rps': round(count / elapsed, 2),
+                'mean_ms': round(sum(ordered) / count * 1000, 2),
+                'p50_ms': round(_percentile(ordered, 50) * 1000, 2),
+                'p95_ms': round(_percentile(ordered, 95) * 1000, 2),
+                'p99_ms': round(_percentile(ordered, 99) * 1000, 2),
+                'max_ms': round(ordered[-1] * 1000, 2),
+            }
+            if self.error_samples.get(name):
+                report[name]['error_samples'] = self.error_samples[name]
+        return {
+            'total_requests': total,
+            'total_errors': errors,
+            'error_rate': round(errors / total, 4) if total else 0.0,
+            'rps': round(total / elapsed, 2),
+            'requests': report,
+        }
+
+
+async def _call(client, stats, name, method, url, expect=(200,), **kwargs):
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError as exc:
+        stats.record(name, time.perf_counter() - started, False, f'{type(exc).__name__}: {exc}')
+        return None
+    ok = response.status_code in expect
+    stats.record(name, time.perf_counter() - started, ok, None if ok else f'{response.status_code}: {response.text[:120]}')
+    return response
+
+
+async def _login(client, stats, username, password):
+    response = await _call(
+        client, stats, 'login', 'POST', '/auth/login', expect=(302,),
+        data={'username': username, 'password': password}
+    )
+    return response is not None and response.status_code == 302
+
+
+# ==================== SCENARIOS ====================
+
+async def browse(client, stats, ctx, index):
+    await _call(client, stats, 'GET /', 'GET', '/')
+    await _call(client, stats, 'GET /shop', 'GET', '/shop')
+
+
+async def shopper(client, stats, ctx, index):
+    product = ctx['rng'].choice(ctx['products'])
+    await _call(client, stats, 'POST /cart/add', 'POST', '/cart/add',
+                json={'product_id': product['id'], 'quantity': ctx['rng'].randint(1, 2)})
+    await _call(client, stats, 'GET /cart/mini', 'GET', '/cart/mini')
+    await _call(client, stats, 'POST /checkout', 'POST', '/checkout', json={
+        'payment_method': 'cod',
+        'customer_address': f'{index} Load Street, Manila',
+        'delivery_fee': 60
+    })
+
+
+async def cashier(client, stats, ctx, index):
+    for _ in range(ctx['burst']):
+        products = ctx['rng'].sample(ctx['products'], k=min(3, len(ctx['products'])))
+        await _call(client, stats, 'POST /admin/sales/create', 'POST', '/admin/sales/create', json={
+            'items': [{'product_id': p['id'], 'quantity': 1, 'price': p['price']} for p in products],
+            'payment_method': 'cash'
+        })
+
+
+async def admin(client, stats, ctx, index):
+    await _call(client, stats, 'GET /admin/dashboard', 'GET', '/admin/dashboard')
+    await _call(client, stats, 'GET /admin/revenue', 'GET', '/admin/revenue')
+
+
+SCENARIOS = {
+    'browse': (browse, None),
+    'shopper': (shopper, lambda i: (f'customer{i}', 'bench-password')),
+    'cashier': (cashier, lambda i: (f'cashier{(i - 1) % 3 + 1}', 'bench-password')),
+    'admin': (admin, lambda i: ADMIN_CREDENTIALS),
+}
+
+
+async def virtual_user(base_url, scenario, index, ctx, stats, deadline, think):
+    run_once, credentials = SCENARIOS[scenario]
+    iterations = 0
+    async with httpx.AsyncClient(base_url=base_url, timeout=30, follow_redirects=False) as client:
+        # A failed login is recorded under 'login' and retried, so the
+        # virtual user keeps its share of the load instead of vanishing
+        while credentials and not await _login(client, stats, *credentials(index)):
+            if time.monotonic() >= deadline:
+                return iterations
+            await asyncio.sleep(1)
+        while time.monotonic() < deadline:
+            await run_once(client, stats, ctx, index)
+            iterations += 1
+            if think:
+                await asyncio.sleep(ctx['rng'].uniform(0, think * 2))
+    return iterations
+
+
+async def run_load(base_url, users, ctx, duration, think):
+    stats = LoadStats()
+    deadline = time.monotonic() + duration
+    tasks = []
+    for scenario, count in users.items():
+        for index in range(1, count + 1):
+            tasks.append((scenario, asyncio.create_task(
+                virtual_user(base_url, scenario, index, ctx, stats, deadline, think)
+            )))
+    started = time.monotonic()
+    iterations = {}
+    for scenario, task in tasks:
+        iterations[scenario] = iterations.get(scenario, 0) + await task
+    elapsed = time.monotonic() - started
+    report = stats.summary(elapsed)
+    report['elapsed_seconds'] = round(elapsed, 2)
+    report['scenario_iterations'] = iterations
+    return report
+
+
+# ==================== CLI ====================
+
+def _print_table(report):
+    print(f"{'request':<28}{'reqs':>8}{'err%':>8}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}", file=sys.stderr)
+    for name, row in report['requests'].items():
+        print(
+            f"{name:<28}{row['requests']:>8}{row['error_rate'] * 100:>7.2f}%{row['rps']:>9.1f}"
+            f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}",
+            file=sys.stderr
+        )
+    print(
+        f"total {report['total_requests']} requests, {report['rps']} req/s, "
+        f"error rate {report['error_rate'] * 100:.2f}% over {report['elapsed_seconds']}s",
+        file=sys.stderr
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=30, help='Seconds of load per run')
+    parser.add_argument('--browse', type=int, default=20, help='Anonymous browsing users')
+    parser.add_argument('--shoppers', type=int, default=5, help='Logged-in checkout users')
+    parser.add_argument('--cashiers', type=int, default=2, help='POS users')
+    parser.add_argument('--admins', type=int, default=1, help='Dashboard polling users')
+    parser.add_argument('--burst', type=int, default=5, help='Sales per cashier burst')
+    parser.add_argument('--think', type=float, default=0.0, help='Mean think time between iterations (s)')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=1, help='gunicorn threads per worker')
+    parser.add_argument('--database-url', help='Database to seed and serve (default: temporary SQLite file)')
+    parser.add_argument('--scale', default='1k', help='Synthetic data scale for seeding (see datagen.SCALES)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--products', type=int, default=50, help='Products used by the write scenarios')
+    parser.add_argument('--base-url', help='Target an already running server instead of starting gunicorn')
+    parser.add_argument('--no-seed', action='store_true', help='Skip seeding (database already populated)')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    parser.add_argument('--seed-only', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.seed_only:
+        print(json.dumps(seed_database(args.scale, args.seed, args.products)))
+        return
+    if httpx is None:
+        parser.error('httpx is required: pip install -r benchmarks/requirements.txt')
+
+    tmp = tempfile.TemporaryDirectory()
+    env = dict(os.environ)
+    env['FLASK_CONFIG'] = 'testing'
+    env['TEST_DATABASE_URL'] = args.database_url or f"sqlite:///{os.path.join(tmp.name, 'load.db')}"
+    env.setdefault('METRICS_DIR', os.path.join(tmp.name, 'metrics'))
+    # Every virtual user comes from 127.0.0.1, so per-IP login limits would
+    # reject most of them and measure the limiter instead of the app
+    env['RATE_LIMIT_ENABLED'] = 'false'
+
+    products = []
+    seeded = None
+    if not args.no_seed:
+        seeded = _seed_in_subprocess(env, args)
+        products = seeded['products']
+    elif args.shoppers or args.cashiers:
+        parser.error('--no-seed requires a products list; use --shoppers 0 --cashiers 0 or seed')
+
+    process = None
+    base_url = args.base_url
+    if not base_url:
+        port = _free_port()
+        base_url = f'http://127.0.0.1:{port}'
+        process = start_server(env, args.workers, args.threads, port)
+    try:
+        wait_until_ready(base_url, process)
+        users = {'browse': args.browse, 'shopper': args.shoppers, 'cashier': args.cashiers, 'admin': args.admins}
+        ctx = {'products': products, 'burst': args.burst, 'rng': random.Random(args.seed)}
+        report = asyncio.run(run_load(base_url, users, ctx, args.duration, args.think))
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        tmp.cleanup()
+
+    report['meta'] = {
+        'generated_at': datetime.utcnow().isoformat() + 'Z',
+        'base_url': base_url,
+        'database': 'postgresql' if env['TEST_DATABASE_URL'].startswith('postgresql') else 'sqlite',
+        'workers': args.workers,
+        'threads': args.threads,
+        'users': {'browse': args.browse, 'shopper': args.shoppers, 'cashier': args.cashiers, 'admin': args.admins},
+        'duration': args.duration,
+        'rows': seeded['rows'] if seeded else None,
+    }
+    _print_table(report)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(text)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+ETERNO E-Commerce Platform - OTP Validation Benchmark
+Times generate_otp / validate_otp against an otp_token table holding
+millions of historical (expired and used) rows, and optionally the batched
+purge that clears them.
+
+Runs on a temporary SQLite file unless TEST_DATABASE_URL points at a
+scratch database (its otp_token and user tables are filled with bench rows).
+
+Usage:
+    python benchmarks/otp_validate.py --rows 10000000 --lookups 2000
+    python benchmarks/otp_validate.py --rows 1000000 --purge
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CHUNK_SIZE = 20000
+PURPOSES = ('reset', 'payment')
+
+
+def _percentiles(samples):
+    ms = sorted(s * 1000 for s in samples)
+    return {
+        'count': len(ms),
+        'mean_ms': round(statistics.fmean(ms), 3),
+        'p50_ms': round(ms[len(ms) // 2], 3),
+        'p95_ms': round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3),
+        'p99_ms': round(ms[min(len(ms) - 1, int(len(ms) * 0.99))], 3),
+    }
+
+
+def _seed(db, User, OtpToken, rows, users, rng):
+    """Insert `users` users and `rows` expired tokens spread across them; returns the user ids."""
+    base = db.session.execute(db.select(db.func.max(User.id))).scalar() or 0
+    user_ids = range(base + 1, base + users + 1)
+    db.session.execute(db.insert(User), [
+        {'id': i, 'username': f'otpbench{i}', 'email': f'otpbench{i}@example.com',
+         'password': 'x', 'role': 'customer'}
+        for i in user_ids
+    ])
+    db.session.commit()
+    now = datetime.utcnow()
+    digest = '0' * 64  # historical codes never match; their content does not matter
+    for start in range(0, rows, CHUNK_SIZE):
+        batch = []
+        for _ in range(min(CHUNK_SIZE, rows - start)):
+            created = now - timedelta(seconds=rng.randint(3600, 365 * 86400))
+            batch.append({
+                'user_id': rng.choice(user_ids), 'code': digest, 'purpose': rng.choice(PURPOSES),
+                'expires_at': created + timedelta(minutes=10), 'used': rng.random() < 0.9,
+                'created_at': created
+            })
+        db.session.execute(db.insert(OtpToken), batch)
+        db.session.commit()
+    return user_ids
+
+
+def run(rows, users, lookups, purge):
+    if not os.environ.get('TEST_DATABASE_URL'):
+        tmp = tempfile.mkdtemp(prefix='otp-bench-')
+        os.environ['TEST_DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    from app import create_app, db
+    from app.auth.utils import generate_otp, validate_otp
+    from app.models import OtpToken, User
+    from app.utils.otp import purge_otp_tokens
+
+    app = create_app('testing')
+    app.config.update(RATE_LIMIT_ENABLED=False, OTP_PURGE_INTERVAL=10 ** 9)
+    rng = random.Random(42)
+    report = {'rows': rows, 'users': users, 'database': os.environ['TEST_DATABASE_URL'].split(':', 1)[0]}
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        user_ids = _seed(db, User, OtpToken, rows, users, rng)
+        report['seed_seconds'] = round(time.perf_counter() - started, 1)
+
+        generate, hit, miss = [], [], []
+        for _ in range(lookups):
+            user_id, purpose = rng.choice(user_ids), rng.choice(PURPOSES)
+            started = time.perf_counter()
+            code = generate_otp(user_id, purpose)
+            generate.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            validate_otp(user_id, 'ZZZZZZ', purpose)
+            miss.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            if not validate_otp(user_id, code, purpose):
+                raise RuntimeError('Fresh OTP did not validate')
+            hit.append(time.perf_counter() - started)
+        report['generate'] = _percentiles(generate)
+        report['validate_hit'] = _percentiles(hit)
+        report['validate_miss'] = _percentiles(miss)
+
+        if purge:
+            started = time.perf_counter()
+            deleted = purge_otp_tokens()
+            elapsed = time.perf_counter() - started
+            report['purge'] = {'deleted': deleted, 'seconds': round(elapsed, 1),
+                               'rows_per_sec': round(deleted / elapsed) if elapsed else None}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10_000_000, help='Historical otp_token rows')
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--lookups', type=int, default=1000)
+    parser.add_argument('--purge', action='store_true', help='Also time purging the expired rows')
+    parser.add_argument('--output', help='Write JSON results to this file')
+    args = parser.parse_args()
+
+    text = json.dumps(run(args.rows, args.users, args.lookups, args.purge), indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+ETERNO E-Commerce Platform - Password Hashing Benchmark
+Measures logins/second per core for each password hashing algorithm and
+cost setting, to pick PASSWORD_HASH_METHOD and its cost for a deployment.
+
+A login costs one verify, so logins/sec/core is 1 / median verify time.
+With --threads > 1 the same verifies also run concurrently to show how far
+throughput scales on this machine (the hashes release the GIL).
+
+Usage:
+    python benchmarks/password_hashing.py --rounds 10 --threads 4
+    python benchmarks/password_hashing.py --settings scrypt:16384,bcrypt:12
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.utils.passwords import hash_settings, compute_hash, check_hash  # noqa: E402
+
+PASSWORD = 'correct horse battery staple'
+DEFAULT_SETTINGS = (
+    'scrypt:16384', 'scrypt:32768', 'scrypt:65536',
+    'pbkdf2:200000', 'pbkdf2:600000', 'pbkdf2:1000000',
+    'bcrypt:10', 'bcrypt:12', 'bcrypt:13',
+)
+
+
+def _config(setting):
+    """'scrypt:32768' / 'pbkdf2:600000' / 'bcrypt:12' -> PASSWORD_* config keys."""
+    method, _, cost = setting.partition(':')
+    config = {'PASSWORD_HASH_METHOD': method}
+    if cost:
+        key = {'scrypt': 'PASSWORD_SCRYPT_N', 'pbkdf2': 'PASSWORD_PBKDF2_ITERATIONS',
+               'bcrypt': 'PASSWORD_BCRYPT_ROUNDS'}[method]
+        config[key] = int(cost)
+    return config
+
+
+def _median_ms(fn, rounds):
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def run(setting, rounds, threads):
+    settings = hash_settings(_config(setting))
+    password_hash = compute_hash(PASSWORD, settings)
+    assert check_hash(password_hash, PASSWORD)
+    hash_ms = _median_ms(lambda: compute_hash(PASSWORD, settings), rounds)
+    verify_ms = _median_ms(lambda: check_hash(password_hash, PASSWORD), rounds)
+    result = {
+        'setting': setting,
+        'params': str(settings[1]),
+        'hash_ms': round(hash_ms, 2),
+        'verify_ms': round(verify_ms, 2),
+        'logins_per_sec_per_core': round(1000 / verify_ms, 1),
+    }
+    if threads > 1:
+        total = rounds * threads
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            started = time.perf_counter()
+            list(pool.map(lambda _: check_hash(password_hash, PASSWORD), range(total)))
+            elapsed = time.perf_counter() - started
+        result[f'logins_per_sec_{threads}_threads'] = round(total / elapsed, 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--settings', default=','.join(DEFAULT_SETTINGS),
+                        help='Comma-separated method:cost list')
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--threads', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--output', help='Write JSON results to this file')
+    args = parser.parse_args()
+
+    report = {
+        'cpu_count': os.cpu_count(),
+        'results': [run(setting, args.rounds, args.threads) for setting in args.settings.split(',') if setting]
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(text)
+
+
+if __name__ == '__main__':
+    main()
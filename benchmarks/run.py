@@ -0,0 +1,171 @@
+"""
+ETERNO E-Commerce Platform - Route Benchmarks
+Times hot routes through the Flask test client against seeded databases at
+several scales and emits JSON for comparison across commits.
+
+Each scale runs in its own subprocess with a fresh SQLite database (or
+TEST_DATABASE_URL when pointing at a scratch Postgres).
+
+Usage:
+    python benchmarks/run.py --scales 1k,10k --repeat 10 --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+
+
+def _stats(samples):
+    """pytest-benchmark style summary in milliseconds."""
+    ordered = sorted(samples)
+    ms = [s * 1000 for s in ordered]
+    return {
+        'rounds': len(ms),
+        'min_ms': round(ms[0], 3),
+        'max_ms': round(ms[-1], 3),
+        'mean_ms': round(statistics.fmean(ms), 3),
+        'median_ms': round(statistics.median(ms), 3),
+        'stddev_ms': round(statistics.stdev(ms), 3) if len(ms) > 1 else 0.0,
+        'p95_ms': round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3),
+    }
+
+
+def _login(client, username, password):
+    response = client.post('/auth/login', data={'username': username, 'password': password})
+    if response.status_code != 302:
+        raise RuntimeError(f'Login failed for {username}')
+
+
+def _time(fn, repeat, setup=None, expect=200):
+    samples = []
+    for i in range(repeat + 1):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        response = fn()
+        elapsed = time.perf_counter() - started
+        if response.status_code != expect:
+            raise RuntimeError(f'Unexpected status {response.status_code}: {response.get_data(as_text=True)[:200]}')
+        if i:  # first round is warm-up
+            samples.append(elapsed)
+    return _stats(samples)
+
+
+def run_scale(scale, repeat, seed):
+    """Seed one database and time every target route (runs in a subprocess)."""
+    sys.path.insert(0, ROOT_DIR)
+    sys.path.insert(0, BENCH_DIR)
+    from app import create_app, db
+    from app.models import Product
+    from datagen import generate, BENCH_PASSWORD
+
+    app = create_app('testing')
+    with app.app_context():
+        seed_started = time.perf_counter()
+        counts = generate(scale=scale, seed=seed)
+        seed_seconds = time.perf_counter() - seed_started
+        product = Product.query.filter(Product.stock > 100).order_by(Product.id).first()
+        product_id, price = product.id, product.price
+        db.session.remove()
+
+    anon = app.test_client()
+    customer = app.test_client()
+    admin = app.test_client()
+    _login(customer, 'customer1', BENCH_PASSWORD)
+    _login(admin, 'admin', 'admin123')
+
+    def add_to_cart():
+        customer.post('/cart/add', json={'product_id': product_id, 'quantity': 1})
+
+    targets = {
+        'index': lambda: _time(lambda: anon.get('/'), repeat),
+        'shop': lambda: _time(lambda: anon.get('/shop'), repeat),
+        'get_orders': lambda: _time(lambda: admin.get('/admin/orders'), repeat),
+        'get_orders_limit10': lambda: _time(lambda: admin.get('/admin/orders?limit=10'), repeat),
+        'dashboard': lambda: _time(lambda: admin.get('/admin/dashboard'), repeat),
+        'get_revenue_history': lambda: _time(lambda: admin.get('/admin/revenue/history?months=12'), repeat),
+        'checkout': lambda: _time(
+            lambda: customer.post('/checkout', json={
+                'payment_method': 'cod', 'customer_address': '1 Sample Street, Manila', 'delivery_fee': 60
+            }),
+            repeat, setup=add_to_cart
+        ),
+        'create_sale': lambda: _time(
+            lambda: admin.post('/admin/sales/create', json={
+                'items': [{'product_id': product_id, 'quantity': 1, 'price': price}],
+                'payment_method': 'cash'
+            }),
+            repeat
+        ),
+    }
+    results = []
+    for name, target in targets.items():
+        results.append({'scale': scale, 'name': name, **target()})
+    return {'scale': scale, 'rows': counts, 'seed_seconds': round(seed_seconds, 2), 'results': results}
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ROOT_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', default='1k,10k', help='Comma-separated scales: 1k, 10k, 100k')
+    parser.add_argument('--repeat', type=int, default=10, help='Timed rounds per route (after one warm-up)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write JSON results to this file')
+    parser.add_argument('--single-scale', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single_scale:
+        print(json.dumps(run_scale(args.single_scale, args.repeat, args.seed)))
+        return
+
+    runs = []
+    for scale in [s.strip() for s in args.scales.split(',') if s.strip()]:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ)
+            env.setdefault('TEST_DATABASE_URL', f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            env.setdefault('METRICS_DIR', os.path.join(tmp, 'metrics'))
+            output = subprocess.check_output(
+                [sys.executable, __file__, '--single-scale', scale, '--repeat', str(args.repeat), '--seed', str(args.seed)],
+                env=env, cwd=tmp, text=True
+            )
+        run = json.loads(output.strip().splitlines()[-1])
+        runs.append(run)
+        for result in run['results']:
+            print(f"{scale:>5} {result['name']:<22} median {result['median_ms']:>9.2f} ms  p95 {result['p95_ms']:>9.2f} ms", file=sys.stderr)
+
+    report = {
+        'meta': {
+            'git_revision': _git_revision(),
+            'generated_at': datetime.utcnow().isoformat() + 'Z',
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'seed': args.seed,
+        },
+        'runs': runs,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(text)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
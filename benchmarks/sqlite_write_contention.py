@@ -0,0 +1,176 @@
+"""
+ETERNO E-Commerce Platform - SQLite Write Contention Benchmark
+Compares checkout-style write throughput with the default SQLite settings
+against the tuned engine profile (WAL + PRAGMAs + BEGIN IMMEDIATE).
+
+Each worker process mimics one gunicorn worker running `checkout`: read the
+cart and product stock, then decrement stock, insert an order and clear the
+cart in a single transaction.
+
+Usage:
+    python benchmarks/sqlite_write_contention.py --workers 8 --seconds 5
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config  # noqa: E402
+
+PRODUCTS = 200
+
+
+def _connect(path, tuned):
+    if tuned:
+        conn = sqlite3.connect(path, isolation_level=None)
+        for name, value in Config.SQLITE_PRAGMAS.items():
+            conn.execute(f"PRAGMA {name}={value}")
+    else:
+        # Python's sqlite3 defaults: rollback journal, deferred transactions, 5s timeout
+        conn = sqlite3.connect(path)
+    return conn
+
+
+def _setup(path):
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE product (id INTEGER PRIMARY KEY, name TEXT, price FLOAT, stock INTEGER, sold_count INTEGER DEFAULT 0);
+        CREATE TABLE cart (id INTEGER PRIMARY KEY, user_id INTEGER, product_id INTEGER, quantity INTEGER);
+        CREATE INDEX ix_cart_user_id ON cart (user_id);
+        CREATE TABLE "order" (id INTEGER PRIMARY KEY, user_id INTEGER, total_amount FLOAT, items TEXT, created_at TIMESTAMP);
+    """)
+    conn.executemany(
+        "INSERT INTO product (id, name, price, stock) VALUES (?, ?, ?, ?)",
+        [(i, f"Product {i}", 100.0 + i, 10 ** 9) for i in range(1, PRODUCTS + 1)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def _fill_cart(conn, user_id, rng):
+    """Stand-in for the add-to-cart requests preceding a checkout."""
+    conn.executemany(
+        "INSERT INTO cart (user_id, product_id, quantity) VALUES (?, ?, ?)",
+        [(user_id, rng.randint(1, PRODUCTS), rng.randint(1, 3)) for _ in range(3)]
+    )
+
+
+def _checkout(conn, user_id, tuned):
+    # Like the route, the transaction starts with reads and only then writes:
+    # a deferred BEGIN must upgrade its read lock, which fails under contention.
+    conn.execute("BEGIN IMMEDIATE" if tuned else "BEGIN")
+    try:
+        rows = conn.execute(
+            "SELECT cart.product_id, cart.quantity, product.price, product.stock "
+            "FROM cart JOIN product ON product.id = cart.product_id WHERE cart.user_id = ?",
+            (user_id,)
+        ).fetchall()
+        total = 0.0
+        for product_id, quantity, price, _stock in rows:
+            conn.execute(
+                "UPDATE product SET stock = stock - ?, sold_count = sold_count + ? WHERE id = ?",
+                (quantity, quantity, product_id)
+            )
+            total += price * quantity
+        conn.execute(
+            "INSERT INTO \"order\" (user_id, total_amount, items, created_at) VALUES (?, ?, ?, ?)",
+            (user_id, total, json.dumps(rows), time.time())
+        )
+        conn.execute("DELETE FROM cart WHERE user_id = ?", (user_id,))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _worker(path, tuned, seconds, worker_id, results):
+    rng = random.Random(worker_id)
+    conn = _connect(path, tuned)
+    if not tuned:
+        # Match the app's default driver behaviour: explicit BEGIN without a write lock
+        conn.isolation_level = None
+    done = errors = 0
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        user_id = worker_id * 1_000_000 + done
+        try:
+            _fill_cart(conn, user_id, rng)
+        except sqlite3.OperationalError:
+            errors += 1
+            continue
+        started = time.perf_counter()
+        try:
+            _checkout(conn, user_id, tuned)
+            done += 1
+            latencies.append(time.perf_counter() - started)
+        except sqlite3.OperationalError:
+            errors += 1
+    conn.close()
+    results.put({'done': done, 'errors': errors, 'latencies': latencies})
+
+
+def run(mode, workers, seconds):
+    tuned = mode == 'tuned'
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        _setup(path)
+        if tuned:
+            # journal_mode=WAL is persistent; set it once before workers start
+            conn = sqlite3.connect(path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.close()
+        results = multiprocessing.Queue()
+        procs = [
+            multiprocessing.Process(target=_worker, args=(path, tuned, seconds, i + 1, results))
+            for i in range(workers)
+        ]
+        for proc in procs:
+            proc.start()
+        collected = [results.get() for _ in procs]
+        for proc in procs:
+            proc.join()
+    latencies = sorted(lat for r in collected for lat in r['latencies'])
+    done = sum(r['done'] for r in collected)
+
+    def pct(p):
+        if not latencies:
+            return None
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 2)
+
+    return {
+        'mode': mode,
+        'workers': workers,
+        'seconds': seconds,
+        'checkouts': done,
+        'checkouts_per_sec': round(done / seconds, 1),
+        'locked_errors': sum(r['errors'] for r in collected),
+        'p50_ms': pct(0.50),
+        'p95_ms': pct(0.95),
+        'p99_ms': pct(0.99)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--output', help='Write JSON results to this file')
+    args = parser.parse_args()
+
+    report = [run(mode, args.workers, args.seconds) for mode in ('default', 'tuned')]
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(text)
+
+
+if __name__ == '__main__':
+    main()
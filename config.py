@@ -26,15 +26,163 @@ class Config:
     instance_dir = os.path.join(basedir, 'instance')
     SQLALCHEMY_DATABASE_URI = _normalize_database_url(os.environ.get('DATABASE_URL')) or f'sqlite:///{os.path.join(instance_dir, "eterno.db")}'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Optional read replica: reports and storefront listings read from it
+    DATABASE_REPLICA_URL = _normalize_database_url(os.environ.get('DATABASE_REPLICA_URL'))
+    SQLALCHEMY_BINDS = {'replica': DATABASE_REPLICA_URL} if DATABASE_REPLICA_URL else {}
+    # After a user's own write, keep their reads on the primary this long
+    REPLICA_READ_YOUR_WRITES_SECONDS = int(os.environ.get('REPLICA_READ_YOUR_WRITES_SECONDS', 10))
     SQLALCHEMY_ENGINE_OPTIONS = {
         'pool_pre_ping': True
     }
+    # Postgres connection pool profile: default, server (long-lived workers)
+    # or serverless (one connection per invocation behind an external pooler)
+    DB_POOL_PROFILE = os.environ.get('DB_POOL_PROFILE', 'default')
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 10))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'false').lower() == 'true'
+    DB_SERVERLESS_POOL = os.environ.get('DB_SERVERLESS_POOL', 'null')  # null or single
+    DB_QUERY_CACHE_SIZE = int(os.environ.get('DB_QUERY_CACHE_SIZE', 1200))
+    
+    # SQLite engine profile, applied to every new connection (ignored on Postgres)
+    SQLITE_TUNING = os.environ.get('SQLITE_TUNING', 'true').lower() == 'true'
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'mmap_size': 256 * 1024 * 1024,  # 256MB
+        'cache_size': -20000,  # ~20MB (negative = KiB)
+        'temp_store': 'MEMORY'
+    }
+    # Apply pending schema migrations at boot (otherwise run `flask db-upgrade` on deploy)
+    AUTO_MIGRATE = os.environ.get('AUTO_MIGRATE', 'true').lower() == 'true'
+    
+    # Request metrics (GET /metrics, Prometheus text format)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+    METRICS_DIR = os.environ.get('METRICS_DIR')  # default: <instance>/metrics
+    METRICS_FLUSH_INTERVAL = 5  # seconds between per-worker snapshot writes
+    
+    # On-demand profiling: admins add ?_profile=1|cprofile|sample (or the
+    # X-Eterno-Profile header) to a request; results listed at /admin/profiles
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() == 'true'
+    PROFILING_DIR = os.environ.get('PROFILING_DIR')  # default: <instance>/profiles
+    PROFILING_DEFAULT_MODE = os.environ.get('PROFILING_DEFAULT_MODE', 'cprofile')
+    PROFILING_SAMPLE_INTERVAL = float(os.environ.get('PROFILING_SAMPLE_INTERVAL', 0.001))
+    PROFILING_MIN_INTERVAL = int(os.environ.get('PROFILING_MIN_INTERVAL', 10))  # seconds per endpoint
+    PROFILING_MAX_PER_MINUTE = int(os.environ.get('PROFILING_MAX_PER_MINUTE', 6))  # per worker
+    PROFILING_MAX_FILES = int(os.environ.get('PROFILING_MAX_FILES', 50))
+    
+    # Slow query log: per-endpoint aggregates by statement fingerprint,
+    # top-N at /admin/queries/top
+    QUERY_LOG_ENABLED = os.environ.get('QUERY_LOG_ENABLED', 'true').lower() == 'true'
+    SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS', 200))
+    QUERY_LOG_DIR = os.environ.get('QUERY_LOG_DIR')  # default: <instance>/query_log
+    QUERY_LOG_DUMP_INTERVAL = int(os.environ.get('QUERY_LOG_DUMP_INTERVAL', 60))  # seconds
+    QUERY_LOG_MAX_ENTRIES = 2000  # distinct (endpoint, fingerprint) pairs per worker
+    
+    # Request tracing: spans for requests, SQL, PDF, email, captcha and crypto
+    # written as JSONL, plus an optional OTLP/HTTP collector
+    TRACING_ENABLED = os.environ.get('TRACING_ENABLED', 'false').lower() == 'true'
+    TRACING_SAMPLE_RATE = float(os.environ.get('TRACING_SAMPLE_RATE', 1.0))
+    TRACING_JSONL_PATH = os.environ.get('TRACING_JSONL_PATH')  # default: <instance>/traces/spans.jsonl
+    TRACING_OTLP_ENDPOINT = os.environ.get('OTEL_EXPORTER_OTLP_ENDPOINT', '')
+    TRACING_OTLP_HEADERS = os.environ.get('OTEL_EXPORTER_OTLP_HEADERS', '')
+    TRACING_SERVICE_NAME = os.environ.get('OTEL_SERVICE_NAME', 'eterno')
+    
+    # Background exports (CSV/XLSX/Parquet). 'thread' runs jobs in the web
+    # process; 'worker' leaves them for `flask export-worker`.
+    EXPORT_DIR = os.environ.get('EXPORT_DIR')  # default: <instance>/exports
+    EXPORT_JOB_MODE = os.environ.get('EXPORT_JOB_MODE', 'thread')
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 2000))
+    EXPORT_RETENTION_DAYS = int(os.environ.get('EXPORT_RETENTION_DAYS', 7))
+    EXPORT_JOB_STALE_MINUTES = 30  # running jobs without a progress heartbeat for this long are requeued
+    
+    # Analytics snapshot (Arrow files) behind /admin/analytics. 'thread' rebuilds
+    # it in the background when missing or older than ANALYTICS_MAX_AGE;
+    # 'command' leaves it to a scheduled `flask analytics-snapshot`
+    ANALYTICS_DIR = os.environ.get('ANALYTICS_DIR')  # default: <instance>/analytics
+    ANALYTICS_MAX_AGE = int(os.environ.get('ANALYTICS_MAX_AGE', 900))  # seconds
+    ANALYTICS_REFRESH_MODE = os.environ.get('ANALYTICS_REFRESH_MODE', 'thread')
+    
+    # ETag / 304 on polling endpoints (profile orders, cart badge, admin dashboard)
+    CONDITIONAL_GET_ENABLED = os.environ.get('CONDITIONAL_GET_ENABLED', 'true').lower() == 'true'
+    
+    # Page cache for anonymous /, /shop and /about: memory (per worker LRU),
+    # filesystem or sqlite (shared by the workers of one host), or none.
+    # Product/review changes invalidate entries through change_version.
+    PAGE_CACHE_BACKEND = os.environ.get('PAGE_CACHE_BACKEND', 'memory')
+    PAGE_CACHE_DIR = os.environ.get('PAGE_CACHE_DIR')  # default: <instance>/page_cache
+    PAGE_CACHE_TTL = int(os.environ.get('PAGE_CACHE_TTL', 300))  # seconds
+    PAGE_CACHE_MAX_ENTRIES = int(os.environ.get('PAGE_CACHE_MAX_ENTRIES', 256))
+    # Edge (CDN) caching of anonymous pages
+    PAGE_CACHE_S_MAXAGE = int(os.environ.get('PAGE_CACHE_S_MAXAGE', 60))
+    PAGE_CACHE_STALE_WHILE_REVALIDATE = int(os.environ.get('PAGE_CACHE_STALE_WHILE_REVALIDATE', 300))
+    
+    # Server-sent events (/events): each worker polls the realtime_event table
+    # every SSE_POLL_INTERVAL seconds (writes in the same worker wake it at once)
+    SSE_ENABLED = os.environ.get('SSE_ENABLED', 'true').lower() == 'true'
+    SSE_POLL_INTERVAL = float(os.environ.get('SSE_POLL_INTERVAL', 1.0))
+    SSE_HEARTBEAT = int(os.environ.get('SSE_HEARTBEAT', 15))  # seconds between keep-alive comments
+    SSE_MAX_STREAM_SECONDS = int(os.environ.get('SSE_MAX_STREAM_SECONDS', 300))
+    SSE_EVENT_RETENTION = int(os.environ.get('SSE_EVENT_RETENTION', 3600))  # seconds
+    SSE_QUEUE_SIZE = 100
+    SSE_REPLAY_LIMIT = 200
+    
+    # Sales velocity / low-stock forecasting (`flask inventory-velocity`, or
+    # refreshed on demand when older than INVENTORY_VELOCITY_MAX_AGE seconds)
+    INVENTORY_VELOCITY_MAX_AGE = int(os.environ.get('INVENTORY_VELOCITY_MAX_AGE', 300))
+    # Orders/sales younger than this are left for a later run, so ids that
+    # commit out of order are not skipped by the id cursor
+    INVENTORY_SETTLE_SECONDS = int(os.environ.get('INVENTORY_SETTLE_SECONDS', 120))
+    INVENTORY_LEAD_TIME_DAYS = int(os.environ.get('INVENTORY_LEAD_TIME_DAYS', 7))
+    INVENTORY_COVER_DAYS = int(os.environ.get('INVENTORY_COVER_DAYS', 14))
+    LOW_STOCK_DAYS = float(os.environ.get('LOW_STOCK_DAYS', 14))
+    LOW_STOCK_UNITS = int(os.environ.get('LOW_STOCK_UNITS', 5))
     
     # Session settings
     PERMANENT_SESSION_LIFETIME = timedelta(hours=24)
     SESSION_COOKIE_SECURE = False  # Set to True in production with HTTPS
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
+    # 'server' keeps session data in the user_session table (revocable) and
+    # only an opaque token in the cookie; 'cookie' is Flask's signed cookie
+    SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'server')
+    SESSION_CACHE_SIZE = int(os.environ.get('SESSION_CACHE_SIZE', 10000))
+    SESSION_CACHE_TTL = int(os.environ.get('SESSION_CACHE_TTL', 10))  # revocations reach other workers within this
+    SESSION_TOUCH_INTERVAL = int(os.environ.get('SESSION_TOUCH_INTERVAL', 300))  # seconds between expiry refreshes
+    SESSION_PURGE_INTERVAL = int(os.environ.get('SESSION_PURGE_INTERVAL', 600))
+    CURRENT_USER_CACHE_TTL = int(os.environ.get('CURRENT_USER_CACHE_TTL', 30))  # role changes reach other workers within this
+    CURRENT_USER_CACHE_SIZE = int(os.environ.get('CURRENT_USER_CACHE_SIZE', 10000))
+    
+    # Password hashing: scrypt, pbkdf2 or bcrypt. Hashes made with other
+    # settings are upgraded on the user's next successful login
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+    PASSWORD_SCRYPT_N = int(os.environ.get('PASSWORD_SCRYPT_N', 32768))
+    PASSWORD_SCRYPT_R = int(os.environ.get('PASSWORD_SCRYPT_R', 8))
+    PASSWORD_SCRYPT_P = int(os.environ.get('PASSWORD_SCRYPT_P', 1))
+    PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 600000))
+    PASSWORD_BCRYPT_ROUNDS = int(os.environ.get('PASSWORD_BCRYPT_ROUNDS', 12))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))  # concurrent hashes per process; 0 hashes inline
+    
+    # Rate limiting: 'memory' counts per worker process, 'database' shares
+    # counters in rate_limit_counter across workers and hosts, 'none' disables
+    RATE_LIMIT_STORAGE = os.environ.get('RATE_LIMIT_STORAGE', 'memory')
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    # name -> ((key kind, max attempts, window seconds), ...); kinds: ip, username, user
+    RATE_LIMITS = {
+        'login': (('ip', 20, 60), ('ip', 100, 3600), ('username', 10, 300)),
+        'register': (('ip', 5, 600),),
+        'otp': (('user', 5, 600),),
+        'voucher': (('ip', 30, 60), ('user', 20, 60)),
+    }
+    # The 'ip' key is the client address. Behind a load balancer or platform
+    # router, set PROXY_FIX_X_FOR to the number of proxies that append to
+    # X-Forwarded-For (werkzeug ProxyFix); left at 0 every client shares the
+    # proxy's address and one limit. Never set it higher than the real hop
+    # count, or clients can pick their own address.
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', 0))
     
     # Application settings
     ITEMS_PER_PAGE = 20
@@ -56,6 +204,26 @@ class Config:
     # CAPTCHA (configured via environment in production)
     RECAPTCHA_SITE_KEY = os.environ.get('RECAPTCHA_SITE_KEY', '')
     RECAPTCHA_SECRET_KEY = os.environ.get('RECAPTCHA_SECRET_KEY', '')
+    RECAPTCHA_VERIFY_URL = os.environ.get('RECAPTCHA_VERIFY_URL', 'https://www.google.com/recaptcha/api/siteverify')
+    CAPTCHA_POOL_SIZE = int(os.environ.get('CAPTCHA_POOL_SIZE', 10))  # keep-alive connections per process
+    CAPTCHA_CONNECT_TIMEOUT = float(os.environ.get('CAPTCHA_CONNECT_TIMEOUT', 1.0))
+    CAPTCHA_READ_TIMEOUT = float(os.environ.get('CAPTCHA_READ_TIMEOUT', 3.0))
+    CAPTCHA_BREAKER_FAILURES = int(os.environ.get('CAPTCHA_BREAKER_FAILURES', 5))  # consecutive failures that open the breaker
+    CAPTCHA_BREAKER_RESET = int(os.environ.get('CAPTCHA_BREAKER_RESET', 30))  # seconds before a trial call
+    CAPTCHA_TOKEN_CACHE_TTL = int(os.environ.get('CAPTCHA_TOKEN_CACHE_TTL', 120))  # reCAPTCHA tokens live 2 minutes
+    CAPTCHA_FAIL_OPEN = os.environ.get('CAPTCHA_FAIL_OPEN', 'false').lower() == 'true'  # accept when the verifier is down
+    
+    # One-time passcodes
+    OTP_MAX_ACTIVE = int(os.environ.get('OTP_MAX_ACTIVE', 3))  # live codes per user and purpose; older ones are retired
+    OTP_PURGE_BATCH = int(os.environ.get('OTP_PURGE_BATCH', 5000))
+    OTP_PURGE_INTERVAL = int(os.environ.get('OTP_PURGE_INTERVAL', 600))  # seconds between opportunistic purges
+    
+    # Static assets
+    ASSET_BASE_URL = os.environ.get('ASSET_BASE_URL', '')  # CDN/static host mirroring /static; image URLs are rewritten onto it
+    UPLOAD_CACHE_MAX_AGE = int(os.environ.get('UPLOAD_CACHE_MAX_AGE', 31536000))  # uploads are immutable (unique filenames)
+    SIGNED_URLS_ENABLED = os.environ.get('SIGNED_URLS_ENABLED', 'false').lower() == 'true'  # signed links for admin downloads
+    SIGNED_URL_TTL = int(os.environ.get('SIGNED_URL_TTL', 300))  # seconds
+    SIGNED_URL_KEY = os.environ.get('SIGNED_URL_KEY', '')  # default: SECRET_KEY
     
     # Email: send from loophco@gmail.com (set MAIL_USERNAME/MAIL_PASSWORD in env for SMTP)
     MAIL_SERVER = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
@@ -82,6 +250,11 @@ class ProductionConfig(Config):
     DEBUG = False
     TESTING = False
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'eterno_production_key_2024'
+    # Migrations run once in the release phase (see Procfile), not on every worker boot
+    AUTO_MIGRATE = os.environ.get('AUTO_MIGRATE', 'false').lower() == 'true'
+    DB_POOL_PROFILE = os.environ.get('DB_POOL_PROFILE', 'server')
+    RATE_LIMIT_STORAGE = os.environ.get('RATE_LIMIT_STORAGE', 'database')
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', 1))  # the platform router (see Procfile)
     SESSION_COOKIE_SECURE = True
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Strict'
@@ -108,6 +281,14 @@ class PythonAnywhereConfig(Config):
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Web apps run no background threads; run `flask export-worker` as an
+    # always-on task and `flask analytics-snapshot` as a scheduled task
+    EXPORT_JOB_MODE = os.environ.get('EXPORT_JOB_MODE', 'worker')
+    ANALYTICS_REFRESH_MODE = os.environ.get('ANALYTICS_REFRESH_MODE', 'command')
+    # Each open stream holds one of the few web workers; pages keep polling
+    SSE_ENABLED = os.environ.get('SSE_ENABLED', 'false').lower() == 'true'
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', 1))  # PythonAnywhere's front-end proxy
+    
     # Session settings for HTTPS
     SESSION_COOKIE_SECURE = True
     SESSION_COOKIE_HTTPONLY = True
@@ -120,16 +301,34 @@ class VercelConfig(Config):
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'vercel_secret_key_2024'
     # Prefer Supabase/Postgres URL in production; fallback keeps app bootable.
     SQLALCHEMY_DATABASE_URI = _normalize_database_url(os.environ.get('DATABASE_URL')) or 'sqlite:///:memory:'
+    # Each lambda instance keeps no pool of its own; point DATABASE_URL at PgBouncer/Supavisor
+    DB_POOL_PROFILE = os.environ.get('DB_POOL_PROFILE', 'serverless')
+    RATE_LIMIT_STORAGE = os.environ.get('RATE_LIMIT_STORAGE', 'database')  # instances share nothing in memory
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', 1))  # Vercel's edge
     SESSION_COOKIE_SECURE = True
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Strict'
+    METRICS_DIR = os.environ.get('METRICS_DIR', '/tmp/eterno_metrics')
+    PROFILING_DIR = os.environ.get('PROFILING_DIR', '/tmp/eterno_profiles')
+    QUERY_LOG_DIR = os.environ.get('QUERY_LOG_DIR', '/tmp/eterno_query_log')
+    TRACING_JSONL_PATH = os.environ.get('TRACING_JSONL_PATH', '/tmp/eterno_traces/spans.jsonl')
+    EXPORT_DIR = os.environ.get('EXPORT_DIR', '/tmp/eterno_exports')
+    ANALYTICS_DIR = os.environ.get('ANALYTICS_DIR', '/tmp/eterno_analytics')
+    PAGE_CACHE_DIR = os.environ.get('PAGE_CACHE_DIR', '/tmp/eterno_page_cache')
+    # Functions cannot hold long-lived streams; pages keep polling
+    SSE_ENABLED = os.environ.get('SSE_ENABLED', 'false').lower() == 'true'
+    # A function is frozen once it has answered, so export threads never
+    # finish; jobs wait for `flask export-worker` on a host sharing EXPORT_DIR
+    # (or use the streaming /admin/export/<kind> downloads)
+    EXPORT_JOB_MODE = os.environ.get('EXPORT_JOB_MODE', 'worker')
+    ANALYTICS_REFRESH_MODE = os.environ.get('ANALYTICS_REFRESH_MODE', 'command')
     # Disable Flask static file serving for Vercel (let Vercel handle it)
     SEND_FILE_MAX_AGE_DEFAULT = 0
 
 class TestingConfig(Config):
     """Testing environment configuration"""
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///test_eterno.db'
+    SQLALCHEMY_DATABASE_URI = _normalize_database_url(os.environ.get('TEST_DATABASE_URL')) or 'sqlite:///test_eterno.db'
     WTF_CSRF_ENABLED = False
 
 # Configuration dictionary
@@ -0,0 +1,20 @@
+"""
+ETERNO E-Commerce Platform - Gunicorn Settings
+Picked up automatically by `gunicorn run:app` (Procfile). The /events SSE
+stream keeps a connection open for minutes, so the default worker class is
+gthread (one thread per open stream) rather than sync. Set
+GUNICORN_WORKER_CLASS=gevent (pip install gevent) to make idle streams
+cost a greenlet instead of a thread.
+"""
+import os
+
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+# gthread: concurrent requests (including open streams) per worker
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+# gevent: concurrent connections per worker
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+# Worker heartbeat timeout; with gthread/gevent long streams do not trip it
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
@@ -0,0 +1,28 @@
+"""
+ETERNO E-Commerce Platform - Test Fixtures
+Tests run against TEST_DATABASE_URL when it is set (e.g. a scratch Postgres
+database), otherwise against a temporary SQLite file.
+"""
+import os
+import sys
+import tempfile
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if not os.environ.get('TEST_DATABASE_URL'):
+    os.environ['TEST_DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='eterno-tests-'), 'test.db')}"
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import create_app
+    app = create_app('testing')
+    app.config.update(RATE_LIMIT_ENABLED=False)
+    return app
+
+
+@pytest.fixture
+def app_context(app):
+    with app.app_context():
+        yield app
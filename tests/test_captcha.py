@@ -0,0 +1,109 @@
+"""
+ETERNO E-Commerce Platform - CAPTCHA Verifier Tests
+CaptchaVerifier and verify_token against the stand-in siteverify server in
+benchmarks/fake_captcha_server.py (tokens starting with 'pass' verify once).
+"""
+import time
+import pytest
+from benchmarks.fake_captcha_server import serve
+from app.utils.captcha import CaptchaVerifier, VerifierUnavailable, verify_token
+import app.utils.captcha as captcha
+
+SECRET = 'test-secret'
+
+
+@pytest.fixture
+def fake_server():
+    server = serve(port=0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _url(server):
+    return f'http://127.0.0.1:{server.server_port}/siteverify'
+
+
+def _tokens_seen(server):
+    return len(server.RequestHandlerClass.used)
+
+
+def test_token_cache_reuses_a_pass_for_the_same_subject_only(fake_server):
+    verifier = CaptchaVerifier(_url(fake_server))
+    assert verifier.verify(SECRET, 'pass-1', '10.0.0.1', subject='alice|alice@gmail.com')
+    # The server would now answer timeout-or-duplicate; the cache answers instead
+    assert verifier.verify(SECRET, 'pass-1', '10.0.0.1', subject='alice|alice@gmail.com')
+    assert _tokens_seen(fake_server) == 1
+    assert not verifier.verify(SECRET, 'pass-1', '10.0.0.1', subject='bob|bob@gmail.com')
+    assert not verifier.verify(SECRET, 'pass-1', '10.0.0.2', subject='alice|alice@gmail.com')
+
+
+def test_failed_tokens_are_not_cached(fake_server):
+    verifier = CaptchaVerifier(_url(fake_server))
+    assert not verifier.verify(SECRET, 'bad-1')
+    assert not verifier.verify(SECRET, 'bad-1')
+    assert not verifier.verify(SECRET, '')
+    assert verifier.breaker.state == 'closed'
+
+
+def test_breaker_opens_then_half_opens_then_closes(fake_server):
+    handler = fake_server.RequestHandlerClass
+    handler.error_rate = 1.0
+    verifier = CaptchaVerifier(_url(fake_server), breaker_threshold=2, breaker_reset=0.2)
+    for _ in range(2):
+        with pytest.raises(VerifierUnavailable):
+            verifier.verify(SECRET, 'pass-2')
+    assert verifier.breaker.state == 'open'
+    with pytest.raises(VerifierUnavailable, match='circuit open'):
+        verifier.verify(SECRET, 'pass-2')
+
+    time.sleep(0.25)
+    assert verifier.breaker.state == 'half-open'
+    # A failed trial call re-opens it straight away
+    with pytest.raises(VerifierUnavailable):
+        verifier.verify(SECRET, 'pass-2')
+    assert verifier.breaker.state == 'open'
+
+    time.sleep(0.25)
+    handler.error_rate = 0.0
+    assert verifier.verify(SECRET, 'pass-3')
+    assert verifier.breaker.state == 'closed'
+
+
+def test_unreachable_verifier_fails_closed_unless_configured_open(app, fake_server):
+    handler = fake_server.RequestHandlerClass
+    handler.error_rate = 1.0
+    settings = {'RECAPTCHA_SECRET_KEY': SECRET, 'RECAPTCHA_VERIFY_URL': _url(fake_server),
+                'CAPTCHA_BREAKER_FAILURES': 100}
+    previous = {key: app.config.get(key) for key in list(settings) + ['CAPTCHA_FAIL_OPEN']}
+    app.config.update(settings)
+    try:
+        with app.app_context():
+            app.config['CAPTCHA_FAIL_OPEN'] = False
+            assert verify_token('pass-4', '10.0.0.1') is False
+            app.config['CAPTCHA_FAIL_OPEN'] = True
+            assert verify_token('pass-4', '10.0.0.1') is True
+            handler.error_rate = 0.0
+            app.config['CAPTCHA_FAIL_OPEN'] = False
+            assert verify_token('pass-4', '10.0.0.1') is True
+    finally:
+        app.config.update(previous)
+        captcha._verifier.update(key=None, verifier=None)
+
+
+def test_unexpected_errors_end_the_half_open_trial(fake_server, monkeypatch):
+    def odd_body(*args):
+        raise KeyError('success')
+
+    verifier = CaptchaVerifier(_url(fake_server), breaker_threshold=1, breaker_reset=0.1)
+    monkeypatch.setattr(verifier, '_call', odd_body)
+    with pytest.raises(VerifierUnavailable):
+        verifier.verify(SECRET, 'pass-5')
+    assert verifier.breaker.state == 'open'
+    time.sleep(0.15)
+    with pytest.raises(VerifierUnavailable, match='KeyError'):
+        verifier.verify(SECRET, 'pass-5')  # the half-open trial
+    monkeypatch.undo()
+    time.sleep(0.15)
+    assert verifier.verify(SECRET, 'pass-5')
+    assert verifier.breaker.state == 'closed'
@@ -0,0 +1,47 @@
+"""
+Hot query shapes must be served by an index (EXPLAIN), on SQLite and,
+when TEST_DATABASE_URL points at one, on Postgres.
+"""
+import os
+import pytest
+from sqlalchemy import create_engine
+from app import db
+from app.utils.query_plans import _uses_index, explain_hot_queries
+
+
+def _scans(results):
+    return [(result['label'], result['plan']) for result in results if not result['uses_index']]
+
+
+def test_hot_queries_use_indexes_on_sqlite(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'plans.db'}")
+    db.metadata.create_all(engine)
+    try:
+        assert not _scans(explain_hot_queries(engine))
+    finally:
+        engine.dispose()
+
+
+def test_hot_queries_use_indexes_after_migrations(app_context):
+    """The configured test database, with its schema built by the migration runner at boot."""
+    assert not _scans(explain_hot_queries())
+
+
+@pytest.mark.skipif(not os.environ.get('TEST_DATABASE_URL', '').startswith('postgres'),
+                    reason='TEST_DATABASE_URL is not a Postgres database')
+def test_hot_queries_use_indexes_on_postgres(app_context):
+    assert db.engine.dialect.name == 'postgresql'
+    assert not _scans(explain_hot_queries())
+
+
+@pytest.mark.parametrize('dialect, lines, expected', [
+    ('postgresql', ['Limit  (cost=0.15..8.17 rows=1 width=8)', '  ->  Seq Scan on "order"  (cost=0.00..1.01 rows=1 width=8)'], False),
+    ('postgresql', ['Parallel Seq Scan on "order" o  (cost=0.00..1.01 rows=1 width=8)'], False),
+    ('postgresql', ['Index Scan using ix_order_user_created on "order"  (cost=0.15..8.17 rows=1 width=8)'], True),
+    ('postgresql', ['Seq Scan on order_items  (cost=0.00..1.01 rows=1 width=8)'], True),
+    ('sqlite', ['SCAN order'], False),
+    ('sqlite', ['SEARCH order USING INDEX ix_order_user_created (user_id=?)'], True),
+    ('sqlite', ['SCAN order USING INDEX ix_order_user_created'], True),
+])
+def test_uses_index_reads_quoted_identifiers(dialect, lines, expected):
+    assert _uses_index(dialect, 'order', lines) is expected